@@ -1,5 +1,13 @@
 from django.contrib import admin
-from .models import NotePost
+from .models import (
+    BatchGenerationRequest,
+    GenerationCache,
+    NotePost,
+    TranscriptFingerprint,
+)
 
 # Register your models here.
 admin.site.register(NotePost)
+admin.site.register(GenerationCache)
+admin.site.register(BatchGenerationRequest)
+admin.site.register(TranscriptFingerprint)
@@ -48,16 +48,19 @@ class NoteSearchView(APIView):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
 
-        sources = [
-            {
-                "note_id": d.metadata.get("note_id"),
-                "title": d.metadata.get("title", ""),
-                "source": d.metadata.get("source", ""),
-            }
-            for d in result.get("docs", [])
-        ]
+        # Notes are embedded per section, so one note can match several times.
+        sources = {}
+        for d in result.get("docs", []):
+            sources.setdefault(
+                d.metadata.get("note_id"),
+                {
+                    "note_id": d.metadata.get("note_id"),
+                    "title": d.metadata.get("title", ""),
+                    "source": d.metadata.get("source", ""),
+                },
+            )
 
         payload = NoteSearchResponseSerializer(
-            {"answer": result["answer"], "sources": sources}
+            {"answer": result["answer"], "sources": list(sources.values())}
         ).data
         return Response(payload, status=status.HTTP_200_OK)
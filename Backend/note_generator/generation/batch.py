@@ -0,0 +1,196 @@
+"""Offline bulk generation through the provider's batch completion API.
+
+Bulk imports and background regeneration don't need interactive latency, so
+instead of one completion call each they are queued as BatchGenerationRequest
+rows and sent as a single JSONL file to the batch endpoint:
+
+    queued rows -> submit_queued_requests()     -> one JSONL batch, rows SUBMITTED
+    beat task   -> collect_finished_batches()   -> NotePost per result, rows COMPLETED
+
+Each JSONL line carries custom_id="gen-<row pk>", which is how results are
+fanned back out to their rows. A batch request is a single prompt, so long
+transcripts are trimmed to the single-pass size with salience selection rather
+than map-reduced.
+
+Setting NOTES_BATCH_BASE_URL points the OpenAI client at another server, e.g.
+the local stand-in in tests/batch_server.py.
+"""
+
+import json
+import logging
+
+import openai
+from django.conf import settings
+from django.db import transaction
+
+from note_generator.generation.cache import store_generation
+from note_generator.generation.prompts import BATCH_PROMPT_VERSION, NOTES_PROMPT
+from note_generator.generation.select import fit_to_token_budget
+from note_generator.models import BatchGenerationRequest, NotePost
+from note_generator.utils.cache_utils import safe_cache_delete
+from note_generator.utils.note_sections import text_note_fields
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Provider batch states that will never produce (more) output.
+_BATCH_FAILED_STATES = {"failed", "expired", "cancelled"}
+
+
+def get_batch_client() -> openai.OpenAI:
+    return openai.OpenAI(
+        api_key=settings.OPENAI_API_KEY or "unset",
+        base_url=settings.NOTES_BATCH_BASE_URL or None,
+    )
+
+
+def build_batch_line(item: BatchGenerationRequest) -> dict:
+    transcript = fit_to_token_budget(
+        item.transcript, settings.NOTES_MAPREDUCE_THRESHOLD_TOKENS
+    )
+    return {
+        "custom_id": item.custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": settings.NOTES_LLM_MODEL,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": NOTES_PROMPT.format(transcription=transcript),
+                }
+            ],
+            "max_tokens": settings.NOTES_MAX_TOKENS,
+        },
+    }
+
+
+def parse_output_line(line: str) -> tuple[str, str | None, str | None]:
+    """Return (custom_id, generated text or None, error message or None)."""
+    record = json.loads(line)
+    custom_id = record.get("custom_id", "")
+    response = record.get("response") or {}
+    body = response.get("body") or {}
+    error = record.get("error") or body.get("error")
+    if error or response.get("status_code", 200) >= 400:
+        message = error.get("message") if isinstance(error, dict) else error
+        return custom_id, None, str(message or "request failed")
+    choices = body.get("choices") or [{}]
+    message = choices[0].get("message") or {}
+    text = (message.get("content") or "").strip()
+    if not text:
+        return custom_id, None, "empty completion"
+    return custom_id, text, None
+
+
+def submit_queued_requests(client=None) -> str | None:
+    """Send up to NOTES_BATCH_MAX_REQUESTS queued rows as one batch.
+
+    Returns the provider batch id, or None if nothing was queued.
+    """
+    items = list(
+        BatchGenerationRequest.objects.filter(
+            status=BatchGenerationRequest.Status.QUEUED
+        ).order_by("id")[: settings.NOTES_BATCH_MAX_REQUESTS]
+    )
+    if not items:
+        return None
+
+    client = client or get_batch_client()
+    jsonl = "\n".join(json.dumps(build_batch_line(item)) for item in items)
+    input_file = client.files.create(
+        file=("notetube-batch.jsonl", jsonl.encode("utf-8")), purpose="batch"
+    )
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+
+    BatchGenerationRequest.objects.filter(pk__in=[i.pk for i in items]).update(
+        status=BatchGenerationRequest.Status.SUBMITTED, batch_id=batch.id
+    )
+    logger.info(f"Submitted generation batch {batch.id} with {len(items)} requests")
+    return batch.id
+
+
+def _complete_item(item: BatchGenerationRequest, content: str) -> None:
+    with transaction.atomic():
+        note = NotePost.objects.create(
+            user=item.user,
+            youtube_title=item.youtube_title,
+            youtube_link=item.youtube_link or "",
+            **text_note_fields(content),
+            engine=NotePost.Engine.LLM,
+        )
+        item.note = note
+        item.status = BatchGenerationRequest.Status.COMPLETED
+        item.save(update_fields=["note", "status", "updated_at"])
+    store_generation(
+        item.transcript, settings.NOTES_LLM_MODEL, content, BATCH_PROMPT_VERSION
+    )
+    safe_cache_delete(f"notes:list:user:{item.user_id}")
+
+
+def _fail_items(items, error: str) -> None:
+    for item in items:
+        item.status = BatchGenerationRequest.Status.FAILED
+        item.error = error
+        item.save(update_fields=["status", "error", "updated_at"])
+
+
+def collect_batch(batch_id: str, client=None) -> bool:
+    """Fan a finished batch out into NotePosts. Returns False if still running."""
+    client = client or get_batch_client()
+    batch = client.batches.retrieve(batch_id)
+    items = {
+        item.custom_id: item
+        for item in BatchGenerationRequest.objects.filter(
+            batch_id=batch_id, status=BatchGenerationRequest.Status.SUBMITTED
+        ).select_related("user")
+    }
+
+    if batch.status in _BATCH_FAILED_STATES:
+        _fail_items(items.values(), f"Batch {batch.status}")
+        return True
+    if batch.status != "completed":
+        return False
+
+    lines = []
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if file_id:
+            lines.extend(client.files.content(file_id).text.splitlines())
+
+    for line in filter(None, lines):
+        custom_id, content, error = parse_output_line(line)
+        item = items.pop(custom_id, None)
+        if item is None:
+            continue
+        if content:
+            _complete_item(item, content)
+        else:
+            _fail_items([item], error or "request failed")
+
+    # Anything the provider didn't report on is failed rather than left hanging.
+    _fail_items(items.values(), "Missing from batch output")
+    return True
+
+
+def collect_finished_batches(client=None) -> int:
+    """Check every in-flight batch once. Returns how many batches finished."""
+    client = client or get_batch_client()
+    batch_ids = (
+        BatchGenerationRequest.objects.filter(
+            status=BatchGenerationRequest.Status.SUBMITTED
+        )
+        .values_list("batch_id", flat=True)
+        .distinct()
+    )
+    finished = 0
+    for batch_id in list(batch_ids):
+        try:
+            finished += collect_batch(batch_id, client)
+        except Exception as e:
+            logger.warning(f"Polling generation batch {batch_id} failed: {e}")
+    return finished
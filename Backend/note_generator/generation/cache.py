@@ -0,0 +1,107 @@
+"""Cross-user cache of generated notes, keyed by what actually determines them.
+
+Two users generating notes for the same video send the LLM an identical
+prompt, so the result is stored once in Postgres under
+sha256(transcript_hash, PROMPT_VERSION, model) and every later generation is a
+single indexed lookup. Bump PROMPT_VERSION whenever the prompts change so stale
+notes age out instead of being served.
+
+Batch generation (batch.py) stores its single-pass output under
+BATCH_PROMPT_VERSION. Lookups prefer the interactive PROMPT_VERSION entry and
+fall back to the batch one, so a bulk import still saves later LLM calls.
+
+On an exact miss, transcripts that are near-duplicates of one with a stored
+generation (see dedup.py) reuse that generation instead.
+"""
+
+import hashlib
+import logging
+
+from django.conf import settings
+from django.db.models import F
+
+from note_generator.generation.dedup import find_near_duplicate, index_transcript
+from note_generator.generation.prompts import BATCH_PROMPT_VERSION, PROMPT_VERSION
+from note_generator.models import GenerationCache
+
+logger = logging.getLogger(__name__)
+
+# Prompt versions a lookup may serve, most preferred first.
+READ_PROMPT_VERSIONS = (PROMPT_VERSION, BATCH_PROMPT_VERSION)
+
+
+def transcript_hash(transcript: str) -> str:
+    return hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+
+
+def generation_key(
+    transcript_sha: str, model: str, prompt_version: str = PROMPT_VERSION
+) -> str:
+    return hashlib.sha256(
+        f"{transcript_sha}:{prompt_version}:{model}".encode("utf-8")
+    ).hexdigest()
+
+
+def get_cached_generation(transcript: str, model: str) -> str | None:
+    """Return previously generated notes for this transcript/prompt/model, or
+    for a near-duplicate transcript, if any."""
+    sha = transcript_hash(transcript)
+    content = _get_by_hash(sha, model)
+    if content is not None or settings.NOTES_DEDUP_THRESHOLD <= 0:
+        return content
+
+    try:
+        match = find_near_duplicate(
+            transcript, settings.NOTES_DEDUP_THRESHOLD, model, READ_PROMPT_VERSIONS
+        )
+    except Exception as e:
+        logger.warning(f"Near-duplicate lookup failed: {e}")
+        return None
+    if match is None or match[0] == sha:
+        return None
+    logger.info(
+        f"Transcript {sha[:12]} is a near-duplicate of {match[0][:12]} "
+        f"(similarity {match[1]:.2f}), reusing its generation"
+    )
+    return _get_by_hash(match[0], model)
+
+
+def _get_by_hash(sha: str, model: str) -> str | None:
+    keys = [generation_key(sha, model, version) for version in READ_PROMPT_VERSIONS]
+    try:
+        found = dict(
+            GenerationCache.objects.filter(key__in=keys).values_list("key", "content")
+        )
+        key = next((key for key in keys if key in found), None)
+        if key is None:
+            return None
+        GenerationCache.objects.filter(key=key).update(hit_count=F("hit_count") + 1)
+        return found[key]
+    except Exception as e:
+        logger.warning(f"Generation cache lookup failed: {e}")
+        return None
+
+
+def store_generation(
+    transcript: str, model: str, content: str, prompt_version: str = PROMPT_VERSION
+) -> None:
+    """Record generated notes. Concurrent writers for the same key are harmless:
+    the first insert wins and later ones are ignored."""
+    if not content:
+        return
+    sha = transcript_hash(transcript)
+    try:
+        GenerationCache.objects.get_or_create(
+            key=generation_key(sha, model, prompt_version),
+            defaults={
+                "transcript_hash": sha,
+                "prompt_version": prompt_version,
+                "model": model,
+                "content": content,
+            },
+        )
+    except Exception as e:
+        logger.warning(f"Generation cache store failed: {e}")
+        return
+    if settings.NOTES_DEDUP_THRESHOLD > 0:
+        index_transcript(sha, transcript)
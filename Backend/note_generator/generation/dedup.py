@@ -0,0 +1,180 @@
+"""Near-duplicate transcript detection: MinHash signatures + banded LSH.
+
+The exact generation cache (cache.py) only helps when a transcript is byte for
+byte identical. The same lecture re-uploaded under another video id, or
+uploaded as an MP3 and transcribed by a different engine, differs in a few
+words but should not cost another LLM call.
+
+Every transcript with a stored generation is fingerprinted:
+
+  - shingles: hashed 5-word windows of the lowercased words
+  - a 128-value MinHash signature; the fraction of equal values estimates the
+    Jaccard similarity of two transcripts' shingle sets
+  - LSH: the signature is cut into 16 bands of 8 values and each band hashed
+    to a bucket. Transcripts sharing any bucket are candidates, which makes
+    pairs above roughly 0.7 similarity very likely to collide while unrelated
+    transcripts almost never do.
+
+Lookup is one indexed query over (band, bucket), restricted to transcripts
+that still have a generation for the requested model and prompt version and
+ordered by how many bands they share, followed by an exact signature comparison
+against the few best candidates. Everything is vectorized with NumPy.
+"""
+
+import hashlib
+import logging
+import re
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+
+from note_generator.models import (
+    GenerationCache,
+    TranscriptFingerprint,
+    TranscriptLSHBand,
+)
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+
+# Upper bound on candidates compared exactly per lookup.
+MAX_CANDIDATES = 50
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_SHINGLE_BASE = np.uint64(1_000_003)
+# Shingles are permuted in blocks so memory stays at NUM_PERM x block values.
+_BLOCK = 8192
+
+# Fixed seed: signatures must be comparable across processes and deploys.
+_rng = np.random.default_rng(0x4E6F7465)
+_PERM_A = _rng.integers(1, int(_MERSENNE_PRIME), size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, int(_MERSENNE_PRIME), size=NUM_PERM, dtype=np.uint64)
+
+
+def _word_hash(word: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(word.encode(), digest_size=8).digest(), "little"
+    )
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """Unique 32-bit hashes of the text's SHINGLE_WORDS-word windows."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return np.empty(0, dtype=np.uint64)
+
+    vocab: dict[str, int] = {}
+    ids = np.fromiter((vocab.setdefault(w, len(vocab)) for w in words), dtype=np.int64)
+    word_hashes = np.fromiter((_word_hash(w) for w in vocab), dtype=np.uint64)[ids]
+
+    # Polynomial hash over each window; uint64 arithmetic wraps, as intended.
+    n = len(words) - SHINGLE_WORDS + 1
+    shingles = np.zeros(n, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for offset in range(SHINGLE_WORDS):
+            shingles = shingles * _SHINGLE_BASE + word_hashes[offset : offset + n]
+    return np.unique((shingles >> np.uint64(32)) ^ (shingles & _MAX_HASH))
+
+
+def minhash_signature(text: str) -> np.ndarray | None:
+    """NUM_PERM-value MinHash signature, or None if the text is too short."""
+    shingles = shingle_hashes(text)
+    if shingles.size == 0:
+        return None
+
+    signature = np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for start in range(0, shingles.size, _BLOCK):
+            block = shingles[start : start + _BLOCK]
+            permuted = (
+                (_PERM_A[:, None] * block[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME
+            ) & _MAX_HASH
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+    return signature.astype(np.uint32)
+
+
+def band_buckets(signature: np.ndarray) -> list[int]:
+    """One signed 64-bit bucket id per LSH band."""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(rows.tobytes(), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+def estimated_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+def _signature_from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(bytes(data), dtype="<u4").astype(np.uint32)
+
+
+def index_transcript(transcript_sha: str, transcript: str) -> None:
+    """Fingerprint a transcript so later near-duplicates can find it."""
+    signature = minhash_signature(transcript)
+    if signature is None:
+        return
+    try:
+        with transaction.atomic():
+            fingerprint, created = TranscriptFingerprint.objects.get_or_create(
+                transcript_hash=transcript_sha,
+                defaults={"signature": signature.astype("<u4").tobytes()},
+            )
+            if created:
+                TranscriptLSHBand.objects.bulk_create(
+                    TranscriptLSHBand(fingerprint=fingerprint, band=band, bucket=bucket)
+                    for band, bucket in enumerate(band_buckets(signature))
+                )
+    except Exception as e:
+        logger.warning(f"Indexing transcript fingerprint failed: {e}")
+
+
+def find_near_duplicate(
+    transcript: str, threshold: float, model: str, prompt_versions: tuple[str, ...]
+) -> tuple[str, float] | None:
+    """Return (transcript_hash, similarity) of the closest indexed transcript
+    at or above `threshold` that has a generation for `model` under one of
+    `prompt_versions`, or None."""
+    signature = minhash_signature(transcript)
+    if signature is None:
+        return None
+
+    match_any_band = Q()
+    for band, bucket in enumerate(band_buckets(signature)):
+        match_any_band |= Q(band=band, bucket=bucket)
+    has_generation = Exists(
+        GenerationCache.objects.filter(
+            transcript_hash=OuterRef("fingerprint__transcript_hash"),
+            model=model,
+            prompt_version__in=prompt_versions,
+        )
+    )
+    # Transcripts sharing more bands are more likely to be similar, so those
+    # are the ones kept when there are more than MAX_CANDIDATES.
+    candidate_ids = (
+        TranscriptLSHBand.objects.filter(match_any_band)
+        .filter(has_generation)
+        .values("fingerprint_id")
+        .annotate(shared_bands=Count("id"))
+        .order_by("-shared_bands", "fingerprint_id")
+        .values_list("fingerprint_id", flat=True)[:MAX_CANDIDATES]
+    )
+
+    best = None
+    for sha, data in TranscriptFingerprint.objects.filter(
+        pk__in=list(candidate_ids)
+    ).values_list("transcript_hash", "signature"):
+        similarity = estimated_similarity(signature, _signature_from_bytes(data))
+        if similarity >= threshold and (best is None or similarity > best[1]):
+            best = (sha, similarity)
+    return best
@@ -0,0 +1,65 @@
+"""Map-reduce note generation for transcripts too long for a single prompt.
+
+    transcript
+        -> split into token-bounded chunks
+        -> map:    summarize each chunk concurrently (bounded thread pool)
+        -> reduce: one call that turns the ordered chunk notes into the
+                   standard TL;DR / KEY TERMS / QUIZ format
+
+The map calls are network-bound, so a thread pool gives real parallelism and
+total latency tracks the slowest chunk rather than the transcript length.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from note_generator.generation.prompts import CHUNK_NOTES_PROMPT, REDUCE_NOTES_PROMPT
+from note_generator.generation.tokens import split_by_tokens
+
+logger = logging.getLogger(__name__)
+
+# complete(prompt, max_tokens, on_token=None) -> generated text
+CompleteFn = Callable[..., str]
+
+
+def map_reduce_notes(
+    transcript: str,
+    complete: CompleteFn,
+    *,
+    chunk_tokens: int,
+    max_workers: int,
+    map_max_tokens: int,
+    reduce_max_tokens: int,
+    on_token: Callable[[str], None] | None = None,
+) -> str:
+    """Generate notes for `transcript` via map-reduce.
+
+    Only the reduce call is streamed through `on_token`; the map outputs are
+    intermediate and never shown to the user.
+    """
+    chunks = split_by_tokens(transcript, chunk_tokens)
+    total = len(chunks)
+    logger.info(
+        f"map_reduce_notes: {total} chunks of <= {chunk_tokens} tokens, "
+        f"{max_workers} workers"
+    )
+
+    def summarize(item: tuple[int, str]) -> str:
+        index, chunk = item
+        prompt = CHUNK_NOTES_PROMPT.format(index=index, total=total, chunk=chunk)
+        return complete(prompt, map_max_tokens)
+
+    # executor.map preserves input order, so the reduce step sees the chunk
+    # notes in transcript order regardless of which call finished first.
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total))) as pool:
+        chunk_notes = list(pool.map(summarize, enumerate(chunks, start=1)))
+
+    joined = "\n\n".join(
+        f"PART {i}\n{notes.strip()}" for i, notes in enumerate(chunk_notes, start=1)
+    )
+    return complete(
+        REDUCE_NOTES_PROMPT.format(chunk_notes=joined),
+        reduce_max_tokens,
+        on_token=on_token,
+    )
@@ -0,0 +1,154 @@
+"""Transcript normalization: strip caption noise before it reaches the LLM.
+
+SerpAPI caption text and YouTube auto-captions carry a lot of tokens that
+teach the model nothing:
+
+  - rolling captions, where each caption line repeats the tail of the previous
+    one ("so today we're / so today we're going to talk about")
+  - non-speech markers: [Music], [Applause], (laughs), ♪, ">>" speaker changes
+  - filler words: um, uh, erm, hmm ...
+  - broken whitespace and HTML entities (&#39;)
+
+`normalize_transcript` removes all of it in one left-to-right pass over the
+words. Rolling-caption repeats are detected as the current word closing an
+n-gram that exactly repeats the n-gram before it; a small index of recent
+positions per word keeps that check O(1) per word instead of O(max n-gram).
+
+Speakers repeat themselves on purpose too ("thank you, thank you", a list
+item said twice), so a short repeat is only dropped where a caption line
+starts with it, the rolling-caption pattern. Caption snippets are therefore
+joined one per line (`join_caption_lines`); a repeat with no line break in
+front of it must be at least MIN_UNMARKED_REPEAT words long to be dropped.
+"""
+
+import html
+import re
+from dataclasses import dataclass
+from typing import Iterable
+
+from note_generator.generation.tokens import count_tokens
+
+# Bracketed spans are matched whole so "[Music]" and "[ Applause ]" are one token.
+_TOKEN_RE = re.compile(r"\[[^\]]{0,40}\]|\([^)]{0,40}\)|\S+")
+_PUNCT_STRIP = ".,!?;:\"'“”‘’-–—…"
+
+# Only sounds that are never content: "er" (ER) and "mm" (millimetres) are
+# real words in lectures, so they stay.
+FILLER_WORDS = frozenset(
+    {"um", "umm", "uh", "uhh", "uhm", "erm", "ah", "hmm", "hm", "mhm"}
+)
+
+# Parenthesized words that mark non-speech. Square brackets are always
+# non-speech in caption text, but parentheses can be real speech, so they are
+# only dropped when the content is one of these.
+NON_SPEECH_PARENS = frozenset(
+    {
+        "music",
+        "applause",
+        "laughter",
+        "laughs",
+        "laughing",
+        "inaudible",
+        "crosstalk",
+        "silence",
+        "cheering",
+        "coughs",
+        "sighs",
+        "no audio",
+        "background noise",
+    }
+)
+
+NON_SPEECH_TOKENS = frozenset({"♪", "♫", "♪♪", ">>", ">>>", "-", "--"})
+
+# Rolling-caption repeats shorter than MIN_REPEAT words are left alone so that
+# real emphasis ("very very") survives; longer than MAX_REPEAT is not a
+# caption artifact. Repeats that don't start a caption line are only dropped
+# from MIN_UNMARKED_REPEAT words up.
+MIN_REPEAT = 2
+MIN_UNMARKED_REPEAT = 8
+MAX_REPEAT = 30
+
+
+@dataclass
+class NormalizedTranscript:
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_removed(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def _is_noise(token: str, key: str) -> bool:
+    if token[0] == "[":
+        return True
+    if token[0] == "(" and token[-1] == ")":
+        return token[1:-1].strip().lower() in NON_SPEECH_PARENS
+    return key in FILLER_WORDS or token in NON_SPEECH_TOKENS or not key
+
+
+def join_caption_lines(lines: Iterable[str]) -> str:
+    """Join caption snippets one per line, keeping the caption boundaries that
+    `clean_caption_text` uses to tell rolling captions from real repetition."""
+    return "\n".join(line.strip() for line in lines if line.strip())
+
+
+def clean_caption_text(text: str) -> str:
+    """Return `text` with caption noise and rolling-caption repeats removed."""
+    text = html.unescape(text)
+    words: list[str] = []  # output words, original casing/punctuation
+    keys: list[str] = []  # parallel comparison keys (lowercased, unpunctuated)
+    line_starts: list[bool] = []  # parallel: word starts a caption line
+    recent: dict[str, list[int]] = {}  # key -> recent positions in `keys`
+    gap_start = 0  # where the text since the last kept word begins
+
+    for match in _TOKEN_RE.finditer(text):
+        token = match.group()
+        key = token.lower().strip(_PUNCT_STRIP)
+        if _is_noise(token, key):
+            continue
+
+        words.append(token)
+        keys.append(key)
+        line_starts.append(text.find("\n", gap_start, match.start()) >= 0)
+        gap_start = match.end()
+        end = len(keys)
+
+        # Does this word close an n-gram that repeats the n-gram right before
+        # it? Only earlier occurrences of the same word can start such a match.
+        positions = recent.setdefault(key, [])
+        repeated = False
+        for pos in reversed(positions):
+            n = end - 1 - pos
+            if n > MAX_REPEAT:
+                break
+            if n < MIN_REPEAT or 2 * n > end:
+                continue
+            if n < MIN_UNMARKED_REPEAT and not line_starts[end - n]:
+                continue
+            if keys[pos] == key and keys[end - n :] == keys[end - 2 * n : end - n]:
+                del words[end - n :]
+                del keys[end - n :]
+                del line_starts[end - n :]
+                repeated = True
+                break
+
+        if not repeated:
+            positions.append(end - 1)
+            # Positions further back than MAX_REPEAT can never match again.
+            if len(positions) > 8 and end - positions[0] > MAX_REPEAT + 1:
+                positions[:] = [p for p in positions if end - p <= MAX_REPEAT + 1]
+
+    return " ".join(words)
+
+
+def normalize_transcript(text: str) -> NormalizedTranscript:
+    """Clean `text` and report how many LLM tokens the cleanup saved."""
+    cleaned = clean_caption_text(text or "")
+    return NormalizedTranscript(
+        text=cleaned,
+        tokens_before=count_tokens(text or ""),
+        tokens_after=count_tokens(cleaned),
+    )
@@ -0,0 +1,105 @@
+"""Prompt templates for LLM note generation.
+
+NOTES_FORMAT is the output contract every downstream consumer relies on (the
+Notion exporter keys off these exact headings), so the single-pass prompt and
+the map-reduce "reduce" prompt both embed it verbatim.
+"""
+
+# Part of the generation cache key: bump on any change to the prompts below so
+# cached notes produced by the old wording are no longer served.
+PROMPT_VERSION = "notes-v1"
+# Batch generation sends NOTES_PROMPT once over a salience-trimmed transcript
+# instead of map-reducing it, so its output is cached under its own version and
+# only served when there is no PROMPT_VERSION entry.
+BATCH_PROMPT_VERSION = f"{PROMPT_VERSION}-batch"
+
+NOTES_FORMAT = """FORMATTING RULES (STRICT)
+- Output must be PLAIN TEXT only.
+- Do NOT use Markdown at all (no **bold**, no tables, no code fences).
+- Use the exact indentation and bullet styles shown below.
+- Put a blank line between sections.
+- Wrap long lines naturally (don’t make one giant paragraph).
+
+BULLET STYLE
+- Use "-" for bullets.
+- Use two spaces before sub-bullets.
+Example:
+- Main bullet
+  - Sub bullet
+
+OUTPUT FORMAT (exact headings + structure)
+
+TL;DR
+- (5 bullets)
+
+KEY TERMS
+- Term: definition.
+  - Common mistake: ... (only if implied in transcript)
+
+HOW IT WORKS
+- (3–6 bullets)
+
+STEP-BY-STEP
+1) ...
+2) ...
+(If none, write exactly: None found in transcript.)
+
+QUICK CHECK QUIZ (with answers)
+Q1) Question?
+A1) Answer.
+
+Q2) Question?
+A2) Answer.
+(8–10 total)
+
+ANCHORS
+- "short quote snippet" -> what it teaches
+(6–10 total)
+"""
+
+NOTES_PROMPT = (
+    """You are a strict transcript-based note writer.
+
+I will paste a YouTube transcript. Create clean, exam-ready notes using ONLY what appears in the transcript.
+If something is missing or unclear, write: [UNCLEAR IN TRANSCRIPT: ...]. Do not add outside facts.
+
+"""
+    + NOTES_FORMAT
+    + """
+Now wait. Here is the transcript:
+{transcription}
+"""
+)
+
+# Map step: one call per transcript chunk. The output only feeds the reduce
+# step, so it favours dense, lossless extraction over presentation.
+CHUNK_NOTES_PROMPT = """You are condensing part {index} of {total} of a YouTube transcript.
+
+Extract, using ONLY what appears in this part:
+- every key idea, claim and explanation, in order
+- every term that is defined, with its definition
+- any procedure or steps, in order
+- 2-3 short verbatim quotes worth remembering, in double quotes
+
+Write terse plain-text bullets starting with "-". No headings, no commentary.
+
+Transcript part {index} of {total}:
+{chunk}
+"""
+
+# Reduce step: turns the concatenated chunk notes into the final note format.
+REDUCE_NOTES_PROMPT = (
+    """You are a strict transcript-based note writer.
+
+I will paste condensed notes taken, in order, from consecutive parts of one YouTube transcript.
+Merge them into clean, exam-ready notes using ONLY what appears in them. Remove repetition across parts.
+If something is missing or unclear, write: [UNCLEAR IN TRANSCRIPT: ...]. Do not add outside facts.
+Quotes in double quotes are verbatim from the transcript; use them for ANCHORS.
+
+"""
+    + NOTES_FORMAT
+    + """
+Here are the condensed notes:
+{chunk_notes}
+"""
+)
@@ -0,0 +1,110 @@
+"""Per-job choice between the extractive content-service and the LLM.
+
+The content-service returns an extractive outline in well under a second and
+costs nothing; the LLM writes much better notes but is slow and metered, and
+gets slower exactly when everyone is using it. `choose_engine` picks one per
+job from:
+
+  - the tier the user asked for: "fast" (an extractive outline now) or
+    "full" (LLM-quality notes)
+  - transcript length, in tokens: long transcripts cost several LLM calls
+    (map-reduce), so they are the first to move off the LLM under load
+  - live load: Celery queue depth, and the rolling LLM latency recorded by
+    llm_client
+
+The other engine is always kept as the fallback, so a routing choice never
+turns into a failed job.
+"""
+
+import logging
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from note_generator.generation.stream import get_redis
+from note_generator.llm_client import get_llm_stats
+from note_generator.models import NotePost
+
+logger = logging.getLogger(__name__)
+
+ENGINE_EXTRACTIVE = NotePost.Engine.EXTRACTIVE.value
+ENGINE_LLM = NotePost.Engine.LLM.value
+
+TIER_FAST = "fast"
+TIER_FULL = "full"
+TIERS = (TIER_FAST, TIER_FULL)
+
+# Celery's default queue; the Redis broker keeps it as a list of this name.
+CELERY_QUEUE_NAME = "celery"
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    engine: str
+    reason: str
+
+    @property
+    def fallback(self) -> str:
+        return ENGINE_LLM if self.engine == ENGINE_EXTRACTIVE else ENGINE_EXTRACTIVE
+
+
+def current_queue_depth() -> int | None:
+    """Number of tasks waiting in the Celery queue, or None if unknown."""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        return int(client.llen(CELERY_QUEUE_NAME))
+    except Exception as e:
+        logger.warning(f"Reading Celery queue depth failed: {e}")
+        return None
+
+
+def current_llm_latency_ms() -> float | None:
+    """Rolling average latency of the notes model, or None with no samples."""
+    stats = get_llm_stats(settings.NOTES_LLM_MODEL)
+    return stats["latency_ewma_ms"] if stats else None
+
+
+def choose_engine(
+    transcript_tokens: int,
+    tier: str,
+    *,
+    queue_depth: int | None,
+    llm_latency_ms: float | None,
+) -> RouteDecision:
+    """Pick the engine for one job. Unknown load signals count as healthy."""
+    if tier == TIER_FAST:
+        return RouteDecision(ENGINE_EXTRACTIVE, "fast tier")
+
+    if llm_latency_ms is not None and llm_latency_ms > settings.NOTES_ROUTE_LLM_SLOW_MS:
+        return RouteDecision(
+            ENGINE_EXTRACTIVE, f"llm slow ({llm_latency_ms:.0f}ms average)"
+        )
+
+    busy = (
+        queue_depth is not None and queue_depth > settings.NOTES_ROUTE_MAX_QUEUE_DEPTH
+    )
+    if busy and transcript_tokens > settings.NOTES_MAPREDUCE_THRESHOLD_TOKENS:
+        return RouteDecision(
+            ENGINE_EXTRACTIVE,
+            f"queue busy ({queue_depth} waiting) and long transcript "
+            f"({transcript_tokens} tokens)",
+        )
+
+    return RouteDecision(ENGINE_LLM, "full tier")
+
+
+def route_job(transcript_tokens: int, tier: str) -> RouteDecision:
+    """`choose_engine` fed with the current live load signals."""
+    decision = choose_engine(
+        transcript_tokens,
+        tier,
+        queue_depth=current_queue_depth(),
+        llm_latency_ms=current_llm_latency_ms(),
+    )
+    logger.info(
+        f"Routing {transcript_tokens}-token transcript ({tier} tier) to "
+        f"{decision.engine}: {decision.reason}"
+    )
+    return decision
@@ -0,0 +1,111 @@
+"""Budget-aware salience selection: keep the most informative sentences.
+
+For very long transcripts it is cheaper (and not much worse) to send the LLM
+the sentences that best represent the whole video than every sentence. Each
+sentence is scored by the cosine similarity between its TF-IDF vector and the
+transcript's TF-IDF centroid, which rewards sentences about the video's main
+topics over asides and chit-chat. The highest-scoring sentences are kept, in
+their original order, until the token budget is spent.
+
+Scoring is fully vectorized over the (sentence, term) pairs with
+`np.bincount`, so it never materializes a sentences x vocabulary matrix.
+"""
+
+import re
+
+import numpy as np
+
+from note_generator.generation.tokens import count_tokens
+
+_SENTENCE_RE = re.compile(r"[^.!?]+[.!?]*")
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+# Auto-captions often have no punctuation at all; anything longer than this is
+# re-split into fixed windows so selection still has units to choose between.
+MAX_SENTENCE_WORDS = 40
+WINDOW_WORDS = 25
+
+# Sentences with fewer content words than this are down-weighted: a one-word
+# sentence can have a high cosine to the centroid while saying nothing.
+MIN_CONTENT_WORDS = 4
+
+STOPWORDS = frozenset(
+    """a about above after again all also am an and any are as at be because been
+    before being below between both but by can could did do does doing down during
+    each few for from further get got had has have having he her here hers him his
+    how i if in into is it its itself just know like me more most my no nor not now
+    of off on once only or other our ours out over own really right same she so
+    some such than that that's the their theirs them then there these they this
+    those through to too um uh under until up very was we were what when where
+    which while who whom why will with would yeah you your yours""".split()
+)
+
+
+def split_sentences(text: str) -> list[str]:
+    sentences = []
+    for match in _SENTENCE_RE.finditer(text):
+        sentence = match.group().strip()
+        if not sentence:
+            continue
+        words = sentence.split()
+        if len(words) <= MAX_SENTENCE_WORDS:
+            sentences.append(sentence)
+            continue
+        for i in range(0, len(words), WINDOW_WORDS):
+            sentences.append(" ".join(words[i : i + WINDOW_WORDS]))
+    return sentences
+
+
+def score_sentences(sentences: list[str]) -> np.ndarray:
+    """Return one salience score per sentence (higher = more central)."""
+    vocab: dict[str, int] = {}
+    sent_ids: list[int] = []
+    term_ids: list[int] = []
+    for i, sentence in enumerate(sentences):
+        for word in _WORD_RE.findall(sentence.lower()):
+            if word not in STOPWORDS and len(word) > 1:
+                sent_ids.append(i)
+                term_ids.append(vocab.setdefault(word, len(vocab)))
+
+    n_sent, n_terms = len(sentences), len(vocab)
+    if not term_ids:
+        return np.zeros(n_sent)
+
+    # Collapse repeated (sentence, term) pairs into term frequencies.
+    pair_keys, tf = np.unique(
+        np.asarray(sent_ids, dtype=np.int64) * n_terms + np.asarray(term_ids),
+        return_counts=True,
+    )
+    sent = pair_keys // n_terms
+    term = pair_keys % n_terms
+
+    df = np.bincount(term, minlength=n_terms)
+    idf = np.log((n_sent + 1) / (df + 1)) + 1.0
+    weights = (1.0 + np.log(tf)) * idf[term]
+
+    centroid = np.bincount(term, weights=weights, minlength=n_terms)
+    dots = np.bincount(sent, weights=weights * centroid[term], minlength=n_sent)
+    norms = np.sqrt(np.bincount(sent, weights=weights**2, minlength=n_sent))
+    cosine = dots / np.maximum(norms * np.linalg.norm(centroid), 1e-12)
+
+    content_words = np.bincount(sent, weights=tf, minlength=n_sent)
+    return cosine * np.minimum(1.0, content_words / MIN_CONTENT_WORDS)
+
+
+def fit_to_token_budget(text: str, budget_tokens: int) -> str:
+    """Return `text` unchanged if it fits `budget_tokens`, else its most salient
+    sentences in original order, stopping once the budget is spent."""
+    if budget_tokens <= 0 or count_tokens(text) <= budget_tokens:
+        return text
+
+    sentences = split_sentences(text)
+    costs = np.array([count_tokens(s) for s in sentences])
+    scores = score_sentences(sentences)
+
+    # Stable sort so equal scores keep transcript order.
+    order = np.argsort(-scores, kind="stable")
+    within_budget = np.cumsum(costs[order]) <= budget_tokens
+    keep = np.zeros(len(sentences), dtype=bool)
+    keep[order[within_budget]] = True
+
+    return " ".join(s for s, kept in zip(sentences, keep) if kept)
@@ -0,0 +1,120 @@
+"""Relay LLM tokens from Celery workers to the browser through Redis.
+
+Each generation task gets a Redis list (the replayable event log) plus a
+pub/sub channel used purely as a wake-up signal:
+
+    worker:  RPUSH notes:stream:<task_id> <event>  +  PUBLISH ...:wake
+    web:     SUBSCRIBE ...:wake, then LRANGE from the last index it sent
+
+Reading from the list rather than the pub/sub payloads means a browser that
+connects late (or reconnects) still sees every token, in order, with no gap
+between "subscribe" and "first message".
+
+Events are JSON objects: {"type": "token", "text": ...},
+{"type": "section", "heading": ...} (the content-service finished a topic of
+the outline), {"type": "draft", "note_id": ...} (an extractive draft was saved),
+{"type": "done", "note_id": ...} or {"type": "error", "error": ...}.
+"""
+
+import json
+import logging
+import time
+from functools import lru_cache
+from typing import Iterator
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_EVENTS = {"done", "error"}
+
+
+def _stream_key(task_id: str) -> str:
+    return f"notes:stream:{task_id}"
+
+
+def _wake_channel(task_id: str) -> str:
+    return f"notes:stream:{task_id}:wake"
+
+
+@lru_cache(maxsize=1)
+def get_redis():
+    """Shared Redis client, or None when Redis isn't configured (tests, local dev)."""
+    if not settings.REDIS_URL:
+        return None
+    import redis
+
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+class NoteStreamPublisher:
+    """Publishes generation events for one task. Never raises: a broken stream
+    must not fail note generation, the page just falls back to polling."""
+
+    def __init__(self, task_id: str | None):
+        self.task_id = task_id
+        self._redis = get_redis() if task_id else None
+
+    @property
+    def enabled(self) -> bool:
+        return self._redis is not None
+
+    def _publish(self, event: dict) -> None:
+        if self._redis is None:
+            return
+        try:
+            key = _stream_key(self.task_id)
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.rpush(key, json.dumps(event))
+            pipe.expire(key, settings.NOTES_STREAM_TTL)
+            pipe.publish(_wake_channel(self.task_id), "1")
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Note stream publish failed for task {self.task_id}: {e}")
+            # Stop trying for the rest of this task instead of logging per token.
+            self._redis = None
+
+    def token(self, text: str) -> None:
+        if text:
+            self._publish({"type": "token", "text": text})
+
+    def section(self, heading: str) -> None:
+        self._publish({"type": "section", "heading": heading})
+
+    def draft(self, note_id: int) -> None:
+        self._publish({"type": "draft", "note_id": note_id})
+
+    def done(self, note_id: int) -> None:
+        self._publish({"type": "done", "note_id": note_id})
+
+    def error(self, message: str) -> None:
+        self._publish({"type": "error", "error": message})
+
+
+def iter_stream_events(task_id: str, timeout: float) -> Iterator[dict]:
+    """Yield a task's events in order until a terminal event or `timeout` seconds.
+
+    Raises RuntimeError if Redis isn't configured.
+    """
+    client = get_redis()
+    if client is None:
+        raise RuntimeError("Redis is not configured")
+
+    key = _stream_key(task_id)
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    # Subscribe before the first LRANGE so nothing published in between is missed.
+    pubsub.subscribe(_wake_channel(task_id))
+    try:
+        sent = 0
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for raw in client.lrange(key, sent, -1):
+                sent += 1
+                event = json.loads(raw)
+                yield event
+                if event.get("type") in TERMINAL_EVENTS:
+                    return
+            pubsub.get_message(timeout=1.0)
+        yield {"type": "timeout"}
+    finally:
+        pubsub.close()
@@ -0,0 +1,76 @@
+"""Token counting and token-bounded splitting for LLM prompts.
+
+tiktoken downloads its BPE tables on first use, which fails on hosts without
+outbound access. When the encoding can't be loaded we fall back to the usual
+~4 characters per token estimate rather than failing note generation.
+"""
+
+import logging
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import accumulate
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio for English text, used when tiktoken is unavailable.
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return max(1, len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _word_token_ends(text: str, words: list[re.Match]) -> list[int]:
+    """Running token count of `text` up to the end of each word.
+
+    The text is encoded once and each word is mapped onto the token offsets,
+    so a token straddling the gap before a word is counted with that word.
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return list(
+            accumulate(
+                max(1, (len(word.group()) + 1) // CHARS_PER_TOKEN) for word in words
+            )
+        )
+    tokens = encoding.encode(text, disallowed_special=())
+    _, offsets = encoding.decode_with_offsets(tokens)
+    return [bisect_left(offsets, word.end()) for word in words]
+
+
+def split_by_tokens(text: str, max_tokens: int) -> list[str]:
+    """Split `text` into word-aligned chunks of at most ~`max_tokens` tokens.
+
+    A chunk never cuts a word in half; a single word longer than the budget
+    still becomes its own chunk.
+    """
+    words = list(re.finditer(r"\S+", text))
+    ends = _word_token_ends(text, words)
+    chunks: list[str] = []
+    start, base = 0, 0
+
+    for i, end in enumerate(ends):
+        if i > start and end - base > max_tokens:
+            chunks.append(" ".join(word.group() for word in words[start:i]))
+            start, base = i, ends[i - 1]
+
+    if words:
+        chunks.append(" ".join(word.group() for word in words[start:]))
+    return chunks
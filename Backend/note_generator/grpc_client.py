@@ -2,9 +2,12 @@ from __future__ import annotations
 
 # pyright: reportAttributeAccessIssue=false
 
+import itertools
+import json
 import logging
+import os
 import sys
-import time
+import threading
 from pathlib import Path
 
 import grpc
@@ -18,26 +21,282 @@ if str(REPO_ROOT) not in sys.path:
 from shared_proto.python import content_service_pb2
 from shared_proto.python import content_service_pb2_grpc
 
+from note_generator.utils.note_sections import BULLET
+
 logger = logging.getLogger(__name__)
 
 
-def _build_notes_text(response: content_service_pb2.ProcessTranscriptResponse) -> str:
-    lines = []
+_SERVICE = "content.v1.ContentService"
+
+
+def _target() -> str:
+    # dns:/// resolves every replica behind the name, not just the first.
+    return f"dns:///{getattr(settings, 'CONTENT_SERVICE_HOST', 'content-service')}:{getattr(settings, 'CONTENT_SERVICE_PORT', 50051)}"
+
+
+def _service_config() -> str:
+    """gRPC service config: load balancing plus per-method retry/hedging.
+
+    Retries are transparent to callers and only cover failures where the
+    server never ran the request (UNAVAILABLE) or shed it (RESOURCE_EXHAUSTED);
+    a processing error (INTERNAL) is not retried. Health checks are hedged:
+    a second copy goes to another replica if the first is slow to answer.
+    """
+    attempts = min(int(getattr(settings, "CONTENT_SERVICE_RETRIES", 1)) + 1, 5)
+    retry_policy = {
+        "maxAttempts": attempts,
+        "initialBackoff": "0.5s",
+        "maxBackoff": "5s",
+        "backoffMultiplier": 2,
+        "retryableStatusCodes": ["UNAVAILABLE", "RESOURCE_EXHAUSTED"],
+    }
+    return json.dumps(
+        {
+            "loadBalancingConfig": [
+                {getattr(settings, "CONTENT_SERVICE_LB_POLICY", "round_robin"): {}}
+            ],
+            "methodConfig": [
+                {
+                    "name": [
+                        {"service": _SERVICE, "method": "ProcessTranscript"},
+                        {"service": _SERVICE, "method": "ProcessTranscriptBatch"},
+                        {"service": _SERVICE, "method": "ProcessTranscriptStream"},
+                    ],
+                    "retryPolicy": retry_policy,
+                },
+                {
+                    "name": [{"service": _SERVICE, "method": "HealthCheck"}],
+                    "hedgingPolicy": {
+                        "maxAttempts": 2,
+                        "hedgingDelay": "0.2s",
+                        "nonFatalStatusCodes": ["UNAVAILABLE"],
+                    },
+                },
+            ],
+            # Stop retrying when most calls are failing anyway.
+            "retryThrottling": {"maxTokens": 10, "tokenRatio": 0.1},
+        }
+    )
+
+
+def _channel_options() -> list[tuple[str, int | str]]:
+    return [
+        ("grpc.service_config", _service_config()),
+        ("grpc.enable_retries", 1),
+        # Ping idle connections so a dead content-service (or a NAT that
+        # dropped the flow) is noticed before the next note needs it.
+        (
+            "grpc.keepalive_time_ms",
+            int(getattr(settings, "CONTENT_SERVICE_KEEPALIVE_MS", 30000)),
+        ),
+        ("grpc.keepalive_timeout_ms", 10000),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+        # Reconnect quickly after a content-service restart, backing off to 5s.
+        ("grpc.initial_reconnect_backoff_ms", 200),
+        ("grpc.min_reconnect_backoff_ms", 200),
+        ("grpc.max_reconnect_backoff_ms", 5000),
+        (
+            "grpc.max_send_message_length",
+            int(getattr(settings, "CONTENT_SERVICE_MAX_SEND_BYTES", 32 * 1024 * 1024)),
+        ),
+        (
+            "grpc.max_receive_message_length",
+            int(
+                getattr(settings, "CONTENT_SERVICE_MAX_RECEIVE_BYTES", 16 * 1024 * 1024)
+            ),
+        ),
+        # Each pooled channel gets its own connection.
+        ("grpc.use_local_subchannel_pool", 1),
+    ]
+
+
+_COMPRESSION = {
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+    "none": grpc.Compression.NoCompression,
+}
+
+
+def _compression_for(size: int) -> grpc.Compression:
+    """Compress requests of at least CONTENT_SERVICE_COMPRESSION_MIN_BYTES;
+    below that the CPU costs more than the bytes saved."""
+    if size < int(getattr(settings, "CONTENT_SERVICE_COMPRESSION_MIN_BYTES", 8192)):
+        return grpc.Compression.NoCompression
+    return _COMPRESSION[getattr(settings, "CONTENT_SERVICE_COMPRESSION", "gzip")]
+
+
+class _ChannelPool:
+    """A few long-lived channels to one target, handed out round-robin."""
+
+    def __init__(self, config: tuple):
+        self.config = config
+        self.pid = os.getpid()
+        target, size, options = config
+        self.channels = [
+            grpc.insecure_channel(target, options=list(options))
+            for _ in range(max(size, 1))
+        ]
+        self.stubs = [
+            content_service_pb2_grpc.ContentServiceStub(channel)
+            for channel in self.channels
+        ]
+        self._next = itertools.count()
+
+    def stub(self) -> content_service_pb2_grpc.ContentServiceStub:
+        return self.stubs[next(self._next) % len(self.stubs)]
+
+    def close(self) -> None:
+        for channel in self.channels:
+            channel.close()
+
+
+_pool: _ChannelPool | None = None
+_pool_lock = threading.Lock()
+
+
+def _pool_config() -> tuple:
+    return (
+        _target(),
+        int(getattr(settings, "CONTENT_SERVICE_CHANNELS", 1)),
+        tuple(_channel_options()),
+    )
+
+
+def get_stub() -> content_service_pb2_grpc.ContentServiceStub:
+    """Stub on this process's pooled channels, created on first use.
+
+    Channels are reused across calls, so notes skip connection setup. A
+    forked child (Celery prefork) never touches its parent's channels and
+    builds its own; changing the target or channel settings rebuilds the pool.
+    """
+    global _pool
+    config = _pool_config()
+    pool = _pool
+    if pool is None or pool.pid != os.getpid() or pool.config != config:
+        with _pool_lock:
+            pool = _pool
+            if pool is None or pool.pid != os.getpid() or pool.config != config:
+                if pool is not None and pool.pid == os.getpid():
+                    pool.close()
+                pool = _pool = _ChannelPool(config)
+    return pool.stub()
+
+
+def close_channels() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.close()
+        _pool = None
+
+
+def _forget_pool_after_fork() -> None:
+    # The child must neither use nor close the parent's channels.
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_pool_after_fork)
+
+
+def _sections_from_response(
+    response: content_service_pb2.ProcessTranscriptResponse,
+) -> list[dict]:
+    """Map the response onto NotePost.sections (see utils/note_sections.py)."""
+    sections = []
     if response.summary:
-        lines.append("TL;DR")
-        lines.append(f"- {response.summary}")
-        lines.append("")
+        sections.append(
+            {
+                "heading": "TL;DR",
+                "items": [{"kind": BULLET, "text": response.summary, "level": 0}],
+            }
+        )
 
     for section in response.sections:
-        lines.append(section.heading or "Section")
-        bullets = list(section.bullets)
-        if bullets:
-            lines.extend([f"- {item}" for item in bullets])
+        bullets = list(section.bullets) or ["(No details)"]
+        sections.append(
+            {
+                "heading": section.heading or "Section",
+                "items": [{"kind": BULLET, "text": b, "level": 0} for b in bullets],
+            }
+        )
+
+    return sections
+
+
+def _transcript_chunks(
+    transcript_text: str,
+    source_url: str,
+    title: str,
+    max_sections: int,
+    chunk_chars: int,
+):
+    """Request stream for ProcessTranscriptStream; metadata rides on the first chunk."""
+    for start in range(0, max(len(transcript_text), 1), chunk_chars):
+        text = transcript_text[start : start + chunk_chars]
+        if start == 0:
+            yield content_service_pb2.TranscriptChunk(
+                text=text,
+                source_url=source_url,
+                title=title,
+                max_sections=max_sections,
+            )
         else:
-            lines.append("- (No details)")
-        lines.append("")
+            yield content_service_pb2.TranscriptChunk(text=text)
+
 
-    return "\n".join(lines).strip()
+def process_transcript_stream_via_grpc(
+    transcript_text: str,
+    source_url: str = "",
+    title: str = "",
+    max_sections: int = 6,
+    on_section=None,
+) -> list[dict]:
+    """Stream a long transcript to the content-service in chunks.
+
+    `on_section(heading, bullets)` is called for each topic section as the
+    server finalizes it; the return value is the complete sections list, as
+    from `process_transcript_via_grpc`.
+    """
+    timeout_seconds = float(getattr(settings, "CONTENT_SERVICE_STREAM_TIMEOUT", 300))
+    chunk_chars = int(getattr(settings, "CONTENT_SERVICE_STREAM_CHUNK_CHARS", 65536))
+
+    requests = _transcript_chunks(
+        transcript_text, source_url, title, max_sections, chunk_chars
+    )
+    try:
+        for event in get_stub().ProcessTranscriptStream(
+            requests,
+            timeout=timeout_seconds,
+            wait_for_ready=True,
+            compression=_compression_for(len(transcript_text)),
+        ):
+            if event.HasField("section"):
+                if on_section is not None:
+                    on_section(event.section.heading, list(event.section.bullets))
+                continue
+
+            response = event.result
+            if response.status and response.status.lower() != "ok":
+                raise RuntimeError(
+                    response.error_message or "content-service returned error"
+                )
+            logger.info(
+                "content-service stream success chunks=%s", response.chunk_count
+            )
+            return _sections_from_response(response)
+    except grpc.RpcError as exc:
+        logger.warning(
+            "content-service stream failed target=%s code=%s error=%s",
+            _target(),
+            exc.code(),
+            exc.details(),
+        )
+        raise RuntimeError(f"content-service unavailable: {exc.details()}") from exc
+
+    raise RuntimeError("content-service stream ended without a result")
 
 
 def process_transcript_via_grpc(
@@ -45,10 +304,23 @@ def process_transcript_via_grpc(
     source_url: str = "",
     title: str = "",
     max_sections: int = 6,
-) -> str:
-    target = f"{getattr(settings, 'CONTENT_SERVICE_HOST', 'content-service')}:{getattr(settings, 'CONTENT_SERVICE_PORT', 50051)}"
+    on_section=None,
+) -> list[dict]:
+    """Process a transcript into note sections.
+
+    `on_section(heading, bullets)` is only called for streamed (long)
+    transcripts, as their sections are finalized; short ones return at once.
+    """
+    # Long transcripts are streamed: they would approach the message size
+    # limit, and the server can start on the first chunk.
+    if len(transcript_text) > int(
+        getattr(settings, "CONTENT_SERVICE_STREAM_THRESHOLD_CHARS", 262144)
+    ):
+        return process_transcript_stream_via_grpc(
+            transcript_text, source_url, title, max_sections, on_section
+        )
+
     timeout_seconds = float(getattr(settings, "CONTENT_SERVICE_TIMEOUT", 10))
-    retries = int(getattr(settings, "CONTENT_SERVICE_RETRIES", 1))
 
     request = content_service_pb2.ProcessTranscriptRequest(
         transcript_text=transcript_text,
@@ -57,54 +329,104 @@ def process_transcript_via_grpc(
         max_sections=max_sections,
     )
 
-    last_error: Exception | None = None
+    # Retries and replica selection happen inside the channel (_service_config).
+    try:
+        response = get_stub().ProcessTranscript(
+            request,
+            timeout=timeout_seconds,
+            wait_for_ready=True,
+            compression=_compression_for(request.ByteSize()),
+        )
+    except grpc.RpcError as exc:
+        logger.warning(
+            "content-service call failed target=%s code=%s error=%s",
+            _target(),
+            exc.code(),
+            exc.details(),
+        )
+        raise RuntimeError(f"content-service unavailable: {exc.details()}") from exc
 
-    for attempt in range(retries + 1):
-        try:
-            with grpc.insecure_channel(target) as channel:
-                stub = content_service_pb2_grpc.ContentServiceStub(channel)
-                response = stub.ProcessTranscript(
-                    request,
-                    timeout=timeout_seconds,
-                    wait_for_ready=True,
-                )
+    if response.status and response.status.lower() != "ok":
+        raise RuntimeError(response.error_message or "content-service returned error")
+
+    logger.info("content-service success chunks=%s", response.chunk_count)
+    return _sections_from_response(response)
 
-            if response.status and response.status.lower() != "ok":
-                raise RuntimeError(
-                    response.error_message or "content-service returned error"
-                )
 
-            logger.info("content-service success chunks=%s", response.chunk_count)
-            return _build_notes_text(response)
+def process_transcripts_batch_via_grpc(
+    items: list[dict], batch_size: int | None = None
+) -> list[dict]:
+    """Process many transcripts with ProcessTranscriptBatch, `batch_size` per call.
+
+    Each item is a dict of ProcessTranscriptRequest fields (`transcript_text`,
+    and optionally `source_url`, `title`, `max_sections`). Returns one
+    `{"sections": [...], "error": ""}` dict per item, in order; a failed item
+    (or every item of a failed call) has empty sections and the error.
+    """
+    target = _target()
+    timeout_seconds = float(getattr(settings, "CONTENT_SERVICE_BATCH_TIMEOUT", 120))
+    batch_size = batch_size or int(getattr(settings, "CONTENT_SERVICE_BATCH_SIZE", 16))
+
+    results = []
+    for start in range(0, len(items), batch_size):
+        batch = items[start : start + batch_size]
+        request = content_service_pb2.ProcessTranscriptBatchRequest(
+            items=[
+                content_service_pb2.ProcessTranscriptRequest(
+                    transcript_text=item["transcript_text"],
+                    source_url=item.get("source_url", ""),
+                    title=item.get("title", ""),
+                    max_sections=item.get("max_sections", 6),
+                )
+                for item in batch
+            ]
+        )
+        try:
+            response = get_stub().ProcessTranscriptBatch(
+                request,
+                timeout=timeout_seconds,
+                wait_for_ready=True,
+                compression=_compression_for(request.ByteSize()),
+            )
         except Exception as exc:
-            last_error = exc
             logger.warning(
-                "content-service call failed attempt=%s/%s target=%s error=%s",
-                attempt + 1,
-                retries + 1,
+                "content-service batch failed items=%s target=%s error=%s",
+                len(batch),
                 target,
                 exc,
             )
-            if attempt < retries:
-                time.sleep(0.5)
+            results.extend({"sections": [], "error": str(exc)} for _ in batch)
+            continue
+
+        for result in response.results:
+            if result.status and result.status.lower() != "ok":
+                results.append(
+                    {
+                        "sections": [],
+                        "error": result.error_message
+                        or "content-service returned error",
+                    }
+                )
+            else:
+                results.append(
+                    {"sections": _sections_from_response(result), "error": ""}
+                )
+        logger.info("content-service batch success items=%s", len(batch))
 
-    raise RuntimeError(f"content-service unavailable: {last_error}")
+    return results
 
 
 def health_check_via_grpc(caller="django-web"):
-    target = f"{getattr(settings, 'CONTENT_SERVICE_HOST', 'content-service')}:{getattr(settings, 'CONTENT_SERVICE_PORT', 50051)}"
     timeout_seconds = float(getattr(settings, "CONTENT_SERVICE_TIMEOUT", 10))
     request = content_service_pb2.HealthCheckRequest(
         caller=caller,
     )
     try:
-        with grpc.insecure_channel(target) as channel:
-            stub = content_service_pb2_grpc.ContentServiceStub(channel)
-            response = stub.HealthCheck(
-                request,
-                timeout=timeout_seconds,
-                wait_for_ready=True,
-            )
+        response = get_stub().HealthCheck(
+            request,
+            timeout=timeout_seconds,
+            wait_for_ready=True,
+        )
     except Exception as e:
         raise RuntimeError(f"health check failed: {e}") from e
 
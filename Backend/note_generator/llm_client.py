@@ -0,0 +1,302 @@
+"""Process-wide OpenAI client for note generation and the RAG chain.
+
+One pooled client per process (rebuilt after fork, so Celery prefork children
+never share a parent's sockets), with explicit timeouts and our own retry
+loop: jittered exponential backoff on 429 / 5xx / timeouts, honouring the
+provider's Retry-After when it sends one. The SDK's built-in retries are
+disabled on the shared clients so there is exactly one retry policy; the RAG
+chat model and embeddings go through `call_with_retries` as well.
+
+Every attempt first reserves capacity from the cluster-wide rate limiter
+(llm_ratelimit.py), charged one request plus prompt + max_tokens tokens.
+
+Every call records latency and input/output tokens: a log line per call plus
+a rolling per-model summary in the Django cache (`get_llm_stats`) that other
+parts of the app can use to react to provider slowness.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Awaitable, Callable, TypeVar
+
+import httpx
+import openai
+from django.conf import settings
+
+from note_generator.generation.tokens import count_tokens
+from note_generator.llm_ratelimit import aacquire, acquire
+from note_generator.utils.cache_utils import safe_cache_get, safe_cache_set
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Weight of the newest sample in the rolling latency average.
+LATENCY_EWMA_ALPHA = 0.2
+
+_RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+)
+
+
+@dataclass
+class LLMUsage:
+    model: str
+    latency_ms: float
+    input_tokens: int
+    output_tokens: int
+
+
+def _timeout() -> openai.Timeout:
+    return openai.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+    )
+
+
+@lru_cache(maxsize=1)
+def _build_client(pid: int) -> openai.OpenAI:
+    return openai.OpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        timeout=_timeout(),
+        max_retries=0,
+        http_client=openai.DefaultHttpxClient(limits=_limits(), timeout=_timeout()),
+    )
+
+
+@lru_cache(maxsize=1)
+def _build_async_client(pid: int) -> openai.AsyncOpenAI:
+    return openai.AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        timeout=_timeout(),
+        max_retries=0,
+        http_client=openai.DefaultAsyncHttpxClient(
+            limits=_limits(), timeout=_timeout()
+        ),
+    )
+
+
+def get_client() -> openai.OpenAI:
+    """The pooled sync client for this process."""
+    # Keyed on pid: a forked worker gets its own pool instead of the parent's.
+    return _build_client(os.getpid())
+
+
+def get_async_client() -> openai.AsyncOpenAI:
+    """The pooled async client for this process."""
+    return _build_async_client(os.getpid())
+
+
+def _backoff_delay(attempt: int, error: Exception) -> float:
+    """Full-jitter exponential backoff, or the server's Retry-After if given."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), settings.LLM_BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(
+        0, min(settings.LLM_BACKOFF_MAX, settings.LLM_BACKOFF_BASE * 2**attempt)
+    )
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, _RETRYABLE_ERRORS):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _log_retry(attempt: int, delay: float, error: Exception) -> None:
+    logger.warning(
+        f"LLM call failed (attempt {attempt + 1}), retrying in {delay:.1f}s: {error}"
+    )
+
+
+def call_with_retries(attempt: Callable[[], T]) -> T:
+    """Run `attempt` under the shared retry policy (for calls made outside
+    `complete`, e.g. by LangChain)."""
+    for n in range(settings.LLM_MAX_RETRIES + 1):
+        try:
+            return attempt()
+        except Exception as e:
+            if not _is_retryable(e) or n == settings.LLM_MAX_RETRIES:
+                raise
+            delay = _backoff_delay(n, e)
+            _log_retry(n, delay, e)
+            time.sleep(delay)
+    raise RuntimeError("unreachable")
+
+
+async def acall_with_retries(attempt: Callable[[], Awaitable[T]]) -> T:
+    """Async variant of `call_with_retries`."""
+    for n in range(settings.LLM_MAX_RETRIES + 1):
+        try:
+            return await attempt()
+        except Exception as e:
+            if not _is_retryable(e) or n == settings.LLM_MAX_RETRIES:
+                raise
+            delay = _backoff_delay(n, e)
+            _log_retry(n, delay, e)
+            await asyncio.sleep(delay)
+    raise RuntimeError("unreachable")
+
+
+def record_usage(usage: LLMUsage) -> None:
+    """Log one call and fold it into the rolling per-model stats."""
+    logger.info(
+        "llm call model=%s latency_ms=%.0f input_tokens=%s output_tokens=%s",
+        usage.model,
+        usage.latency_ms,
+        usage.input_tokens,
+        usage.output_tokens,
+    )
+    key = f"llm:stats:{usage.model}"
+    stats = safe_cache_get(key) or {
+        "calls": 0,
+        "latency_ewma_ms": usage.latency_ms,
+        "input_tokens": 0,
+        "output_tokens": 0,
+    }
+    stats["calls"] += 1
+    stats["latency_ewma_ms"] += LATENCY_EWMA_ALPHA * (
+        usage.latency_ms - stats["latency_ewma_ms"]
+    )
+    stats["input_tokens"] += usage.input_tokens
+    stats["output_tokens"] += usage.output_tokens
+    safe_cache_set(key, stats, timeout=settings.LLM_STATS_TTL)
+
+
+def get_llm_stats(model: str) -> dict | None:
+    """Rolling stats for `model`: calls, latency_ewma_ms, input/output tokens."""
+    return safe_cache_get(f"llm:stats:{model}")
+
+
+def _messages(prompt: str) -> list[dict]:
+    return [{"role": "user", "content": prompt}]
+
+
+def _usage_tokens(usage) -> tuple[int, int]:
+    if usage is None:
+        return 0, 0
+    return usage.prompt_tokens or 0, usage.completion_tokens or 0
+
+
+def _complete_once(
+    prompt: str, model: str, max_tokens: int, on_token: Callable[[str], None] | None
+) -> tuple[str, LLMUsage]:
+    client = get_client()
+    start = time.perf_counter()
+
+    if on_token is None:
+        response = client.chat.completions.create(
+            model=model, messages=_messages(prompt), max_tokens=max_tokens
+        )
+        text = response.choices[0].message.content or ""
+        input_tokens, output_tokens = _usage_tokens(response.usage)
+    else:
+        parts = []
+        input_tokens = output_tokens = 0
+        for chunk in client.chat.completions.create(
+            model=model,
+            messages=_messages(prompt),
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        ):
+            if chunk.usage is not None:
+                input_tokens, output_tokens = _usage_tokens(chunk.usage)
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                on_token(delta)
+        text = "".join(parts)
+
+    latency_ms = (time.perf_counter() - start) * 1000
+    return text.strip(), LLMUsage(model, latency_ms, input_tokens, output_tokens)
+
+
+def complete(
+    prompt: str,
+    *,
+    max_tokens: int,
+    model: str | None = None,
+    on_token: Callable[[str], None] | None = None,
+) -> str:
+    """Single-turn completion with retries. Streams deltas to `on_token` if given.
+
+    A streamed call is only retried if it failed before the first token, so
+    the user never sees duplicated text.
+    """
+    model = model or settings.NOTES_LLM_MODEL
+    estimated_tokens = count_tokens(prompt) + max_tokens
+    streamed = False
+
+    def tracking_on_token(text: str) -> None:
+        nonlocal streamed
+        streamed = True
+        on_token(text)
+
+    for attempt in range(settings.LLM_MAX_RETRIES + 1):
+        acquire(model, estimated_tokens)
+        try:
+            text, usage = _complete_once(
+                prompt, model, max_tokens, tracking_on_token if on_token else None
+            )
+            record_usage(usage)
+            return text
+        except Exception as e:
+            if streamed or not _is_retryable(e) or attempt == settings.LLM_MAX_RETRIES:
+                raise
+            delay = _backoff_delay(attempt, e)
+            _log_retry(attempt, delay, e)
+            time.sleep(delay)
+    raise RuntimeError("unreachable")
+
+
+async def acomplete(prompt: str, *, max_tokens: int, model: str | None = None) -> str:
+    """Async variant of `complete` (non-streaming) for asyncio callers."""
+    model = model or settings.NOTES_LLM_MODEL
+    client = get_async_client()
+    estimated_tokens = count_tokens(prompt) + max_tokens
+
+    for attempt in range(settings.LLM_MAX_RETRIES + 1):
+        await aacquire(model, estimated_tokens)
+        start = time.perf_counter()
+        try:
+            response = await client.chat.completions.create(
+                model=model, messages=_messages(prompt), max_tokens=max_tokens
+            )
+        except Exception as e:
+            if not _is_retryable(e) or attempt == settings.LLM_MAX_RETRIES:
+                raise
+            delay = _backoff_delay(attempt, e)
+            _log_retry(attempt, delay, e)
+            await asyncio.sleep(delay)
+            continue
+
+        input_tokens, output_tokens = _usage_tokens(response.usage)
+        record_usage(
+            LLMUsage(
+                model,
+                (time.perf_counter() - start) * 1000,
+                input_tokens,
+                output_tokens,
+            )
+        )
+        return (response.choices[0].message.content or "").strip()
+    raise RuntimeError("unreachable")
@@ -0,0 +1,122 @@
+"""Cluster-wide provider rate limiting, shared by every worker through Redis.
+
+Each model has two buckets, requests/minute and tokens/minute, matching how
+the provider meters us. A caller charges one request plus its estimated
+tokens, and the Lua script below reserves capacity in both buckets atomically.
+
+Buckets use GCRA (a token bucket stored as a single "theoretical arrival
+time" per key). A reservation is always granted; it comes back with how long
+to sleep before the slot opens. Slots are handed out in the order callers
+arrive, so waiting is FIFO-fair. When the cluster is over the limit, workers
+queue up behind each other at the provider's rate instead of all hitting the
+provider together and getting a burst of 429s.
+
+Models without configured limits, and deployments without Redis, are not
+limited.
+"""
+
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+
+from note_generator.generation.stream import get_redis
+
+logger = logging.getLogger(__name__)
+
+# KEYS: request bucket, token bucket
+# ARGV: seconds per request, seconds per token, tokens, burst seconds, max wait
+# Returns {granted (1/0), wait in microseconds}.
+_RESERVE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000000 + tonumber(now_parts[2])
+local burst = tonumber(ARGV[4]) * 1000000
+local max_wait = tonumber(ARGV[5]) * 1000000
+local costs = {tonumber(ARGV[1]) * 1000000, tonumber(ARGV[2]) * tonumber(ARGV[3]) * 1000000}
+
+local new_tats = {}
+local wait = 0
+for i = 1, 2 do
+    local tat = tonumber(redis.call('GET', KEYS[i]) or now)
+    if tat < now then tat = now end
+    new_tats[i] = tat + costs[i]
+    local bucket_wait = new_tats[i] - burst - now
+    if bucket_wait > wait then wait = bucket_wait end
+end
+
+if wait > max_wait then
+    return {0, math.floor(wait)}
+end
+for i = 1, 2 do
+    local ttl = math.ceil((new_tats[i] - now) / 1000) + 1000
+    redis.call('SET', KEYS[i], string.format('%.0f', new_tats[i]), 'PX', ttl)
+end
+return {1, math.floor(wait)}
+"""
+
+
+class LLMRateLimitExceeded(RuntimeError):
+    """The cluster is so far over a model's limit that waiting isn't worth it."""
+
+
+def _limits_for(model: str) -> dict | None:
+    limits = settings.LLM_RATE_LIMITS.get(model)
+    if not limits or not limits.get("rpm") or not limits.get("tpm"):
+        return None
+    return limits
+
+
+def _reserve(model: str, tokens: int) -> float:
+    """Reserve one request and `tokens` for `model`; return seconds to wait."""
+    limits = _limits_for(model)
+    client = get_redis()
+    if limits is None or client is None:
+        return 0.0
+
+    try:
+        granted, wait_us = client.eval(
+            _RESERVE_SCRIPT,
+            2,
+            f"llm:ratelimit:{model}:requests",
+            f"llm:ratelimit:{model}:tokens",
+            60.0 / limits["rpm"],
+            60.0 / limits["tpm"],
+            max(int(tokens), 0),
+            settings.LLM_RATE_LIMIT_BURST_SECONDS,
+            settings.LLM_RATE_LIMIT_MAX_WAIT,
+        )
+    except Exception as e:
+        # A Redis outage must not stop generation; fall back to unthrottled.
+        logger.warning(f"LLM rate limiter unavailable, not throttling: {e}")
+        return 0.0
+
+    wait = int(wait_us) / 1_000_000
+    if not int(granted):
+        raise LLMRateLimitExceeded(
+            f"{model} is rate limited for another {wait:.0f}s "
+            f"(max wait {settings.LLM_RATE_LIMIT_MAX_WAIT:.0f}s)"
+        )
+    return max(wait, 0.0)
+
+
+def acquire(model: str, tokens: int) -> float:
+    """Block until `model` has capacity for one request of `tokens` tokens.
+
+    Returns the seconds waited. Raises LLMRateLimitExceeded if the wait
+    would exceed LLM_RATE_LIMIT_MAX_WAIT.
+    """
+    wait = _reserve(model, tokens)
+    if wait > 0:
+        logger.info(f"LLM rate limiter: waiting {wait:.2f}s for {model}")
+        time.sleep(wait)
+    return wait
+
+
+async def aacquire(model: str, tokens: int) -> float:
+    """Async variant of `acquire`."""
+    wait = await asyncio.to_thread(_reserve, model, tokens)
+    if wait > 0:
+        logger.info(f"LLM rate limiter: waiting {wait:.2f}s for {model}")
+        await asyncio.sleep(wait)
+    return wait
@@ -0,0 +1,64 @@
+"""
+Management command to queue many YouTube videos for offline batch generation.
+
+Notes are generated through the provider batch API (see
+note_generator/generation/batch.py) instead of the interactive completion path,
+so bulk imports don't compete with users for LLM capacity.
+
+Usage:
+    python manage.py bulk_generate_notes alice links.txt
+    python manage.py bulk_generate_notes alice "https://youtu.be/xyz" ...
+"""
+
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from note_generator.views import normalize_youtube_url
+
+
+class Command(BaseCommand):
+    help = "Queue YouTube videos for offline note generation via the batch API"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", type=str, help="Owner of the new notes")
+        parser.add_argument(
+            "sources",
+            nargs="+",
+            help="YouTube links, or files containing one link per line",
+        )
+
+    def handle(self, *args, **options):
+        from note_generator.tasks import queue_batch_generation_task
+
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"✗ No user named {options['username']!r}")
+
+        links = []
+        for source in options["sources"]:
+            path = Path(source)
+            if path.is_file():
+                links.extend(
+                    line.strip()
+                    for line in path.read_text().splitlines()
+                    if line.strip()
+                )
+            else:
+                links.append(source)
+
+        queued = 0
+        for raw in links:
+            try:
+                link = normalize_youtube_url(raw)
+            except ValueError as e:
+                self.stdout.write(self.style.WARNING(f"✗ Skipping {raw}: {e}"))
+                continue
+            queue_batch_generation_task.delay(user.id, link)
+            queued += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ Queued {queued} video(s) for batch generation")
+        )
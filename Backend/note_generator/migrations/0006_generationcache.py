@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-19 03:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("note_generator", "0005_noteembedding"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GenerationCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64, unique=True)),
+                ("transcript_hash", models.CharField(db_index=True, max_length=64)),
+                ("prompt_version", models.CharField(max_length=32)),
+                ("model", models.CharField(max_length=64)),
+                ("content", models.TextField()),
+                ("hit_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
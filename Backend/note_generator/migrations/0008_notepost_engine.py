@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-19 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("note_generator", "0007_batchgenerationrequest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notepost",
+            name="engine",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("extractive", "Extractive (content-service)"),
+                    ("llm", "LLM"),
+                ],
+                default="",
+                max_length=16,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("note_generator", "0008_notepost_engine"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notepost",
+            name="is_draft",
+            field=models.BooleanField(default=False),
+        ),
+    ]
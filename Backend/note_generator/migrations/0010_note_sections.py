@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("note_generator", "0009_notepost_is_draft"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="noteembedding",
+            name="vector_ids",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="notepost",
+            name="sections",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -1,15 +1,35 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from note_generator.utils.note_sections import parse_sections
+
 
 # Create your models here.
 class NotePost(models.Model):
+    class Engine(models.TextChoices):
+        EXTRACTIVE = "extractive", "Extractive (content-service)"
+        LLM = "llm", "LLM"
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     youtube_title = models.CharField(max_length=300)
     youtube_link = models.URLField(blank=True, null=True)  # Optional for MP3 sources
     generated_content = models.TextField()
+    # Headings and typed items (utils/note_sections.py). generated_content is
+    # the plain-text rendering; exports and embedding read this instead.
+    sections = models.JSONField(default=list, blank=True)
+    # Which engine wrote the note; blank for manual notes and older rows.
+    engine = models.CharField(
+        max_length=16, choices=Engine.choices, blank=True, default=""
+    )
+    # An extractive outline shown while the LLM note is still being written;
+    # generate_note_task replaces its content in place and clears the flag.
+    is_draft = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def get_sections(self) -> list[dict]:
+        """The note's sections, parsed from the text for rows saved without them."""
+        return self.sections or parse_sections(self.generated_content)
+
     def __str__(self):
         return self.youtube_title
 
@@ -37,9 +57,103 @@ class NoteEmbedding(models.Model):
     note = models.OneToOneField(
         NotePost, on_delete=models.CASCADE, related_name="embedding"
     )
+    # First vector (rows written before per-section embedding have only this).
     vector_id = models.CharField(max_length=64, unique=True)
+    # One vector per note section.
+    vector_ids = models.JSONField(default=list, blank=True)
     content_hash = models.CharField(max_length=64)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @property
+    def all_vector_ids(self) -> list[str]:
+        return self.vector_ids or [self.vector_id]
+
     def __str__(self):
         return f"Embedding<note={self.note.pk}>"
+
+
+class GenerationCache(models.Model):
+    """Content-addressed cache of LLM-generated notes, shared across users.
+
+    The note prompt is deterministic for a given transcript, so the same
+    (transcript, prompt version, model) triple never needs a second paid LLM
+    call. `key` is the sha256 of that triple; the parts are kept alongside for
+    inspection and bulk invalidation (e.g. dropping an old prompt_version).
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    transcript_hash = models.CharField(max_length=64, db_index=True)
+    prompt_version = models.CharField(max_length=32)
+    model = models.CharField(max_length=64)
+    content = models.TextField()
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"GenerationCache<{self.model} {self.prompt_version} {self.key[:12]}>"
+
+
+class TranscriptFingerprint(models.Model):
+    """MinHash signature of a transcript that has a stored generation.
+
+    Used by generation/dedup.py to find near-duplicate transcripts (re-uploads,
+    MP3 copies of a video) and reuse their generation.
+    """
+
+    transcript_hash = models.CharField(max_length=64, unique=True)
+    signature = models.BinaryField()  # NUM_PERM little-endian uint32 values
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"TranscriptFingerprint<{self.transcript_hash[:12]}>"
+
+
+class TranscriptLSHBand(models.Model):
+    """One LSH band bucket of a TranscriptFingerprint; lookups match on
+    (band, bucket)."""
+
+    fingerprint = models.ForeignKey(
+        TranscriptFingerprint, on_delete=models.CASCADE, related_name="bands"
+    )
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=["band", "bucket"])]
+
+
+class BatchGenerationRequest(models.Model):
+    """A non-urgent note generation job routed through the provider batch API.
+
+    Rows are created as QUEUED, grouped into one JSONL batch submission by the
+    beat task (SUBMITTED, with the provider's batch_id), and turned into a
+    NotePost once the batch finishes (COMPLETED or FAILED).
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        SUBMITTED = "submitted"
+        COMPLETED = "completed"
+        FAILED = "failed"
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    youtube_title = models.CharField(max_length=300)
+    youtube_link = models.URLField(blank=True, null=True)
+    transcript = models.TextField()
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.QUEUED, db_index=True
+    )
+    batch_id = models.CharField(max_length=128, blank=True, default="", db_index=True)
+    note = models.ForeignKey(
+        NotePost, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def custom_id(self) -> str:
+        return f"gen-{self.pk}"
+
+    def __str__(self):
+        return f"BatchGenerationRequest<{self.pk} {self.status}>"
@@ -11,17 +11,23 @@ Pipeline shape:
 """
 
 import logging
+import time
 from typing import Any
 
 from django.conf import settings
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.globals import set_llm_cache
 from langchain_core.documents import Document
+from langchain_core.messages import get_buffer_string
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_openai import ChatOpenAI
 from langchain_redis import RedisSemanticCache
 
+from note_generator import llm_client
+from note_generator.generation.tokens import count_tokens
+from note_generator.llm_ratelimit import aacquire, acquire
 from note_generator.rag.vectorstore import get_embeddings, get_vectorstore
 
 logger = logging.getLogger(__name__)
@@ -51,6 +57,34 @@ def _configure_semantic_cache_once() -> None:
         logger.warning(f"RedisSemanticCache init failed, continuing uncached: {e}")
 
 
+class LLMUsageCallback(BaseCallbackHandler):
+    """Feeds RAG chat calls into the same latency/token stats as generation."""
+
+    def __init__(self):
+        self._started: dict[Any, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._started.pop(run_id, None)
+        usage = (response.llm_output or {}).get("token_usage")
+        if start is None or not usage:
+            # Semantic-cache hits carry no usage: no provider call was made.
+            return
+        llm_client.record_usage(
+            llm_client.LLMUsage(
+                model=settings.RAG_CHAT_MODEL,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                input_tokens=usage.get("prompt_tokens", 0),
+                output_tokens=usage.get("completion_tokens", 0),
+            )
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+
+
 _PROMPT = ChatPromptTemplate.from_messages(
     [
         (
@@ -69,12 +103,74 @@ def _format_docs(docs: list[Document]) -> str:
     if not docs:
         return "(no relevant notes found)"
     return "\n\n---\n\n".join(
-        f"[note {d.metadata.get('note_id')}] {d.metadata.get('title', '')}\n"
+        f"[note {d.metadata.get('note_id')}] {d.metadata.get('title', '')}"
+        f"{' / ' + d.metadata['section'] if d.metadata.get('section') else ''}\n"
         f"{d.page_content}"
         for d in docs
     )
 
 
+class ThrottledChatOpenAI(ChatOpenAI):
+    """ChatOpenAI whose provider requests go through llm_client's retry policy,
+    each attempt first reserving rate-limiter capacity.
+
+    LangChain consults the LLM cache before calling `_generate` / `_stream`, so
+    semantic-cache hits never reach these overrides and cost no quota. Streams
+    are only retried before their first chunk, as in `llm_client.complete`.
+    """
+
+    def _estimate_tokens(self, messages) -> int:
+        return (
+            count_tokens(get_buffer_string(messages))
+            + settings.RAG_ANSWER_TOKEN_ESTIMATE
+        )
+
+    def _generate(self, messages, *args, **kwargs):
+        generate = super()._generate
+
+        def attempt():
+            acquire(self.model_name, self._estimate_tokens(messages))
+            return generate(messages, *args, **kwargs)
+
+        return llm_client.call_with_retries(attempt)
+
+    async def _agenerate(self, messages, *args, **kwargs):
+        agenerate = super()._agenerate
+
+        async def attempt():
+            await aacquire(self.model_name, self._estimate_tokens(messages))
+            return await agenerate(messages, *args, **kwargs)
+
+        return await llm_client.acall_with_retries(attempt)
+
+    def _stream(self, messages, *args, **kwargs):
+        stream = super()._stream
+
+        def attempt():
+            acquire(self.model_name, self._estimate_tokens(messages))
+            chunks = stream(messages, *args, **kwargs)
+            return next(chunks, None), chunks
+
+        first, chunks = llm_client.call_with_retries(attempt)
+        if first is not None:
+            yield first
+            yield from chunks
+
+    async def _astream(self, messages, *args, **kwargs):
+        astream = super()._astream
+
+        async def attempt():
+            await aacquire(self.model_name, self._estimate_tokens(messages))
+            chunks = astream(messages, *args, **kwargs)
+            return await anext(chunks, None), chunks
+
+        first, chunks = await llm_client.acall_with_retries(attempt)
+        if first is not None:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+
+
 def build_user_chain(user_id: int):
     """Return an LCEL chain scoped to a single user's notes.
 
@@ -90,10 +186,19 @@ def build_user_chain(user_id: int):
         }
     )
 
-    llm = ChatOpenAI(
+    # Share the process-wide connection pool; its SDK retries are off because
+    # ThrottledChatOpenAI retries with llm_client's policy.
+    root_client = llm_client.get_client()
+    root_async_client = llm_client.get_async_client()
+    llm = ThrottledChatOpenAI(
         model=settings.RAG_CHAT_MODEL,
         api_key=settings.OPENAI_API_KEY,
         temperature=0,
+        root_client=root_client,
+        client=root_client.chat.completions,
+        root_async_client=root_async_client,
+        async_client=root_async_client.chat.completions,
+        callbacks=[LLMUsageCallback()],
     )
 
     generate = _PROMPT | llm | StrOutputParser()
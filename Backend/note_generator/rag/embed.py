@@ -2,8 +2,10 @@
 
 `embed_note` is the entrypoint: it sha256s the note body, compares against the
 last hash we wrote (NoteEmbedding.content_hash), and either no-ops, replaces,
-or inserts the vector in PGVector. Every vector carries the owning user_id in
-its metadata so retrieval can filter on it.
+or inserts the vectors in PGVector. Notes are embedded one vector per section
+(NotePost.sections), so retrieval returns the relevant part of a long note.
+Every vector carries the owning user_id in its metadata so retrieval can
+filter on it.
 """
 
 import hashlib
@@ -13,6 +15,7 @@ import uuid
 from langchain_core.documents import Document
 
 from note_generator.models import NoteEmbedding, NotePost
+from note_generator.utils.note_sections import section_text
 from note_generator.rag.vectorstore import get_vectorstore
 
 logger = logging.getLogger(__name__)
@@ -22,6 +25,24 @@ def _content_hash(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
+def _section_documents(note: NotePost) -> list[Document]:
+    metadata = {
+        "note_id": note.id,
+        "user_id": note.user_id,
+        "title": note.youtube_title,
+        "source": note.youtube_link or "",
+    }
+    docs = [
+        Document(
+            page_content=section_text(section),
+            metadata={**metadata, "section": section.get("heading", "")},
+        )
+        for section in note.get_sections()
+        if section.get("items")
+    ]
+    return docs or [Document(page_content=note.generated_content, metadata=metadata)]
+
+
 def embed_note(note: NotePost) -> None:
     """Upsert this note's embedding in PGVector. No-op if content unchanged."""
     new_hash = _content_hash(note.generated_content or "")
@@ -31,35 +52,31 @@ def embed_note(note: NotePost) -> None:
 
     vs = get_vectorstore()
 
-    # Drop the stale vector before writing the replacement so we don't end up
-    # with two embeddings for the same note in the index.
+    # Drop the stale vectors before writing the replacements so we don't end
+    # up with two embeddings for the same note in the index.
     if existing:
         try:
-            vs.delete(ids=[existing.vector_id])
+            vs.delete(ids=existing.all_vector_ids)
         except Exception as e:
             logger.warning(f"PGVector delete failed for note {note.id}: {e}")
 
-    vector_id = str(uuid.uuid4())
-    doc = Document(
-        page_content=note.generated_content,
-        metadata={
-            "note_id": note.id,
-            "user_id": note.user_id,
-            "title": note.youtube_title,
-            "source": note.youtube_link or "",
-        },
-    )
-    vs.add_documents([doc], ids=[vector_id])
+    docs = _section_documents(note)
+    vector_ids = [str(uuid.uuid4()) for _ in docs]
+    vs.add_documents(docs, ids=vector_ids)
 
     NoteEmbedding.objects.update_or_create(
         note=note,
-        defaults={"vector_id": vector_id, "content_hash": new_hash},
+        defaults={
+            "vector_id": vector_ids[0],
+            "vector_ids": vector_ids,
+            "content_hash": new_hash,
+        },
     )
 
 
-def delete_embedding(vector_id: str) -> None:
-    """Remove an orphaned vector from PGVector (called from post_delete)."""
+def delete_embedding(vector_ids: list[str]) -> None:
+    """Remove orphaned vectors from PGVector (called from post_delete)."""
     try:
-        get_vectorstore().delete(ids=[vector_id])
+        get_vectorstore().delete(ids=vector_ids)
     except Exception as e:
-        logger.warning(f"PGVector delete failed for vector {vector_id}: {e}")
+        logger.warning(f"PGVector delete failed for vectors {vector_ids}: {e}")
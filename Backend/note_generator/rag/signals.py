@@ -23,6 +23,9 @@ logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=NotePost)
 def _embed_on_note_save(sender, instance: NotePost, **kwargs):
+    # Drafts are replaced within the same task; embed the final note only.
+    if instance.is_draft:
+        return
     # Enqueue async — never block the HTTP response for an OpenAI embeddings call.
     try:
         from note_generator.tasks import embed_note_task
@@ -39,6 +42,6 @@ def _drop_vector_on_embedding_delete(sender, instance: NoteEmbedding, **kwargs):
     try:
         from note_generator.rag.embed import delete_embedding
 
-        delete_embedding(instance.vector_id)
+        delete_embedding(instance.all_vector_ids)
     except Exception as e:
-        logger.warning(f"delete_embedding failed for vector {instance.vector_id}: {e}")
+        logger.warning(f"delete_embedding failed for note embedding {instance.pk}: {e}")
@@ -1,30 +1,90 @@
 """Singletons for the RAG layer.
 
 Both `OpenAIEmbeddings` and `PGVector` open network connections / pools on
-construction, so we cache them per-process via `lru_cache`. Tests can call
-`.cache_clear()` on either factory to force a rebuild.
+construction, so we cache them per-process via `lru_cache`, keyed on pid like
+`llm_client.get_client` so a forked Celery worker never reuses its parent's
+connections. Tests can call `.cache_clear()` on `_build_embeddings` or
+`_build_vectorstore` to force a rebuild.
 """
 
+import os
 from functools import lru_cache
 
 from django.conf import settings
 from langchain_openai import OpenAIEmbeddings
 from langchain_postgres import PGVector
 
+from note_generator import llm_client
+from note_generator.generation.tokens import count_tokens
+from note_generator.llm_ratelimit import aacquire, acquire
+
+
+def _input_tokens(texts) -> int:
+    """Tokens in an embeddings request's `input`: text, or token-id lists."""
+    if isinstance(texts, str):
+        return count_tokens(texts)
+    return sum(len(t) if isinstance(t, list) else count_tokens(t) for t in texts)
+
+
+class _RetryingEmbeddingsClient:
+    """An SDK `embeddings` resource whose requests follow llm_client's retry
+    policy, each attempt first reserving rate-limiter capacity.
+
+    OpenAIEmbeddings calls `create` once per provider request, so this covers
+    every embedding the RAG layer makes: indexing, retrieval, and the
+    semantic cache's lookups.
+    """
+
+    def __init__(self, embeddings):
+        self._embeddings = embeddings
+
+    def create(self, **kwargs):
+        tokens = _input_tokens(kwargs["input"])
+
+        def attempt():
+            acquire(settings.RAG_EMBEDDING_MODEL, tokens)
+            return self._embeddings.create(**kwargs)
+
+        return llm_client.call_with_retries(attempt)
+
+
+class _AsyncRetryingEmbeddingsClient(_RetryingEmbeddingsClient):
+    async def create(self, **kwargs):
+        tokens = _input_tokens(kwargs["input"])
+
+        async def attempt():
+            await aacquire(settings.RAG_EMBEDDING_MODEL, tokens)
+            return await self._embeddings.create(**kwargs)
+
+        return await llm_client.acall_with_retries(attempt)
+
 
 @lru_cache(maxsize=1)
-def get_embeddings() -> OpenAIEmbeddings:
+def _build_embeddings(pid: int) -> OpenAIEmbeddings:
+    # Reuse the process-wide pooled clients instead of opening a second pool.
     return OpenAIEmbeddings(
         model=settings.RAG_EMBEDDING_MODEL,
         api_key=settings.OPENAI_API_KEY,
+        client=_RetryingEmbeddingsClient(llm_client.get_client().embeddings),
+        async_client=_AsyncRetryingEmbeddingsClient(
+            llm_client.get_async_client().embeddings
+        ),
     )
 
 
 @lru_cache(maxsize=1)
-def get_vectorstore() -> PGVector:
+def _build_vectorstore(pid: int) -> PGVector:
     return PGVector(
-        embeddings=get_embeddings(),
+        embeddings=_build_embeddings(pid),
         collection_name=settings.RAG_COLLECTION_NAME,
         connection=settings.PGVECTOR_CONNECTION_STRING,
         use_jsonb=True,
     )
+
+
+def get_embeddings() -> OpenAIEmbeddings:
+    return _build_embeddings(os.getpid())
+
+
+def get_vectorstore() -> PGVector:
+    return _build_vectorstore(os.getpid())
@@ -3,20 +3,110 @@ import os
 import shutil
 
 from celery import shared_task
+from django.conf import settings
 from django.contrib.auth.models import User
 
 logger = logging.getLogger(__name__)
 
 
+def _finish_stream(stream, result: dict) -> None:
+    """Publish the task outcome as the stream's terminal event."""
+    if result.get("error"):
+        stream.error(result["error"])
+    else:
+        stream.done(result.get("note_id"))
+
+
 @shared_task(bind=True, max_retries=0, name="note_generator.generate_note")
-def generate_note_task(self, user_id: int, yt_link: str):
-    from note_generator.models import NotePost
-    from note_generator.views import (
-        generate_blog_from_transcription,
-        get_transcript,
-        yt_title,
-    )
+def generate_note_task(self, user_id: int, yt_link: str, tier: str = "full"):
+    from note_generator.generation.stream import NoteStreamPublisher
+
+    stream = NoteStreamPublisher(self.request.id)
+
+    def report_phase(phase: str, note_id: int | None = None) -> None:
+        try:
+            self.update_state(
+                state="PROGRESS", meta={"phase": phase, "note_id": note_id}
+            )
+        except Exception as e:
+            logger.warning(f"generate_note_task: could not report phase {phase}: {e}")
+
+    result = _generate_note(user_id, yt_link, tier, stream, report_phase)
+    _finish_stream(stream, result)
+    return result
+
+
+def _run_engine(engine: str, transcript: str, yt_link: str, title: str, stream) -> dict:
+    """Generate a note with one engine and return its NotePost content fields
+    (see note_fields / text_note_fields); raises if it fails or is empty."""
+    from note_generator.generation.cache import store_generation
+    from note_generator.generation.routing import ENGINE_EXTRACTIVE
     from note_generator.grpc_client import process_transcript_via_grpc
+    from note_generator.utils.note_sections import note_fields, text_note_fields
+    from note_generator.views import generate_blog_from_transcription
+
+    if engine == ENGINE_EXTRACTIVE:
+        sections = process_transcript_via_grpc(
+            transcript_text=transcript,
+            source_url=yt_link,
+            title=title,
+            # Long transcripts report each outline topic while they are
+            # processed, so the page shows progress before the draft exists.
+            on_section=(
+                (lambda heading, bullets: stream.section(heading))
+                if stream.enabled
+                else None
+            ),
+        )
+        if not sections:
+            raise RuntimeError("gRPC returned empty content")
+        return note_fields(sections)
+
+    content = generate_blog_from_transcription(
+        transcript, on_token=stream.token if stream.enabled else None
+    )
+    if not content:
+        raise RuntimeError("OpenAI returned empty content")
+    store_generation(transcript, settings.NOTES_LLM_MODEL, content)
+    return text_note_fields(content)
+
+
+def _save_draft(user, title: str, yt_link: str, transcript: str, stream, report_phase):
+    """Phase 1: save the content-service's extractive outline as a draft note.
+
+    Returns the draft, or None if the content-service couldn't produce one.
+    """
+    from note_generator.generation.routing import ENGINE_EXTRACTIVE
+    from note_generator.models import NotePost
+    from note_generator.utils.cache_utils import safe_cache_delete
+
+    try:
+        fields = _run_engine(ENGINE_EXTRACTIVE, transcript, yt_link, title, stream)
+        draft = NotePost.objects.create(
+            user=user,
+            youtube_title=title,
+            youtube_link=yt_link,
+            **fields,
+            engine=ENGINE_EXTRACTIVE,
+            is_draft=True,
+        )
+    except Exception as e:
+        logger.warning(f"generate_note_task: no extractive draft for {yt_link}: {e}")
+        return None
+
+    safe_cache_delete(f"notes:list:user:{user.id}")
+    report_phase("draft", draft.id)
+    stream.draft(draft.id)
+    return draft
+
+
+def _generate_note(user_id: int, yt_link: str, tier: str, stream, report_phase) -> dict:
+    from note_generator.models import NotePost
+    from note_generator.views import get_transcript, yt_title
+    from note_generator.generation.cache import get_cached_generation
+    from note_generator.generation.normalize import normalize_transcript
+    from note_generator.generation.routing import ENGINE_LLM, route_job
+    from note_generator.utils.note_sections import text_note_fields
     from note_generator.transcript_utils import get_transcript_with_diagnostics
     from note_generator.utils.cache_utils import safe_cache_delete
 
@@ -35,6 +125,7 @@ def generate_note_task(self, user_id: int, yt_link: str):
         logger.warning(f"generate_note_task: yt_title failed for {yt_link}: {e}")
         title = f"YouTube Note ({yt_link[:50]})"
 
+    report_phase("transcript")
     transcript, transcript_error = get_transcript_with_diagnostics(
         yt_link, get_transcript
     )
@@ -58,35 +149,98 @@ def generate_note_task(self, user_id: int, yt_link: str):
             "error_code": "no_transcript",
         }
 
-    try:
-        note_content = process_transcript_via_grpc(
-            transcript_text=transcript, source_url=yt_link, title=title
-        )
-        if not note_content:
-            raise RuntimeError("gRPC returned empty content")
-    except Exception as e:
-        logger.warning(f"generate_note_task: gRPC failed, falling back to OpenAI: {e}")
+    normalized = normalize_transcript(transcript)
+    logger.info(
+        f"generate_note_task: normalization removed {normalized.tokens_removed} of "
+        f"{normalized.tokens_before} transcript tokens for {yt_link}"
+    )
+    if not normalized.text:
+        return {
+            "note_id": None,
+            "error": "Transcript has no spoken content. Try MP3 upload or paste transcript.",
+            "error_code": "no_transcript",
+        }
+    transcript = normalized.text
+
+    # Identical transcripts produce identical prompts, so a note generated for
+    # any user can be reused before paying for gRPC or OpenAI again.
+    draft = None
+    cached = get_cached_generation(transcript, settings.NOTES_LLM_MODEL)
+    if cached:
+        logger.info(f"generate_note_task: generation cache hit for {yt_link}")
+        fields = text_note_fields(cached)
+        engine, route_reason = ENGINE_LLM, "generation cache hit"
+    else:
+        decision = route_job(normalized.tokens_after, tier)
+        engine, route_reason = decision.engine, decision.reason
+        report_phase("generating")
+        # LLM jobs are two-phase: the extractive outline is saved as a draft
+        # within seconds, then upgraded in place when the LLM note is ready.
+        if engine == ENGINE_LLM:
+            draft = _save_draft(user, title, yt_link, transcript, stream, report_phase)
         try:
-            note_content = generate_blog_from_transcription(transcript)
-            if not note_content:
-                raise RuntimeError("OpenAI returned empty content")
-        except Exception as fallback_error:
-            logger.exception(f"generate_note_task: generation failed: {fallback_error}")
-            return {
-                "note_id": None,
-                "error": "Note generation service temporarily unavailable.",
-                "error_code": "generation_failed",
-            }
+            fields = _run_engine(engine, transcript, yt_link, title, stream)
+        except Exception as e:
+            route_reason = f"{route_reason}; {engine} failed"
+            if draft is not None:
+                logger.warning(
+                    f"generate_note_task: {engine} engine failed, keeping draft: {e}"
+                )
+                engine = draft.engine
+                fields = {
+                    "sections": draft.sections,
+                    "generated_content": draft.generated_content,
+                }
+            else:
+                # Without a draft, the fallback is only worth trying if it
+                # hasn't just failed producing one.
+                fields = None
+                if engine != ENGINE_LLM:
+                    logger.warning(
+                        f"generate_note_task: {engine} engine failed, falling back "
+                        f"to {decision.fallback}: {e}"
+                    )
+                    engine = decision.fallback
+                    try:
+                        fields = _run_engine(engine, transcript, yt_link, title, stream)
+                    except Exception as fallback_error:
+                        e = fallback_error
+                if not fields:
+                    logger.error(f"generate_note_task: generation failed: {e}")
+                    return {
+                        "note_id": None,
+                        "error": "Note generation service temporarily unavailable.",
+                        "error_code": "generation_failed",
+                    }
 
     try:
-        note = NotePost.objects.create(
-            user=user,
-            youtube_title=title,
-            youtube_link=yt_link,
-            generated_content=note_content,
-        )
+        note = None
+        if draft is not None:
+            note, upgraded = _upgrade_draft(draft.pk, fields, engine)
+            if note is None:
+                logger.info(
+                    f"generate_note_task: draft {draft.pk} was deleted, saving "
+                    f"the final note as a new one"
+                )
+            elif not upgraded:
+                route_reason = f"{route_reason}; kept user-edited draft"
+            safe_cache_delete(f"notes:detail:user:{user_id}:pk:{draft.pk}")
+        if note is None:
+            note = NotePost.objects.create(
+                user=user,
+                youtube_title=title,
+                youtube_link=yt_link,
+                **fields,
+                engine=engine,
+            )
         safe_cache_delete(f"notes:list:user:{user_id}")
-        return {"note_id": note.id, "error": None}
+        return {
+            "note_id": note.id,
+            "error": None,
+            "phase": "final",
+            "engine": note.engine,
+            "route_reason": route_reason,
+        }
     except Exception as e:
         logger.exception(f"generate_note_task: failed to save note: {e}")
         return {
@@ -96,15 +250,54 @@ def generate_note_task(self, user_id: int, yt_link: str):
         }
 
 
+def _upgrade_draft(draft_id: int, fields: dict, engine: str):
+    """Phase 2: replace a draft's content with the final note.
+
+    Returns (note, upgraded). The row is locked and re-checked first: a
+    draft the user has edited meanwhile (no longer is_draft) is returned
+    untouched, and a deleted one as None.
+    """
+    from django.db import transaction
+
+    from note_generator.models import NotePost
+
+    with transaction.atomic():
+        note = NotePost.objects.select_for_update().filter(pk=draft_id).first()
+        if note is None or not note.is_draft:
+            return note, False
+        for field, value in fields.items():
+            setattr(note, field, value)
+        note.engine = engine
+        note.is_draft = False
+        note.save(update_fields=[*fields, "engine", "is_draft"])
+    return note, True
+
+
 @shared_task(bind=True, max_retries=0, name="note_generator.mp3_to_notes")
 def mp3_to_notes_task(
     self, user_id: int, audio_file_path: str, title: str, temp_dir: str
 ):
+    from note_generator.generation.stream import NoteStreamPublisher
+
+    stream = NoteStreamPublisher(self.request.id)
+    result = _mp3_to_notes(user_id, audio_file_path, title, temp_dir, stream)
+    _finish_stream(stream, result)
+    return result
+
+
+def _mp3_to_notes(
+    user_id: int, audio_file_path: str, title: str, temp_dir: str, stream
+) -> dict:
     import assemblyai as aai
 
+    from note_generator.generation.cache import (
+        get_cached_generation,
+        store_generation,
+    )
     from note_generator.models import NotePost
     from note_generator.views import generate_blog_from_transcription
     from note_generator.utils.cache_utils import safe_cache_delete
+    from note_generator.utils.note_sections import text_note_fields
 
     try:
         user = User.objects.get(pk=user_id)
@@ -124,15 +317,21 @@ def mp3_to_notes_task(
         if not transcript.text:
             raise RuntimeError("AssemblyAI returned empty transcript")
 
-        note_content = generate_blog_from_transcription(transcript.text)
+        note_content = get_cached_generation(transcript.text, settings.NOTES_LLM_MODEL)
         if not note_content:
-            raise RuntimeError("OpenAI returned empty note content")
+            note_content = generate_blog_from_transcription(
+                transcript.text, on_token=stream.token if stream.enabled else None
+            )
+            if not note_content:
+                raise RuntimeError("OpenAI returned empty note content")
+            store_generation(transcript.text, settings.NOTES_LLM_MODEL, note_content)
 
         note = NotePost.objects.create(
             user=user,
             youtube_title=title,
             youtube_link="",
-            generated_content=note_content,
+            **text_note_fields(note_content),
+            engine=NotePost.Engine.LLM,
         )
         safe_cache_delete(f"notes:list:user:{user_id}")
         return {"note_id": note.id, "error": None}
@@ -148,6 +347,82 @@ def mp3_to_notes_task(
         shutil.rmtree(temp_dir, ignore_errors=True)
 
 
+@shared_task(bind=True, max_retries=0, name="note_generator.queue_batch_generation")
+def queue_batch_generation_task(self, user_id: int, yt_link: str):
+    """Fetch and normalize a transcript now; generate it later via the batch API."""
+    from note_generator.generation.cache import get_cached_generation
+    from note_generator.generation.normalize import normalize_transcript
+    from note_generator.models import BatchGenerationRequest, NotePost
+    from note_generator.transcript_utils import get_transcript_with_diagnostics
+    from note_generator.utils.cache_utils import safe_cache_delete
+    from note_generator.utils.note_sections import text_note_fields
+    from note_generator.views import get_transcript, yt_title
+
+    try:
+        user = User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        return {"request_id": None, "error": "User not found"}
+
+    try:
+        title = yt_title(yt_link)
+    except Exception as e:
+        logger.warning(
+            f"queue_batch_generation_task: yt_title failed for {yt_link}: {e}"
+        )
+        title = f"YouTube Note ({yt_link[:50]})"
+
+    transcript, transcript_error = get_transcript_with_diagnostics(
+        yt_link, get_transcript
+    )
+    if transcript_error or not transcript:
+        message = transcript_error.message if transcript_error else "No transcript"
+        return {"request_id": None, "error": message}
+
+    transcript = normalize_transcript(transcript).text
+    if not transcript:
+        return {"request_id": None, "error": "Transcript has no spoken content"}
+
+    # Already generated for someone else: no need to wait for a batch.
+    cached = get_cached_generation(transcript, settings.NOTES_LLM_MODEL)
+    if cached:
+        note = NotePost.objects.create(
+            user=user,
+            youtube_title=title,
+            youtube_link=yt_link,
+            **text_note_fields(cached),
+            engine=NotePost.Engine.LLM,
+        )
+        safe_cache_delete(f"notes:list:user:{user_id}")
+        return {"request_id": None, "note_id": note.id, "error": None}
+
+    item = BatchGenerationRequest.objects.create(
+        user=user, youtube_title=title, youtube_link=yt_link, transcript=transcript
+    )
+    return {"request_id": item.id, "error": None}
+
+
+@shared_task(bind=True, max_retries=0, name="note_generator.process_generation_batches")
+def process_generation_batches_task(self):
+    """Beat task: collect finished batches, then submit whatever is queued."""
+    from django.core.cache import cache
+
+    from note_generator.generation.batch import (
+        collect_finished_batches,
+        submit_queued_requests,
+    )
+
+    # Overlapping runs would submit the same queued rows twice.
+    lock_key = "lock:process_generation_batches"
+    if not cache.add(lock_key, 1, timeout=settings.NOTES_BATCH_POLL_INTERVAL):
+        return {"skipped": True}
+    try:
+        finished = collect_finished_batches()
+        batch_id = submit_queued_requests()
+        return {"finished": finished, "submitted": batch_id}
+    finally:
+        cache.delete(lock_key)
+
+
 @shared_task(
     bind=True, max_retries=3, default_retry_delay=10, name="note_generator.embed_note"
 )
@@ -187,7 +462,7 @@ def export_to_notion_task(self, note_id: int, user_id: int):
             token=profile.notion_token,
             parent_page_id=profile.notion_parent_page_id,
             title=note.youtube_title,
-            content=note.generated_content,
+            sections=note.get_sections(),
             source_url=note.youtube_link or "",
         )
         return {"url": page_url, "error": None}
@@ -0,0 +1,184 @@
+"""Structured note content: sections of typed items, stored on NotePost.sections.
+
+Shape (JSON-serializable, mirrors the content-service's NoteSection):
+
+    [
+        {
+            "heading": "TL;DR",          # "" for text before the first heading
+            "items": [
+                {"kind": "bullet", "text": "...", "level": 0},
+                {"kind": "numbered", "text": "...", "number": 1},
+                {"kind": "paragraph", "text": "...", "blank_before": True},
+            ],
+        },
+        ...
+    ]
+
+Notes are parsed into this shape once, when they are generated or saved.
+Notes written as text (LLM output, user edits) keep that text verbatim in
+NotePost.generated_content; notes built as structure (the content-service's
+outline) have their text rendered from it. Exports and embedding then work
+from the structure instead of re-parsing the text on every request.
+
+Numbered items keep the number they were written with, "blank_before" marks
+an item that followed a blank line (the quiz's Q/A pairs), and wrapped lines
+indented under an item stay part of its text (joined with "\n"), so rendering
+reproduces the original layout.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable
+
+# Section labels the AI prompt emits in ALL CAPS.
+HEADING_KEYWORDS = {
+    "TL;DR",
+    "KEY TERMS",
+    "HOW IT WORKS",
+    "STEP-BY-STEP",
+    "QUICK CHECK QUIZ (with answers)",
+    "QUICK CHECK QUIZ",
+    "ANCHORS",
+}
+
+_NUMBERED_RE = re.compile(r"(\d+)[.)] ")
+
+BULLET = "bullet"
+NUMBERED = "numbered"
+PARAGRAPH = "paragraph"
+
+
+def parse_sections(text: str, headings: Iterable[str] = ()) -> list[dict]:
+    """Parse plain-text notes (the NOTES_FORMAT layout) into sections.
+
+    Only the prompt's section labels (HEADING_KEYWORDS) and the extra
+    `headings` start a section; other all-caps lines, such as quiz answers,
+    stay items. Pass a note's existing headings when re-parsing an edit so
+    headings from other sources (the content-service's topics) survive.
+    """
+    headings = HEADING_KEYWORDS.union(headings)
+    sections: list[dict] = []
+    current: dict | None = None
+    item: dict | None = None
+    item_indent = 0
+    blank = False
+
+    for raw_line in (text or "").splitlines():
+        stripped = raw_line.strip()
+        if not stripped:
+            blank = True
+            continue
+
+        if stripped in headings:
+            current = {"heading": stripped, "items": []}
+            sections.append(current)
+            item = None
+            blank = False
+            continue
+
+        if current is None:
+            current = {"heading": "", "items": []}
+            sections.append(current)
+
+        indent = len(raw_line) - len(raw_line.lstrip(" "))
+        numbered = _NUMBERED_RE.match(stripped)
+        if stripped.startswith("- "):
+            # Sub-bullets are indented by two spaces per level.
+            new_item = {
+                "kind": BULLET,
+                "text": stripped[2:].strip(),
+                "level": indent // 2,
+            }
+        elif numbered:
+            new_item = {
+                "kind": NUMBERED,
+                "text": stripped[numbered.end() :].strip(),
+                "number": int(numbered.group(1)),
+            }
+        elif item is not None and not blank and indent > item_indent:
+            # A wrapped line, indented under the item it continues.
+            item["text"] += "\n" + stripped
+            continue
+        else:
+            new_item = {"kind": PARAGRAPH, "text": stripped}
+
+        item, item_indent = new_item, indent
+        if blank and current["items"]:
+            item["blank_before"] = True
+        blank = False
+        current["items"].append(item)
+
+    return sections
+
+
+def _item_lines(prefix: str, text: str) -> list[str]:
+    """`prefix` + the item's first line, continuation lines aligned under it."""
+    first, *rest = text.split("\n")
+    return [prefix + first] + [" " * max(len(prefix), 2) + line for line in rest]
+
+
+def render_sections(sections: list[dict]) -> str:
+    """Render sections back to plain text in the NOTES_FORMAT layout."""
+    blocks = []
+    for section in sections:
+        lines = [section["heading"]] if section.get("heading") else []
+        number = 0
+        for item in section.get("items", []):
+            if item.get("blank_before"):
+                lines.append("")
+            if item["kind"] == BULLET:
+                prefix = "  " * item.get("level", 0) + "- "
+            elif item["kind"] == NUMBERED:
+                # Rows saved before numbers were stored count from 1.
+                number = item.get("number", number + 1)
+                prefix = f"{number}) "
+            else:
+                prefix = ""
+            lines.extend(_item_lines(prefix, item["text"]))
+        if lines:
+            blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def sections_to_markdown(sections: list[dict]) -> str:
+    """Render sections as Markdown: headings as ###, lists as Markdown lists."""
+    blocks = []
+    for section in sections:
+        lines = [f"### {section['heading']}", ""] if section.get("heading") else []
+        number = 0
+        for item in section.get("items", []):
+            if item.get("blank_before"):
+                lines.append("")
+            if item["kind"] == BULLET:
+                prefix = "  " * item.get("level", 0) + "- "
+            elif item["kind"] == NUMBERED:
+                number = item.get("number", number + 1)
+                prefix = f"{number}. "
+            else:
+                prefix = ""
+            item_lines = _item_lines(prefix, item["text"])
+            if item["kind"] == PARAGRAPH:
+                # Trailing double spaces keep Markdown from joining the lines.
+                item_lines = [f"{line}  " for line in item_lines]
+            lines.extend(item_lines)
+        if lines:
+            blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def section_text(section: dict) -> str:
+    """One section as standalone plain text (used as an embedding chunk)."""
+    return render_sections([section])
+
+
+def note_fields(sections: list[dict]) -> dict:
+    """NotePost field values for structured content: the structure plus the
+    plain text derived from it."""
+    return {"sections": sections, "generated_content": render_sections(sections)}
+
+
+def text_note_fields(text: str) -> dict:
+    """NotePost field values for notes written as text: the text verbatim plus
+    the structure parsed from it."""
+    return {"sections": parse_sections(text), "generated_content": text}
@@ -1,8 +1,8 @@
 """Notion export helpers.
 
 Calls the Notion REST API directly via `requests` so we don't pull in another SDK.
-The interesting work is `text_to_notion_blocks`, which translates the plain-text
-notes the AI generates into Notion's typed-block JSON format.
+The interesting work is `sections_to_notion_blocks`, which translates a note's
+structured sections (NotePost.sections) into Notion's typed-block JSON format.
 """
 
 from __future__ import annotations
@@ -12,6 +12,8 @@ from typing import Iterable
 
 import requests
 
+from note_generator.utils.note_sections import BULLET, NUMBERED, parse_sections
+
 logger = logging.getLogger(__name__)
 
 NOTION_API_URL = "https://api.notion.com/v1/pages"
@@ -23,17 +25,6 @@ NOTION_TEXT_LIMIT = 2000
 # Notion accepts at most 100 child blocks in the initial page-create call.
 NOTION_BLOCK_LIMIT = 100
 
-# Section labels the AI prompt emits in ALL CAPS — rendered as headings on Notion.
-HEADING_KEYWORDS = {
-    "TL;DR",
-    "KEY TERMS",
-    "HOW IT WORKS",
-    "STEP-BY-STEP",
-    "QUICK CHECK QUIZ (with answers)",
-    "QUICK CHECK QUIZ",
-    "ANCHORS",
-}
-
 
 class NotionExportError(Exception):
     """Raised when the Notion API rejects the request."""
@@ -61,46 +52,28 @@ def _block(block_type: str, content: str) -> dict:
     }
 
 
-def text_to_notion_blocks(text: str) -> list[dict]:
-    """Convert plain-text notes into a list of Notion block objects.
-
-    Rules:
-      - Lines that exactly match HEADING_KEYWORDS become heading_2 blocks.
-      - Lines starting with "- " become bulleted_list_item blocks.
-      - Numbered lines like "1) ..." become numbered_list_item blocks.
-      - Blank lines are dropped (Notion handles spacing between blocks itself).
-      - Everything else becomes a paragraph block.
-    """
-    blocks: list[dict] = []
-
-    for raw_line in text.splitlines():
-        line = raw_line.rstrip()
-        if not line.strip():
-            continue
-
-        stripped = line.strip()
+_ITEM_BLOCK_TYPES = {BULLET: "bulleted_list_item", NUMBERED: "numbered_list_item"}
 
-        if stripped in HEADING_KEYWORDS:
-            blocks.append(_block("heading_2", stripped))
-            continue
 
-        if stripped.startswith("- "):
-            blocks.append(_block("bulleted_list_item", stripped[2:].strip()))
-            continue
+def sections_to_notion_blocks(sections: list[dict]) -> list[dict]:
+    """Convert note sections into a list of Notion block objects.
 
-        # Numbered list: "1) text" or "1. text"
-        if (
-            len(stripped) >= 3
-            and stripped[0].isdigit()
-            and stripped[1] in {")", "."}
-            and stripped[2] == " "
-        ):
-            blocks.append(_block("numbered_list_item", stripped[3:].strip()))
-            continue
+    Headings become heading_2 blocks, bullets bulleted_list_item, numbered
+    items numbered_list_item, and everything else a paragraph.
+    """
+    blocks: list[dict] = []
+    for section in sections:
+        if section.get("heading"):
+            blocks.append(_block("heading_2", section["heading"]))
+        for item in section.get("items", []):
+            block_type = _ITEM_BLOCK_TYPES.get(item["kind"], "paragraph")
+            blocks.append(_block(block_type, item["text"]))
+    return blocks
 
-        blocks.append(_block("paragraph", stripped))
 
-    return blocks
+def text_to_notion_blocks(text: str) -> list[dict]:
+    """Convert plain-text notes into Notion blocks (for notes without sections)."""
+    return sections_to_notion_blocks(parse_sections(text))
 
 
 def export_note_to_notion(
@@ -108,14 +81,19 @@ def export_note_to_notion(
     token: str,
     parent_page_id: str,
     title: str,
-    content: str,
+    content: str = "",
+    sections: list[dict] | None = None,
     source_url: str = "",
 ) -> str:
     """Create a Notion page under `parent_page_id` and return its URL.
 
+    Pass the note's `sections` when available; plain `content` is parsed.
     Raises NotionExportError on any non-2xx response from Notion.
     """
-    blocks = text_to_notion_blocks(content)
+    if sections is not None:
+        blocks = sections_to_notion_blocks(sections)
+    else:
+        blocks = text_to_notion_blocks(content)
 
     if source_url:
         blocks.insert(0, _block("paragraph", f"Source: {source_url}"))
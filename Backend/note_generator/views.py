@@ -4,14 +4,26 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.conf import settings
 from fastapi import HTTPException
 import json, os, time
 from pytubefix import YouTube
 import assemblyai as aai
-import openai
+from note_generator import llm_client
 from .models import NotePost, UserProfile
+from note_generator.generation.mapreduce import map_reduce_notes
+from note_generator.generation.normalize import join_caption_lines
+from note_generator.generation.prompts import NOTES_PROMPT
+from note_generator.generation.routing import TIERS
+from note_generator.generation.select import fit_to_token_budget
+from note_generator.generation.tokens import count_tokens
+from note_generator.utils.note_sections import (
+    BULLET,
+    NUMBERED,
+    parse_sections,
+    sections_to_markdown,
+)
 import traceback
 import tempfile
 from note_generator.utils.cache_utils import (
@@ -155,6 +167,15 @@ def generate_note(request):
             return JsonResponse(
                 {"error_code": "invalid_url", "message": str(e)}, status=400
             )
+        tier = data.get("tier") or settings.NOTES_DEFAULT_TIER
+        if tier not in TIERS:
+            return JsonResponse(
+                {
+                    "error_code": "invalid_tier",
+                    "message": f"tier must be one of: {', '.join(TIERS)}",
+                },
+                status=400,
+            )
     except (KeyError, json.JSONDecodeError):
         return JsonResponse(
             {"error_code": "invalid_request", "message": "Invalid data sent"},
@@ -166,7 +187,7 @@ def generate_note(request):
 
     from note_generator.tasks import generate_note_task
 
-    task = generate_note_task.delay(request.user.id, yt_link)
+    task = generate_note_task.delay(request.user.id, yt_link, tier)
     return JsonResponse({"task_id": task.id, "status": "processing"}, status=202)
 
 
@@ -181,9 +202,20 @@ def task_status(request, task_id):
     if state == "PENDING":
         return JsonResponse({"status": "pending", "note_id": None, "error": None})
 
-    if state in ("STARTED", "PROGRESS"):
+    if state == "STARTED":
         return JsonResponse({"status": "processing", "note_id": None, "error": None})
 
+    if state == "PROGRESS":
+        # note_id is set once an extractive draft has been saved.
+        return JsonResponse(
+            {
+                "status": "processing",
+                "phase": meta.get("phase"),
+                "note_id": meta.get("note_id"),
+                "error": None,
+            }
+        )
+
     if state == "SUCCESS":
         if isinstance(meta, dict):
             error = meta.get("error")
@@ -198,6 +230,11 @@ def task_status(request, task_id):
             }
             if meta.get("url"):
                 response_data["url"] = meta["url"]
+            if meta.get("phase"):
+                response_data["phase"] = meta["phase"]
+            if meta.get("engine"):
+                response_data["engine"] = meta["engine"]
+                response_data["route_reason"] = meta.get("route_reason")
             return JsonResponse(response_data)
         return JsonResponse({"status": "done", "note_id": None, "error": None})
 
@@ -213,6 +250,41 @@ def task_status(request, task_id):
     return JsonResponse({"status": "processing", "note_id": None, "error": None})
 
 
+@login_required
+def task_stream(request, task_id):
+    """Server-Sent Events relay of a generation task's tokens.
+
+    Clients should fall back to polling /api/task-status/ on a 503 or on a
+    `timeout` event.
+    """
+    from note_generator.generation.stream import get_redis, iter_stream_events
+
+    if get_redis() is None:
+        return JsonResponse(
+            {
+                "error_code": "stream_unavailable",
+                "message": "Streaming is not available.",
+            },
+            status=503,
+        )
+
+    def event_source():
+        try:
+            for event in iter_stream_events(
+                task_id, timeout=settings.NOTES_STREAM_TIMEOUT
+            ):
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            logger.warning(f"task_stream: relay failed for task {task_id}: {e}")
+            yield 'event: timeout\ndata: {"type": "timeout"}\n\n'
+
+    response = StreamingHttpResponse(event_source(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Tell nginx not to buffer the stream, or tokens arrive in one lump at the end.
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 @login_required
 def notion_settings(request):
     profile, _ = UserProfile.objects.get_or_create(user=request.user)
@@ -263,6 +335,7 @@ def note_create(request):
             youtube_title=title,
             youtube_link="",
             generated_content=content,
+            sections=parse_sections(content),
         )
 
         safe_cache_delete(f"notes:list:user:{request.user.id}")
@@ -323,7 +396,18 @@ def note_edit(request, pk):
 
         note_post.youtube_title = new_title
         note_post.generated_content = new_content
-        note_post.save(update_fields=["youtube_title", "generated_content"])
+        # Keep headings the note already has (e.g. the content-service's topic
+        # headings), which the prompt's heading labels don't cover.
+        note_post.sections = parse_sections(
+            new_content,
+            headings=(s["heading"] for s in note_post.get_sections() if s["heading"]),
+        )
+        # An edited draft is the user's note now; the final generation must
+        # not overwrite it.
+        note_post.is_draft = False
+        note_post.save(
+            update_fields=["youtube_title", "generated_content", "sections", "is_draft"]
+        )
 
         # Invalidate related caches after manual edits.
         safe_cache_delete(f"notes:list:user:{request.user.id}")
@@ -373,13 +457,14 @@ def note_export(request, pk):
 
     safe_title = slugify(note_post.youtube_title) or f"note-{pk}"
     created_display = note_post.created_at.strftime("%Y-%m-%d %H:%M:%S")
+    sections = note_post.get_sections()
 
     if export_format == "md":
         body = (
             f"# {note_post.youtube_title}\n\n"
             f"- Created: {created_display}\n"
             f"- Source: {note_post.youtube_link or 'N/A'}\n\n"
-            f"## Notes\n\n{note_post.generated_content}\n"
+            f"## Notes\n\n{sections_to_markdown(sections)}\n"
         )
         content_type = "text/markdown; charset=utf-8"
         filename = f"{safe_title}.md"
@@ -416,18 +501,34 @@ def note_export(request, pk):
         pdf.drawString(50, y, "Notes")
         y -= 18
 
-        pdf.setFont("Helvetica", 10)
-        for paragraph in note_post.generated_content.splitlines() or [""]:
-            wrapped_lines = wrap(paragraph, width=105) or [""]
-            for line in wrapped_lines:
+        def draw_wrapped(text, font, x, first_prefix="", wrap_width=105):
+            nonlocal y
+            prefix = first_prefix
+            for line in wrap(text, width=wrap_width) or [""]:
                 if y < 50:
                     pdf.showPage()
-                    pdf.setFont("Helvetica", 10)
                     y = height - 50
-                pdf.drawString(50, y, line)
+                pdf.setFont(font, 10)
+                pdf.drawString(x, y, prefix + line)
+                prefix = " " * len(first_prefix)
                 y -= 13
             y -= 4
 
+        for section in sections:
+            if section.get("heading"):
+                y -= 4
+                draw_wrapped(section["heading"], "Helvetica-Bold", 50)
+            number = 0
+            for item in section.get("items", []):
+                if item["kind"] == BULLET:
+                    indent = 50 + 12 * item.get("level", 0)
+                    draw_wrapped(item["text"], "Helvetica", indent, "\u2022 ", 100)
+                elif item["kind"] == NUMBERED:
+                    number = item.get("number", number + 1)
+                    draw_wrapped(item["text"], "Helvetica", 50, f"{number}. ", 100)
+                else:
+                    draw_wrapped(item["text"], "Helvetica", 50)
+
         pdf.save()
         buffer.seek(0)
         response = HttpResponse(buffer.getvalue(), content_type="application/pdf")
@@ -539,9 +640,9 @@ def get_transcript(link):
             data = resp.json()
             chunks = data.get("transcript", [])
             if chunks:
-                transcript_text = " ".join(
-                    c.get("text", "").strip() for c in chunks
-                ).strip()
+                # One snippet per line: normalization uses the caption
+                # boundaries to spot rolling-caption repeats.
+                transcript_text = join_caption_lines(c.get("text", "") for c in chunks)
                 if transcript_text:
                     return transcript_text
     except Exception as e:
@@ -557,66 +658,37 @@ def get_transcript(link):
             os.remove(audio_file)
 
 
-def generate_blog_from_transcription(transcription):
-    openai.api_key = os.getenv("OPENAI_API_KEY")
-
-    prompt = f"""You are a strict transcript-based note writer.
-
-I will paste a YouTube transcript. Create clean, exam-ready notes using ONLY what appears in the transcript.
-If something is missing or unclear, write: [UNCLEAR IN TRANSCRIPT: ...]. Do not add outside facts.
+def _complete(prompt: str, max_tokens: int, on_token=None) -> str:
+    return llm_client.complete(prompt, max_tokens=max_tokens, on_token=on_token)
 
-FORMATTING RULES (STRICT)
-- Output must be PLAIN TEXT only.
-- Do NOT use Markdown at all (no **bold**, no tables, no code fences).
-- Use the exact indentation and bullet styles shown below.
-- Put a blank line between sections.
-- Wrap long lines naturally (don’t make one giant paragraph).
 
-BULLET STYLE
-- Use "-" for bullets.
-- Use two spaces before sub-bullets.
-Example:
-- Main bullet
-  - Sub bullet
-
-OUTPUT FORMAT (exact headings + structure)
-
-TL;DR
-- (5 bullets)
-
-KEY TERMS
-- Term: definition.
-  - Common mistake: ... (only if implied in transcript)
-
-HOW IT WORKS
-- (3–6 bullets)
-
-STEP-BY-STEP
-1) ...
-2) ...
-(If none, write exactly: None found in transcript.)
-
-QUICK CHECK QUIZ (with answers)
-Q1) Question?
-A1) Answer.
-
-Q2) Question?
-A2) Answer.
-(8–10 total)
-
-ANCHORS
-- "short quote snippet" -> what it teaches
-(6–10 total)
+def generate_blog_from_transcription(transcription, on_token=None):
+    """Generate notes for a transcript. If `on_token` is given, the final
+    completion is streamed through it token by token."""
+    # Very long transcripts are cut down to their most informative sentences
+    # first, so cost and latency stay bounded regardless of video length.
+    transcription = fit_to_token_budget(
+        transcription, settings.NOTES_SALIENCE_BUDGET_TOKENS
+    )
 
-Now wait. Here is the transcript:
-{transcription}
-"""
+    # Long transcripts overflow the context window (and get truncated), so they
+    # go through map-reduce instead of a single prompt.
+    if count_tokens(transcription) > settings.NOTES_MAPREDUCE_THRESHOLD_TOKENS:
+        return map_reduce_notes(
+            transcription,
+            _complete,
+            chunk_tokens=settings.NOTES_MAPREDUCE_CHUNK_TOKENS,
+            max_workers=settings.NOTES_MAPREDUCE_CONCURRENCY,
+            map_max_tokens=settings.NOTES_MAPREDUCE_MAP_MAX_TOKENS,
+            reduce_max_tokens=settings.NOTES_MAX_TOKENS,
+            on_token=on_token,
+        )
 
-    response = openai.completions.create(
-        model="gpt-4.1-nano", prompt=prompt, max_tokens=1000
+    return _complete(
+        NOTES_PROMPT.format(transcription=transcription),
+        settings.NOTES_MAX_TOKENS,
+        on_token=on_token,
     )
-    generated_content = response.choices[0].text.strip()
-    return generated_content
 
 
 def user_login(request):
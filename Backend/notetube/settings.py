@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 from pathlib import Path
+import json
 import os
 from dotenv import load_dotenv
 
@@ -214,7 +215,42 @@ CACHES = {
 CONTENT_SERVICE_HOST = os.getenv("CONTENT_SERVICE_HOST", "content-service")
 CONTENT_SERVICE_PORT = int(os.getenv("CONTENT_SERVICE_PORT", "50051"))
 CONTENT_SERVICE_TIMEOUT = float(os.getenv("CONTENT_SERVICE_TIMEOUT", "10"))
+# Extra attempts for calls that never reached a replica (gRPC retry policy,
+# max 4), and how calls are spread over the replicas behind the host name.
 CONTENT_SERVICE_RETRIES = int(os.getenv("CONTENT_SERVICE_RETRIES", "1"))
+CONTENT_SERVICE_LB_POLICY = os.getenv("CONTENT_SERVICE_LB_POLICY", "round_robin")
+# Long-lived channels per process (each its own connection) and how often
+# idle ones are pinged.
+CONTENT_SERVICE_CHANNELS = int(os.getenv("CONTENT_SERVICE_CHANNELS", "1"))
+CONTENT_SERVICE_KEEPALIVE_MS = int(os.getenv("CONTENT_SERVICE_KEEPALIVE_MS", "30000"))
+# Requests of at least CONTENT_SERVICE_COMPRESSION_MIN_BYTES are compressed
+# (gzip, deflate or none); message size limits for this client.
+CONTENT_SERVICE_COMPRESSION = os.getenv("CONTENT_SERVICE_COMPRESSION", "gzip")
+CONTENT_SERVICE_COMPRESSION_MIN_BYTES = int(
+    os.getenv("CONTENT_SERVICE_COMPRESSION_MIN_BYTES", "8192")
+)
+CONTENT_SERVICE_MAX_SEND_BYTES = int(
+    os.getenv("CONTENT_SERVICE_MAX_SEND_BYTES", str(32 * 1024 * 1024))
+)
+CONTENT_SERVICE_MAX_RECEIVE_BYTES = int(
+    os.getenv("CONTENT_SERVICE_MAX_RECEIVE_BYTES", str(16 * 1024 * 1024))
+)
+# Transcripts longer than this (in characters) use the streaming RPC, sent in
+# chunks of CONTENT_SERVICE_STREAM_CHUNK_CHARS.
+CONTENT_SERVICE_STREAM_THRESHOLD_CHARS = int(
+    os.getenv("CONTENT_SERVICE_STREAM_THRESHOLD_CHARS", "262144")
+)
+CONTENT_SERVICE_STREAM_CHUNK_CHARS = int(
+    os.getenv("CONTENT_SERVICE_STREAM_CHUNK_CHARS", "65536")
+)
+# Deadline for a whole streamed transcript (multi-hour videos).
+CONTENT_SERVICE_STREAM_TIMEOUT = float(
+    os.getenv("CONTENT_SERVICE_STREAM_TIMEOUT", "300")
+)
+# Bulk re-processing: transcripts per ProcessTranscriptBatch call, and the
+# deadline for each call.
+CONTENT_SERVICE_BATCH_SIZE = int(os.getenv("CONTENT_SERVICE_BATCH_SIZE", "16"))
+CONTENT_SERVICE_BATCH_TIMEOUT = float(os.getenv("CONTENT_SERVICE_BATCH_TIMEOUT", "120"))
 
 # Django REST Framework
 REST_FRAMEWORK = {
@@ -232,6 +268,8 @@ RAG_EMBEDDING_MODEL = os.getenv("RAG_EMBEDDING_MODEL", "text-embedding-3-small")
 RAG_CHAT_MODEL = os.getenv("RAG_CHAT_MODEL", "gpt-4o-mini")
 RAG_COLLECTION_NAME = os.getenv("RAG_COLLECTION_NAME", "notetube_notes")
 RAG_TOP_K = int(os.getenv("RAG_TOP_K", "5"))
+# Output tokens charged to the rate limiter per answer (answers aren't capped).
+RAG_ANSWER_TOKEN_ESTIMATE = int(os.getenv("RAG_ANSWER_TOKEN_ESTIMATE", "500"))
 RAG_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("RAG_SEMANTIC_CACHE_THRESHOLD", "0.05"))
 
 # PGVector wants a SQLAlchemy-style URL on the psycopg v3 driver.
@@ -256,3 +294,68 @@ CELERY_WORKER_PREFETCH_MULTIPLIER = (
     1  # one task at a time per worker (all tasks are I/O-heavy)
 )
 CELERY_TIMEZONE = "UTC"
+
+# LLM note generation
+NOTES_LLM_MODEL = os.getenv("NOTES_LLM_MODEL", "gpt-4.1-nano")
+NOTES_MAX_TOKENS = int(os.getenv("NOTES_MAX_TOKENS", "1000"))
+# Transcripts above this many tokens are generated map-reduce style: chunks are
+# summarized concurrently, then a reduce pass writes the final note.
+NOTES_MAPREDUCE_THRESHOLD_TOKENS = int(
+    os.getenv("NOTES_MAPREDUCE_THRESHOLD_TOKENS", "12000")
+)
+NOTES_MAPREDUCE_CHUNK_TOKENS = int(os.getenv("NOTES_MAPREDUCE_CHUNK_TOKENS", "4000"))
+NOTES_MAPREDUCE_CONCURRENCY = int(os.getenv("NOTES_MAPREDUCE_CONCURRENCY", "4"))
+NOTES_MAPREDUCE_MAP_MAX_TOKENS = int(os.getenv("NOTES_MAPREDUCE_MAP_MAX_TOKENS", "600"))
+# Transcripts above this many tokens are trimmed to their most salient sentences
+# (TF-IDF centroid scoring) before generation. 0 disables selection.
+NOTES_SALIENCE_BUDGET_TOKENS = int(os.getenv("NOTES_SALIENCE_BUDGET_TOKENS", "40000"))
+
+# Shared LLM client (llm_client.py): pooled connections, timeouts, backoff
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))  # seconds
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "20"))  # seconds
+LLM_STATS_TTL = int(os.getenv("LLM_STATS_TTL", "3600"))
+# Cluster-wide provider limits per model (llm_ratelimit.py), as JSON:
+# {"model": {"rpm": requests/min, "tpm": tokens/min}}. Unlisted models are
+# not limited; neither is anything when REDIS_URL is unset.
+LLM_RATE_LIMITS = json.loads(
+    os.getenv(
+        "LLM_RATE_LIMITS",
+        '{"gpt-4.1-nano": {"rpm": 500, "tpm": 200000},'
+        ' "gpt-4o-mini": {"rpm": 500, "tpm": 200000},'
+        ' "text-embedding-3-small": {"rpm": 3000, "tpm": 1000000}}',
+    )
+)
+# How much unused capacity may be spent at once, in seconds of the rate.
+LLM_RATE_LIMIT_BURST_SECONDS = float(os.getenv("LLM_RATE_LIMIT_BURST_SECONDS", "10"))
+# Callers that would have to wait longer than this fail fast instead.
+LLM_RATE_LIMIT_MAX_WAIT = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT", "120"))
+
+# Engine routing (generation/routing.py): "fast" gets the extractive
+# content-service, "full" gets the LLM unless it is slow or the queue is backed up.
+NOTES_DEFAULT_TIER = os.getenv("NOTES_DEFAULT_TIER", "full")
+NOTES_ROUTE_LLM_SLOW_MS = float(os.getenv("NOTES_ROUTE_LLM_SLOW_MS", "30000"))
+NOTES_ROUTE_MAX_QUEUE_DEPTH = int(os.getenv("NOTES_ROUTE_MAX_QUEUE_DEPTH", "20"))
+
+# Near-duplicate transcripts (MinHash estimated Jaccard similarity at or above
+# this) reuse an existing generation. 0 disables the check.
+NOTES_DEDUP_THRESHOLD = float(os.getenv("NOTES_DEDUP_THRESHOLD", "0.8"))
+
+# Token streaming to the browser (Redis list + pub/sub, relayed over SSE)
+NOTES_STREAM_TTL = int(os.getenv("NOTES_STREAM_TTL", "600"))
+NOTES_STREAM_TIMEOUT = float(os.getenv("NOTES_STREAM_TIMEOUT", "180"))
+
+# Offline bulk generation via the provider batch API
+NOTES_BATCH_BASE_URL = os.getenv("NOTES_BATCH_BASE_URL", "")  # "" = OpenAI
+NOTES_BATCH_MAX_REQUESTS = int(os.getenv("NOTES_BATCH_MAX_REQUESTS", "500"))
+NOTES_BATCH_POLL_INTERVAL = int(os.getenv("NOTES_BATCH_POLL_INTERVAL", "300"))
+
+CELERY_BEAT_SCHEDULE = {
+    "process-generation-batches": {
+        "task": "note_generator.process_generation_batches",
+        "schedule": NOTES_BATCH_POLL_INTERVAL,
+    },
+}
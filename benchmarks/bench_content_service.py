@@ -0,0 +1,92 @@
+"""Benchmark content-service throughput with one vs several server processes.
+
+Starts the real server (content-service/app/server.py) as a subprocess with
+CONTENT_SERVICE_PROCESSES=1 and then with one process per core, and fires
+concurrent ProcessTranscript calls at it, one channel per client thread so
+SO_REUSEPORT can spread the connections. Throughput should scale with cores
+because processing is CPU-bound and each process has its own GIL.
+
+Usage:
+    python benchmarks/bench_content_service.py [requests] [concurrency]
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent import futures
+
+import grpc
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_textrank import synth_transcript  # noqa: E402
+from shared_proto.python import content_service_pb2  # noqa: E402
+from shared_proto.python import content_service_pb2_grpc  # noqa: E402
+
+SERVER = os.path.join(ROOT, "content-service", "app", "server.py")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(processes: int, port: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        CONTENT_SERVICE_PORT=str(port),
+        CONTENT_SERVICE_PROCESSES=str(processes),
+        IDF_INDEX_PATH="",
+        LOG_LEVEL="WARNING",
+    )
+    proc = subprocess.Popen([sys.executable, SERVER], env=env)
+    with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+        grpc.channel_ready_future(channel).result(timeout=30)
+    return proc
+
+
+def run_load(port: int, transcript: str, requests: int, concurrency: int) -> float:
+    request = content_service_pb2.ProcessTranscriptRequest(
+        transcript_text=transcript, max_sections=6
+    )
+
+    def client(count: int) -> None:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = content_service_pb2_grpc.ContentServiceStub(channel)
+            for _ in range(count):
+                stub.ProcessTranscript(request, timeout=120)
+
+    per_client = [requests // concurrency] * concurrency
+    start = time.perf_counter()
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, per_client))
+    return sum(per_client) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    transcript = synth_transcript(60)
+    cores = os.cpu_count() or 1
+
+    print(f"{'processes':>9} {'req/s':>8} {'speedup':>8}   (60-minute transcript)")
+    baseline = None
+    for processes in sorted({1, max(cores // 2, 1), cores}):
+        port = free_port()
+        proc = start_server(processes, port)
+        try:
+            rps = run_load(port, transcript, requests, concurrency)
+        finally:
+            proc.terminate()
+            proc.wait()
+        baseline = baseline or rps
+        print(f"{processes:>9} {rps:>8.1f} {rps / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark per-call latency: a new gRPC channel per call vs the pooled channel.
+
+Runs an in-process content-service and times HealthCheck and a short
+ProcessTranscript the old way (open a channel, call, close it) and through
+`note_generator.grpc_client`, whose channel persists across calls.
+
+Usage:
+    python benchmarks/bench_grpc_channel.py [calls]
+"""
+
+import os
+import statistics
+import sys
+import time
+from concurrent import futures
+
+import grpc
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "Backend"))
+sys.path.insert(0, os.path.join(ROOT, "content-service", "app"))
+
+from django.conf import settings  # noqa: E402
+
+settings.configure(CONTENT_SERVICE_HOST="127.0.0.1")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from note_generator import grpc_client  # noqa: E402
+from server import ContentService  # noqa: E402
+from shared_proto.python import content_service_pb2  # noqa: E402
+from shared_proto.python import content_service_pb2_grpc  # noqa: E402
+
+TRANSCRIPT = "Gradient descent follows the slope of the loss downhill. " * 20
+
+
+def per_call_channel(target: str, method: str, request) -> None:
+    with grpc.insecure_channel(target) as channel:
+        stub = content_service_pb2_grpc.ContentServiceStub(channel)
+        getattr(stub, method)(request, timeout=10, wait_for_ready=True)
+
+
+def time_calls(fn, calls: int) -> list[float]:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main() -> None:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    content_service_pb2_grpc.add_ContentServiceServicer_to_server(
+        ContentService(), server
+    )
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    settings.CONTENT_SERVICE_PORT = port
+    target = f"127.0.0.1:{port}"
+
+    health = content_service_pb2.HealthCheckRequest(caller="bench")
+    process = content_service_pb2.ProcessTranscriptRequest(transcript_text=TRANSCRIPT)
+    cases = [
+        (
+            "HealthCheck",
+            "per-call",
+            lambda: per_call_channel(target, "HealthCheck", health),
+        ),
+        ("HealthCheck", "pooled", lambda: grpc_client.health_check_via_grpc("bench")),
+        (
+            "ProcessTranscript",
+            "per-call",
+            lambda: per_call_channel(target, "ProcessTranscript", process),
+        ),
+        (
+            "ProcessTranscript",
+            "pooled",
+            lambda: grpc_client.process_transcript_via_grpc(TRANSCRIPT),
+        ),
+    ]
+
+    print(f"{'rpc':>18} {'channel':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    try:
+        for rpc, mode, fn in cases:
+            fn()  # warm-up
+            samples = sorted(time_calls(fn, calls))
+            p95 = samples[int(len(samples) * 0.95) - 1]
+            print(f"{rpc:>18} {mode:>9} {statistics.median(samples):>8.2f} {p95:>8.2f}")
+    finally:
+        grpc_client.close_channels()
+        server.stop(None)
+
+
+if __name__ == "__main__":
+    main()
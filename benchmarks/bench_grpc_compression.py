@@ -0,0 +1,105 @@
+"""Benchmark gzip on the ContentService channel: bytes on the wire vs latency.
+
+Runs an in-process content-service behind a byte-counting TCP proxy and
+sends ProcessTranscript requests for 10-minute to 6-hour transcripts with
+and without gzip. The server compresses responses over its threshold either
+way, so the difference is the request body.
+
+Usage:
+    python benchmarks/bench_grpc_compression.py
+"""
+
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent import futures
+
+import grpc
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "content-service", "app"))
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from bench_textrank import synth_transcript  # noqa: E402
+from server import ContentService, _server_options  # noqa: E402
+from shared_proto.python import content_service_pb2  # noqa: E402
+from shared_proto.python import content_service_pb2_grpc  # noqa: E402
+
+MODES = [("none", grpc.Compression.NoCompression), ("gzip", grpc.Compression.Gzip)]
+
+
+class CountingProxy:
+    """Forwards TCP to `upstream_port`, counting bytes each way."""
+
+    def __init__(self, upstream_port: int):
+        self.upstream_port = upstream_port
+        self.sent = self.received = 0
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self) -> None:
+        while True:
+            client, _ = self.listener.accept()
+            upstream = socket.create_connection(("127.0.0.1", self.upstream_port))
+            threading.Thread(
+                target=self._pipe, args=(client, upstream, "sent"), daemon=True
+            ).start()
+            threading.Thread(
+                target=self._pipe, args=(upstream, client, "received"), daemon=True
+            ).start()
+
+    def _pipe(self, src: socket.socket, dst: socket.socket, counter: str) -> None:
+        while data := src.recv(65536):
+            setattr(self, counter, getattr(self, counter) + len(data))
+            dst.sendall(data)
+
+    def reset(self) -> None:
+        self.sent = self.received = 0
+
+
+def main() -> None:
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=4), options=_server_options()
+    )
+    content_service_pb2_grpc.add_ContentServiceServicer_to_server(
+        ContentService(), server
+    )
+    proxy = CountingProxy(server.add_insecure_port("127.0.0.1:0"))
+    server.start()
+
+    channel = grpc.insecure_channel(
+        f"127.0.0.1:{proxy.port}",
+        options=[("grpc.max_send_message_length", 32 * 1024 * 1024)],
+    )
+    stub = content_service_pb2_grpc.ContentServiceStub(channel)
+    stub.HealthCheck(content_service_pb2.HealthCheckRequest(caller="bench"))
+
+    print(
+        f"{'video':>7} {'text KB':>8} {'mode':>5} {'sent KB':>8} {'recv KB':>8} {'ms':>8}"
+    )
+    for minutes in (10, 60, 180, 360):
+        text = synth_transcript(minutes)
+        request = content_service_pb2.ProcessTranscriptRequest(transcript_text=text)
+        for name, compression in MODES:
+            stub.ProcessTranscript(request, compression=compression)  # warm-up
+            proxy.reset()
+            start = time.perf_counter()
+            stub.ProcessTranscript(request, compression=compression)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            time.sleep(0.05)  # let the proxy finish counting
+            print(
+                f"{minutes:>5}m {len(text) / 1024:>8.0f} {name:>5} "
+                f"{proxy.sent / 1024:>8.1f} {proxy.received / 1024:>8.1f} {elapsed_ms:>8.1f}"
+            )
+
+    channel.close()
+    server.stop(None)
+
+
+if __name__ == "__main__":
+    main()
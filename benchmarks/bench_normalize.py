@@ -0,0 +1,87 @@
+"""Benchmark transcript normalization on real-size caption transcripts.
+
+Synthesizes YouTube-style auto-captions (rolling caption repeats, filler,
+[Music] markers, ragged whitespace) at roughly 150 spoken words per minute and
+times `normalize_transcript` on 30-minute to 6-hour videos.
+
+Real captions can be passed as files: SerpAPI youtube_transcript responses
+(.json, joined one snippet per line as the app does) or plain text with one
+caption per line. Check the "removed" column against the synthetic runs: on
+real speech it should stay close to the filler/marker share, not eat words.
+
+Usage:
+    python benchmarks/bench_normalize.py [captions.json|captions.txt ...]
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Backend"))
+
+from note_generator.generation.normalize import (  # noqa: E402
+    join_caption_lines,
+    normalize_transcript,
+)
+
+WORDS_PER_MINUTE = 150
+VOCAB = (
+    "the a of to and in is that it for on with as this we you gradient network "
+    "layer weights loss function model data training error value step learning "
+    "rate batch vector matrix output input neuron activation descent backprop"
+).split()
+
+
+def synth_captions(minutes: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    spoken = [rng.choice(VOCAB) for _ in range(minutes * WORDS_PER_MINUTE)]
+    out, prev_tail, i = [], [], 0
+    while i < len(spoken):
+        line = spoken[i : i + rng.randint(7, 12)]
+        i += len(line)
+        # Rolling captions re-show the tail of the previous line.
+        out.extend(prev_tail)
+        for word in line:
+            if rng.random() < 0.04:
+                out.append(rng.choice(["um", "uh,", "Hmm."]))
+            out.append(word)
+        if rng.random() < 0.02:
+            out.append(rng.choice(["[Music]", "[Applause]", "(laughs)", ">>"]))
+        prev_tail = line[-rng.randint(2, 5) :] if rng.random() < 0.6 else []
+        # Snippets are joined one per line (join_caption_lines), with ragged
+        # whitespace around the break.
+        out.append(rng.choice(["\n", " \n", "\n  "]))
+    return " ".join(out)
+
+
+def load_captions(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            chunks = json.load(f).get("transcript", [])
+            return join_caption_lines(c.get("text", "") for c in chunks)
+        return f.read()
+
+
+def report(label: str, text: str) -> None:
+    start = time.perf_counter()
+    result = normalize_transcript(text)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    pct = 100 * result.tokens_removed / max(result.tokens_before, 1)
+    print(
+        f"{label:>8} {len(text):>10,} {result.tokens_before:>10,} "
+        f"{pct:>8.1f}% {elapsed_ms:>8.1f}"
+    )
+
+
+def main() -> None:
+    print(f"{'video':>8} {'chars':>10} {'tokens in':>10} {'removed':>9} {'ms':>8}")
+    for minutes in (30, 60, 180, 360):
+        report(f"{minutes}m", synth_captions(minutes))
+    for path in sys.argv[1:]:
+        report(os.path.basename(path)[:8], load_captions(path))
+
+
+if __name__ == "__main__":
+    main()
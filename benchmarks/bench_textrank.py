@@ -0,0 +1,74 @@
+"""Benchmark the content-service TextRank engine on multi-hour transcripts.
+
+Synthesizes lecture-style transcripts at roughly 150 spoken words per minute,
+drifting across a handful of topics, and times `process_transcript` on
+30-minute to 6-hour videos. Exits non-zero if any size exceeds its budget so
+it can gate processor changes.
+
+Usage:
+    python benchmarks/bench_textrank.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "content-service", "app")
+)
+
+from processor import _sentence_split, process_transcript  # noqa: E402
+
+WORDS_PER_MINUTE = 150
+# Wall-clock budget per request, by video length in minutes.
+BUDGET_MS = {30: 250, 60: 500, 180: 1500, 360: 3000}
+
+FILLER = "the a of to and in is that it for on with as this we you so".split()
+TOPICS = [
+    "gradient descent learning rate loss minimum step slope convergence".split(),
+    "neuron activation layer weights bias sigmoid relu network output".split(),
+    "backpropagation chain rule derivative error signal layer update".split(),
+    "training data batch epoch overfitting validation generalization".split(),
+    "matrix vector multiplication dimension linear transformation basis".split(),
+    "probability distribution softmax likelihood entropy cross label".split(),
+]
+
+
+def synth_transcript(minutes: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words_left = minutes * WORDS_PER_MINUTE
+    topic = rng.choice(TOPICS)
+    sentences = []
+    while words_left > 0:
+        if rng.random() < 0.02:
+            topic = rng.choice(TOPICS)
+        length = rng.randint(8, 22)
+        words = [
+            rng.choice(topic) if rng.random() < 0.4 else rng.choice(FILLER)
+            for _ in range(length)
+        ]
+        sentences.append(" ".join(words).capitalize() + rng.choice([".", ".", "?"]))
+        words_left -= length
+    return " ".join(sentences)
+
+
+def main() -> int:
+    over_budget = False
+    print(f"{'video':>8} {'words':>10} {'sentences':>10} {'ms':>8} {'budget':>8}")
+    for minutes, budget_ms in BUDGET_MS.items():
+        text = synth_transcript(minutes)
+        start = time.perf_counter()
+        process_transcript(text)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        over_budget |= elapsed_ms > budget_ms
+        print(
+            f"{minutes:>6}m {len(text.split()):>10,} {len(_sentence_split(text)):>10,} "
+            f"{elapsed_ms:>8.1f} {budget_ms:>8}"
+            + ("  OVER" if elapsed_ms > budget_ms else "")
+        )
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Benchmark the content-service tokenizer: time and peak memory.
+
+Compares the single-pass `tokenize` (sentence offsets and word counts, then
+the chunk count from the word count) with the split-based pipeline it
+replaced, which split the whole transcript into words twice, joined word
+slices into chunks and copied the text with `.replace` before splitting it
+into sentences. Peak memory is measured with tracemalloc, on top of the
+transcript string itself. Exits non-zero if the tokenizer is slower or
+peaks higher than the old pipeline on any size.
+
+Usage:
+    python benchmarks/bench_tokenizer.py
+"""
+
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "content-service", "app")
+)
+
+from bench_textrank import synth_transcript  # noqa: E402
+from processor import (  # noqa: E402
+    CHUNK_WORDS,
+    MAX_SENTENCE_WORDS,
+    SENTENCE_WORDS,
+    tokenize,
+)
+
+_OLD_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_based(text: str) -> tuple[list[str], int, int]:
+    """The pre-tokenizer pipeline, kept here as the baseline."""
+    words = text.split()
+    chunks = [
+        " ".join(words[i : i + CHUNK_WORDS]) for i in range(0, len(words), CHUNK_WORDS)
+    ]
+    sentences = []
+    for part in _OLD_SENTENCE_END_RE.split(text.replace("\n", " ")):
+        part_words = part.split()
+        if len(part_words) <= MAX_SENTENCE_WORDS:
+            if part_words:
+                sentences.append(" ".join(part_words))
+            continue
+        for i in range(0, len(part_words), SENTENCE_WORDS):
+            sentences.append(" ".join(part_words[i : i + SENTENCE_WORDS]))
+    return sentences, len(text.split()), len(chunks)
+
+
+def single_pass(text: str) -> tuple[list[str], int, int]:
+    sentences = []
+    word_count = 0
+    for sentence in tokenize(text):
+        sentences.append(sentence.text)
+        word_count += sentence.words
+    return sentences, word_count, -(-word_count // CHUNK_WORDS)
+
+
+def measure(fn, text: str) -> tuple[float, float]:
+    """(milliseconds, peak MiB) of one call."""
+    start = time.perf_counter()
+    fn(text)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    tracemalloc.start()
+    fn(text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed_ms, peak / 2**20
+
+
+def main() -> int:
+    worse = False
+    print(
+        f"{'video':>8} {'MiB text':>9} {'old ms':>8} {'new ms':>8} "
+        f"{'old MiB':>8} {'new MiB':>8}"
+    )
+    for minutes in (60, 360, 1440, 4320):
+        # Captions put a line break every few words.
+        text = synth_transcript(minutes).replace(". ", ".\n")
+        assert single_pass(text) == split_based(text)
+
+        old_ms, old_mib = measure(split_based, text)
+        new_ms, new_mib = measure(single_pass, text)
+        worse |= new_ms > old_ms or new_mib > old_mib
+        print(
+            f"{minutes:>6}m {len(text) / 2**20:>9.1f} {old_ms:>8.1f} {new_ms:>8.1f} "
+            f"{old_mib:>8.1f} {new_mib:>8.1f}"
+        )
+    return 1 if worse else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""Corpus-wide document frequencies for key-term weighting.
+
+Terms (and phrases) are hashed into a fixed number of buckets, so the table is
+a flat array of uint32 document counts whatever the vocabulary size:
+
+    bytes 0-3   magic b"IDF1"
+    bytes 4-7   log2 of the bucket count (uint32)
+    bytes 8-11  documents indexed (uint32)
+    bytes 12-   one uint32 document count per bucket
+
+The file is memory-mapped, so lookups are a vectorized gather over the page
+cache and updates touch only the pages of the buckets a transcript uses.
+Writers take an exclusive flock, so several server processes can share one
+file. Hash collisions only ever inflate a document frequency, which makes a
+term look slightly more common than it is.
+
+Retries, duplicate submissions and backfills process the same transcript
+again, so documents are counted once per id. Counted ids go into a Bloom
+filter in a fixed-size sidecar file (<path>.docs, 2**SEEN_BITS bits: 2 MiB),
+memory-mapped like the counts so every process sees the others' ids without
+re-reading anything. It never grows; the cost is that once millions of
+documents are indexed, a small fraction of new ones (about 0.05% at one
+million, 2% at two million) is taken for already counted and skipped. Delete
+both files to rebuild the index from scratch.
+
+Both files are created, and updated, under an exclusive flock on <path>.lock.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+MAGIC = b"IDF1"
+HEADER_BYTES = 12
+DEFAULT_BITS = 20
+# Bloom filter of counted document ids: 2**SEEN_BITS bits, SEEN_HASHES probes.
+SEEN_BITS = 24
+SEEN_HASHES = 7
+
+
+def term_buckets(terms: Iterable[str], bits: int) -> np.ndarray:
+    """Bucket id of each term."""
+    mask = (1 << bits) - 1
+    return np.fromiter(
+        (zlib.crc32(term.encode()) & mask for term in terms), dtype=np.int64
+    )
+
+
+class IdfIndex:
+    def __init__(self, path: str | os.PathLike, bits: int = DEFAULT_BITS):
+        self.path = Path(path)
+        self.bits = bits
+        self._lock = threading.Lock()
+        self._seen_path = self.path.with_name(self.path.name + ".docs")
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Several server processes may start at once; only one creates.
+        with self._file_lock():
+            if not self.path.exists():
+                self._create()
+            if not self._seen_path.exists():
+                self._create_seen()
+        self._open()
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self._lock_path, "ab") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _create(self) -> None:
+        tmp = self.path.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(np.uint32(self.bits).tobytes())
+            f.write(np.uint32(0).tobytes())
+            f.truncate(HEADER_BYTES + 4 * (1 << self.bits))
+        # Atomic, so a reader that doesn't lock never maps a half-written file.
+        os.replace(tmp, self.path)
+
+    def _create_seen(self) -> None:
+        tmp = self._seen_path.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp, "wb") as f:
+            f.truncate(1 << (SEEN_BITS - 3))
+        os.replace(tmp, self._seen_path)
+
+    def _open(self) -> None:
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER_BYTES)
+        if header[:4] != MAGIC:
+            raise ValueError(f"{self.path} is not an IDF index")
+        self.bits = int(np.frombuffer(header[4:8], dtype=np.uint32)[0])
+        self._docs = np.memmap(
+            self.path, dtype=np.uint32, mode="r+", offset=8, shape=(1,)
+        )
+        self._counts = np.memmap(
+            self.path,
+            dtype=np.uint32,
+            mode="r+",
+            offset=HEADER_BYTES,
+            shape=(1 << self.bits,),
+        )
+        self._seen = np.memmap(self._seen_path, dtype=np.uint8, mode="r+")
+
+    @property
+    def document_count(self) -> int:
+        return int(self._docs[0])
+
+    def idf(self, terms: list[str]) -> np.ndarray:
+        """Smoothed IDF of each term; uniform (1.0) for an empty corpus."""
+        df = self._counts[term_buckets(terms, self.bits)].astype(np.float64)
+        return np.log((1 + self.document_count) / (1 + df)) + 1
+
+    def add_document(
+        self, terms: Iterable[str], document_id: bytes | None = None
+    ) -> bool:
+        """Count one document containing each of `terms` (duplicates ignored).
+
+        A `document_id` (e.g. the transcript's sha256) that was already
+        counted is skipped. Returns whether the document was counted.
+        """
+        buckets = np.unique(term_buckets(terms, self.bits))
+        with self._lock, self._file_lock():
+            if document_id is not None and not self._mark_seen(document_id):
+                return False
+            self._counts[buckets] += 1
+            self._docs[0] += 1
+        return True
+
+    def _mark_seen(self, document_id: bytes) -> bool:
+        """Add `document_id` to the Bloom filter; False if it was already in."""
+        digest = hashlib.sha256(document_id).digest()
+        bits = np.frombuffer(digest[: 4 * SEEN_HASHES], dtype="<u4") & np.uint32(
+            (1 << SEEN_BITS) - 1
+        )
+        byte, mask = bits >> 3, np.left_shift(1, bits & 7).astype(np.uint8)
+        if np.all(self._seen[byte] & mask):
+            return False
+        np.bitwise_or.at(self._seen, byte, mask)
+        return True
+
+    def flush(self) -> None:
+        self._counts.flush()
+        self._docs.flush()
+        self._seen.flush()
@@ -0,0 +1,343 @@
+"""Prometheus metrics for the content-service.
+
+RPC metrics are recorded by a server interceptor, so handlers stay free of
+instrumentation:
+
+  - content_service_rpc_duration_seconds{method}: latency, until the last
+    streamed message for streaming RPCs
+  - content_service_rpc_in_flight{method}
+  - content_service_request_message_bytes / _response_message_bytes{method}:
+    serialized size of each message, before gRPC compression
+  - content_service_rpc_errors_total{method,code}: non-OK status codes
+
+Worker pools report size, busy and queued gauges (content_service_worker_pool_*
+{pool}); busy / size is the pool's saturation.
+
+content_service_worker_restarts_total counts server processes the parent had
+to replace after they died.
+
+With several server processes (CONTENT_SERVICE_PROCESSES) every worker writes
+its samples to PROMETHEUS_MULTIPROC_DIR and the parent serves the aggregate on
+CONTENT_SERVICE_METRICS_PORT.
+"""
+
+from __future__ import annotations
+
+import glob
+import logging
+import os
+import time
+from concurrent import futures
+from contextlib import nullcontext
+
+import grpc
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    multiprocess,
+    start_http_server,
+)
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_BUCKETS = (0.001, 0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# 256 B .. 64 MiB in powers of four.
+_BYTE_BUCKETS = tuple(256 * 4**i for i in range(10))
+
+RPC_LATENCY = Histogram(
+    "content_service_rpc_duration_seconds",
+    "Time from receiving an RPC to its last response message.",
+    ["method"],
+    buckets=_LATENCY_BUCKETS,
+)
+RPC_IN_FLIGHT = Gauge(
+    "content_service_rpc_in_flight",
+    "RPCs currently being handled.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+REQUEST_BYTES = Histogram(
+    "content_service_request_message_bytes",
+    "Serialized size of each request message.",
+    ["method"],
+    buckets=_BYTE_BUCKETS,
+)
+RESPONSE_BYTES = Histogram(
+    "content_service_response_message_bytes",
+    "Serialized size of each response message.",
+    ["method"],
+    buckets=_BYTE_BUCKETS,
+)
+RPC_ERRORS = Counter(
+    "content_service_rpc_errors_total",
+    "RPCs that finished with a non-OK status code.",
+    ["method", "code"],
+)
+POOL_SIZE = Gauge(
+    "content_service_worker_pool_size",
+    "Workers (or processing slots) in the pool.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+POOL_BUSY = Gauge(
+    "content_service_worker_pool_busy",
+    "Workers currently running a task.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+POOL_QUEUED = Gauge(
+    "content_service_worker_pool_queued",
+    "Tasks waiting for a free worker.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+WORKER_RESTARTS = Counter(
+    "content_service_worker_restarts_total",
+    "Server processes that died and were replaced.",
+)
+
+
+class PoolMetrics:
+    """Size, busy and queued gauges of one worker pool."""
+
+    def __init__(self, pool: str, size: int):
+        POOL_SIZE.labels(pool).set(size)
+        self._busy = POOL_BUSY.labels(pool)
+        self._queued = POOL_QUEUED.labels(pool)
+
+    def waiting(self):
+        return self._queued.track_inprogress()
+
+    def running(self):
+        return self._busy.track_inprogress()
+
+    def submit(self, executor: futures.Executor, fn, *args) -> futures.Future:
+        """`executor.submit`, counting the task as queued until it starts."""
+        self._queued.inc()
+
+        def run():
+            self._queued.dec()
+            with self.running():
+                return fn(*args)
+
+        return executor.submit(run)
+
+
+def _status_code(context, exc: BaseException | None) -> grpc.StatusCode:
+    code = context.code()
+    if code is not None:
+        return code
+    if exc is None:
+        return grpc.StatusCode.OK
+    if isinstance(exc, GeneratorExit) or type(exc).__name__ == "CancelledError":
+        return grpc.StatusCode.CANCELLED
+    return grpc.StatusCode.UNKNOWN
+
+
+class _RpcObserver:
+    """In-flight while the RPC is open; latency and status once it is done."""
+
+    def __init__(self, method: str):
+        self.method = method
+        self.start = time.perf_counter()
+        RPC_IN_FLIGHT.labels(method).inc()
+
+    def done(self, context, exc: BaseException | None = None) -> None:
+        RPC_IN_FLIGHT.labels(self.method).dec()
+        RPC_LATENCY.labels(self.method).observe(time.perf_counter() - self.start)
+        code = _status_code(context, exc)
+        if code is not grpc.StatusCode.OK:
+            RPC_ERRORS.labels(self.method, code.name).inc()
+
+
+def _observe(behavior, method: str, pool: PoolMetrics | None):
+    def observed(request, context):
+        rpc = _RpcObserver(method)
+        try:
+            with pool.running() if pool is not None else nullcontext():
+                response = behavior(request, context)
+        except BaseException as exc:
+            rpc.done(context, exc)
+            raise
+        rpc.done(context)
+        return response
+
+    return observed
+
+
+def _observe_stream(behavior, method: str, pool: PoolMetrics | None):
+    def observed(request, context):
+        rpc = _RpcObserver(method)
+        try:
+            with pool.running() if pool is not None else nullcontext():
+                yield from behavior(request, context)
+        except BaseException as exc:
+            rpc.done(context, exc)
+            raise
+        rpc.done(context)
+
+    return observed
+
+
+def _observe_async(behavior, method: str):
+    async def observed(request, context):
+        rpc = _RpcObserver(method)
+        try:
+            response = await behavior(request, context)
+        except BaseException as exc:
+            rpc.done(context, exc)
+            raise
+        rpc.done(context)
+        return response
+
+    return observed
+
+
+def _observe_async_stream(behavior, method: str):
+    async def observed(request, context):
+        rpc = _RpcObserver(method)
+        try:
+            async for response in behavior(request, context):
+                yield response
+        except BaseException as exc:
+            rpc.done(context, exc)
+            raise
+        rpc.done(context)
+
+    return observed
+
+
+def _sized_deserializer(deserializer, histogram):
+    def deserialize(data: bytes):
+        histogram.observe(len(data))
+        return deserializer(data) if deserializer is not None else data
+
+    return deserialize
+
+
+def _sized_serializer(serializer, histogram):
+    def serialize(message) -> bytes:
+        data = serializer(message) if serializer is not None else message
+        histogram.observe(len(data))
+        return data
+
+    return serialize
+
+
+def _instrument(
+    handler: grpc.RpcMethodHandler,
+    method: str,
+    is_async: bool,
+    pool: PoolMetrics | None = None,
+) -> grpc.RpcMethodHandler:
+    if handler.request_streaming and handler.response_streaming:
+        factory, behavior = grpc.stream_stream_rpc_method_handler, handler.stream_stream
+    elif handler.request_streaming:
+        factory, behavior = grpc.stream_unary_rpc_method_handler, handler.stream_unary
+    elif handler.response_streaming:
+        factory, behavior = grpc.unary_stream_rpc_method_handler, handler.unary_stream
+    else:
+        factory, behavior = grpc.unary_unary_rpc_method_handler, handler.unary_unary
+
+    if is_async:
+        wrap = _observe_async_stream if handler.response_streaming else _observe_async
+        observed = wrap(behavior, method)
+    else:
+        wrap = _observe_stream if handler.response_streaming else _observe
+        observed = wrap(behavior, method, pool)
+    return factory(
+        observed,
+        request_deserializer=_sized_deserializer(
+            handler.request_deserializer, REQUEST_BYTES.labels(method)
+        ),
+        response_serializer=_sized_serializer(
+            handler.response_serializer, RESPONSE_BYTES.labels(method)
+        ),
+    )
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """Records RPC metrics for a thread-pool `grpc.server`.
+
+    Each handler occupies a server thread while it runs, so with `pool` the
+    handlers also count as busy workers of that pool.
+    """
+
+    def __init__(self, pool: PoolMetrics | None = None):
+        self.pool = pool
+        self._handlers: dict[str, tuple] = {}
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method
+        cached = self._handlers.get(method)
+        if cached is None or cached[0] is not handler:
+            instrumented = _instrument(
+                handler, method.rsplit("/", 1)[-1], is_async=False, pool=self.pool
+            )
+            cached = self._handlers[method] = (handler, instrumented)
+        return cached[1]
+
+
+class AsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+    """Records RPC metrics for a `grpc.aio.server`."""
+
+    def __init__(self):
+        self._handlers: dict[str, tuple] = {}
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method
+        cached = self._handlers.get(method)
+        if cached is None or cached[0] is not handler:
+            instrumented = _instrument(
+                handler, method.rsplit("/", 1)[-1], is_async=True
+            )
+            cached = self._handlers[method] = (handler, instrumented)
+        return cached[1]
+
+
+def clear_multiprocess_dir() -> None:
+    """Drop samples of a previous run; call before forking server processes."""
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(multiproc_dir, "*.db")):
+            os.remove(path)
+
+
+def start_metrics_server(processes: int) -> None:
+    """Serve /metrics on CONTENT_SERVICE_METRICS_PORT (0 disables)."""
+    port = int(os.getenv("CONTENT_SERVICE_METRICS_PORT", "9100"))
+    if not port:
+        return
+
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    elif processes > 1:
+        logger.warning(
+            "Metrics disabled: set PROMETHEUS_MULTIPROC_DIR to aggregate "
+            "metrics across %s server processes",
+            processes,
+        )
+        return
+    else:
+        registry = REGISTRY
+
+    start_http_server(port, registry=registry)
+    logger.info("Serving metrics on 0.0.0.0:%s/metrics", port)
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop a stopped worker's live gauges from the multiprocess aggregate."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
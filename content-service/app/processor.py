@@ -1,7 +1,18 @@
 from __future__ import annotations
 
+import hashlib
+import re
 from dataclasses import dataclass
-from typing import List
+from typing import Iterator, List, NamedTuple
+
+import numpy as np
+from scipy import sparse
+
+from idf_index import IdfIndex
+
+# Bump whenever a change alters process_transcript's output, so cached
+# results from older code are not served.
+PROCESSOR_VERSION = 1
 
 
 @dataclass
@@ -11,53 +22,599 @@ class ProcessedNotes:
     sections: list[dict]
 
 
-def chunk_text(text: str, words_per_chunk: int = 180) -> List[str]:
-    words = text.split()
+# TextRank tuning. The graph is sparsified so multi-hour transcripts (a few
+# thousand sentences) stay well inside the request budget.
+DAMPING = 0.85
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6
+# Edges weaker than this are dropped from the sentence graph.
+MIN_SIMILARITY = 0.1
+# Caption transcripts often lack punctuation; run-on "sentences" longer than
+# this are cut into pseudo-sentences of SENTENCE_WORDS words.
+MAX_SENTENCE_WORDS = 60
+SENTENCE_WORDS = 25
+SUMMARY_SENTENCES = 3
+
+# Topic segmentation (TextTiling-style): cohesion is compared between windows
+# of SEGMENT_WINDOW sentences either side of each gap, and a topic needs at
+# least MIN_SEGMENT_SENTENCES sentences.
+SEGMENT_WINDOW = 6
+MIN_SEGMENT_SENTENCES = 8
+BULLETS_PER_SECTION = 3
+HEADING_TERMS = 3
+
+# Sentences buffered before a streamed transcript is segmented.
+STREAM_WINDOW_SENTENCES = 240
+
+KEY_TERMS = 8
+# A phrase must recur to count as a key term.
+MIN_PHRASE_COUNT = 2
+
+# Transcripts are counted in chunks of CHUNK_WORDS words.
+CHUNK_WORDS = 180
+
+_SENTENCE_END_RE = re.compile(r"[.!?]\s+")
+_WORD_RE = re.compile(r"\S+")
+_LEADING_SPACE_RE = re.compile(r"\s*")
+_TERM_RE = re.compile(r"[a-z0-9']+")
+
+STOPWORDS = frozenset(
+    """a about after all also am an and any are as at be because been before
+    being but by can could did do does doing don't down for from had has have
+    having he her here hers him his how i if in into is it it's its just let's
+    like me more most my no nor not now of off on once only or other our ours
+    out over own really right same she should so some such than that that's
+    the their theirs them then there these they this those through to too
+    under until up very was we were what when where which while who whom why
+    will with would you your yours yeah okay ok um uh gonna going know get got
+    thing things kind sort actually basically""".split()
+)
+
+
+class Sentence(NamedTuple):
+    """A sentence (or pseudo-sentence) as offsets into the transcript, plus
+    its word count and whitespace-normalized text."""
+
+    start: int
+    end: int
+    words: int
+    text: str
+
+
+def tokenize(text: str) -> Iterator[Sentence]:
+    """Sentences of `text` in one pass over it.
+
+    Only each sentence is sliced out of the transcript; the text is never
+    copied, lowercased or split into a word list as a whole. Runs longer than
+    MAX_SENTENCE_WORDS are cut into SENTENCE_WORDS-word pseudo-sentences.
+    """
+    start = _LEADING_SPACE_RE.match(text).end()
+    for match in _SENTENCE_END_RE.finditer(text, start):
+        end = match.start() + 1
+        segment = text[start:end]
+        spaces = segment.count(" ")
+        # Fast path: single-spaced and of ordinary length. " " is the only
+        # printable whitespace character.
+        if (
+            spaces < MAX_SENTENCE_WORDS
+            and segment.isprintable()
+            and "  " not in segment
+        ):
+            yield Sentence(start, end, spaces + 1, segment)
+        else:
+            yield from _split_sentence(text, start, end)
+        start = match.end()
+    yield from _split_sentence(text, start, len(text))
+
+
+def _split_sentence(text: str, start: int, end: int) -> Iterator[Sentence]:
+    segment = text[start:end]
+    words = segment.split()
     if not words:
-        return []
+        return
+    if len(words) <= MAX_SENTENCE_WORDS:
+        # Trim the offsets to the first and last word.
+        trailing = len(segment) - segment.rindex(words[-1]) - len(words[-1])
+        yield Sentence(
+            start + segment.index(words[0]),
+            end - trailing,
+            len(words),
+            " ".join(words),
+        )
+        return
+
+    spans = [match.span() for match in _WORD_RE.finditer(text, start, end)]
+    for i in range(0, len(spans), SENTENCE_WORDS):
+        piece = spans[i : i + SENTENCE_WORDS]
+        yield Sentence(
+            piece[0][0],
+            piece[-1][1],
+            len(piece),
+            " ".join(text[a:b] for a, b in piece),
+        )
+
+
+def chunk_spans(
+    text: str, words_per_chunk: int = CHUNK_WORDS
+) -> Iterator[tuple[int, int]]:
+    """(start, end) offsets of consecutive `words_per_chunk`-word chunks.
+
+    Whole sentences are skipped by word count; only a sentence a chunk
+    boundary falls inside is walked word by word.
+    """
+    start = end = None
+    needed = words_per_chunk
+    for sentence in tokenize(text):
+        if start is None:
+            start = sentence.start
+        end = sentence.end
+        if sentence.words < needed:
+            needed -= sentence.words
+            continue
+        for match in _WORD_RE.finditer(text, sentence.start, sentence.end):
+            if start is None:
+                start = match.start()
+            needed -= 1
+            if needed == 0:
+                yield start, match.end()
+                start, needed = None, words_per_chunk
+    if start is not None:
+        yield start, end
+
 
-    chunks = []
-    for i in range(0, len(words), words_per_chunk):
-        chunks.append(" ".join(words[i : i + words_per_chunk]))
-    return chunks
+def chunk_text(text: str, words_per_chunk: int = CHUNK_WORDS) -> Iterator[str]:
+    for start, end in chunk_spans(text, words_per_chunk):
+        chunk = text[start:end]
+        if not chunk.isprintable() or "  " in chunk:
+            chunk = " ".join(chunk.split())
+        yield chunk
 
 
 def _sentence_split(text: str) -> List[str]:
-    parts = text.replace("\n", " ").split(".")
-    return [p.strip() for p in parts if p.strip()]
+    return [sentence.text for sentence in tokenize(text)]
+
+
+def _term_matrix(sentences: List[str]) -> tuple[sparse.csr_matrix, List[str]]:
+    """L2-normalized TF-IDF matrix, one row per sentence, and its terms."""
+    vocab: dict[str, int] = {}
+    indices: list[int] = []
+    indptr = [0]
+    for sentence in sentences:
+        for term in _TERM_RE.findall(sentence.lower()):
+            if term not in STOPWORDS and len(term) > 1:
+                indices.append(vocab.setdefault(term, len(vocab)))
+        indptr.append(len(indices))
+
+    n = len(sentences)
+    counts = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.float32), indices, indptr),
+        shape=(n, len(vocab)),
+    )
+    counts.sum_duplicates()
+    terms = list(vocab)
+    if counts.nnz == 0:
+        return counts, terms
+
+    df = np.bincount(counts.indices, minlength=len(vocab))
+    idf = np.log((1 + n) / (1 + df)).astype(np.float32) + 1
+
+    matrix = counts.copy()
+    matrix.data = np.log1p(matrix.data) * idf[matrix.indices]
+    matrix.eliminate_zeros()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / norms) @ matrix), terms
+
+
+def textrank_scores(
+    sentences: List[str], matrix: sparse.csr_matrix | None = None
+) -> np.ndarray:
+    """TextRank centrality of each sentence over a cosine-similarity graph."""
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0)
+
+    if matrix is None:
+        matrix, _ = _term_matrix(sentences)
+    graph = sparse.csr_matrix(matrix @ matrix.T)
+    graph.setdiag(0)
+    graph.data[graph.data < MIN_SIMILARITY] = 0
+    graph.eliminate_zeros()
+
+    # Row-stochastic transition matrix; sentences with no edges ("dangling")
+    # spread their rank uniformly.
+    out_weight = np.asarray(graph.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    out_weight[dangling] = 1
+    transition_t = sparse.csr_matrix((sparse.diags(1 / out_weight) @ graph).T)
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        spread = DAMPING * scores[dangling].sum() / n
+        updated = (1 - DAMPING) / n + spread + DAMPING * (transition_t @ scores)
+        delta = np.abs(updated - scores).sum()
+        scores = updated
+        if delta < TOLERANCE:
+            break
+    return scores
+
+
+def _row_norms(matrix: sparse.csr_matrix) -> np.ndarray:
+    return np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+
+
+def cohesion_scores(
+    matrix: sparse.csr_matrix, window: int = SEGMENT_WINDOW
+) -> np.ndarray:
+    """Cosine similarity across each sentence gap.
+
+    Entry g compares the `window` sentences before sentence g with the
+    `window` sentences from g on (g = 1 .. n-1). Window sums are taken with a
+    banded matrix, so the cost is O(window * nnz), linear in transcript
+    length.
+    """
+    n = matrix.shape[0]
+    if n < 2:
+        return np.zeros(0)
+
+    before = sparse.diags(
+        [np.ones(n - k) for k in range(1, window + 1)],
+        [-k for k in range(1, window + 1)],
+        shape=(n, n),
+        format="csr",
+    )
+    after = sparse.diags(
+        [np.ones(n - k) for k in range(window)],
+        list(range(window)),
+        shape=(n, n),
+        format="csr",
+    )
+    left = sparse.csr_matrix(before @ matrix)
+    right = sparse.csr_matrix(after @ matrix)
+
+    dots = np.asarray(left.multiply(right).sum(axis=1)).ravel()
+    norms = _row_norms(left) * _row_norms(right)
+    norms[norms == 0] = 1
+    return (dots / norms)[1:]
+
+
+def depth_scores(cohesion: np.ndarray, window: int = SEGMENT_WINDOW) -> np.ndarray:
+    """How far each gap dips below the highest cohesion within `window` gaps
+    on either side; deep valleys are topic shifts."""
+    if cohesion.size == 0:
+        return cohesion
+    padded = np.pad(cohesion, window, mode="edge")
+    peaks = np.lib.stride_tricks.sliding_window_view(padded, window + 1)
+    left_peak = peaks[: cohesion.size].max(axis=1)
+    right_peak = peaks[window:].max(axis=1)
+    return left_peak + right_peak - 2 * cohesion
+
+
+def segment_boundaries(
+    matrix: sparse.csr_matrix,
+    max_segments: int,
+    window: int = SEGMENT_WINDOW,
+    min_sentences: int = MIN_SEGMENT_SENTENCES,
+) -> List[int]:
+    """Start index of each topic segment (always begins with 0)."""
+    n = matrix.shape[0]
+    if max_segments <= 1 or n < 2 * min_sentences:
+        return [0]
 
+    depth = depth_scores(cohesion_scores(matrix, window), window)
+    # TextTiling cutoff: keep valleys deeper than mean - sd/2.
+    cutoff = depth.mean() - depth.std() / 2
+    candidates = np.flatnonzero((depth > cutoff) & (depth > 0))
+    candidates = candidates[np.argsort(-depth[candidates], kind="stable")]
 
-def process_transcript(transcript_text: str, max_sections: int = 5) -> ProcessedNotes:
-    clean_text = (transcript_text or "").strip()
-    if not clean_text:
+    # Deepest valleys win; gaps are 1-based positions of the next segment.
+    starts: List[int] = []
+    for gap in candidates + 1:
+        gap = int(gap)
+        if gap < min_sentences or n - gap < min_sentences:
+            continue
+        if any(abs(gap - start) < min_sentences for start in starts):
+            continue
+        starts.append(gap)
+        if len(starts) == max_segments - 1:
+            break
+    return [0] + sorted(starts)
+
+
+def segment_heading(
+    matrix: sparse.csr_matrix, terms: List[str], start: int, end: int
+) -> str:
+    """Heading from the segment's highest-weighted terms."""
+    weights = np.asarray(matrix[start:end].sum(axis=0)).ravel()
+    if weights.size == 0 or not weights.any():
+        return "Topic"
+    best = np.argsort(-weights, kind="stable")[:HEADING_TERMS]
+    return ", ".join(terms[i].capitalize() for i in best if weights[i] > 0)
+
+
+def _candidate_terms(
+    sentences: List[str], counts: dict[str, int] | None = None
+) -> dict[str, int]:
+    """Counts of content words and of two-word phrases of adjacent ones,
+    added to `counts` if given."""
+    counts = {} if counts is None else counts
+    for sentence in sentences:
+        previous = None
+        for token in _TERM_RE.findall(sentence.lower()):
+            if token in STOPWORDS or len(token) < 2:
+                previous = None
+                continue
+            counts[token] = counts.get(token, 0) + 1
+            if previous is not None:
+                phrase = f"{previous} {token}"
+                counts[phrase] = counts.get(phrase, 0) + 1
+            previous = token
+    return counts
+
+
+def extract_key_terms(
+    sentences: List[str], idf_index: IdfIndex | None = None, count: int = KEY_TERMS
+) -> tuple[List[str], List[str]]:
+    """Return (the `count` best key terms, every candidate term).
+
+    Terms are scored tf * idf, with idf from the corpus index; phrases weigh
+    per word. Without an index (or before it has documents) this ranks by
+    frequency alone.
+    """
+    return rank_key_terms(_candidate_terms(sentences), idf_index, count)
+
+
+def rank_key_terms(
+    counts: dict[str, int], idf_index: IdfIndex | None = None, count: int = KEY_TERMS
+) -> tuple[List[str], List[str]]:
+    """`extract_key_terms` over precomputed candidate counts."""
+    if not counts:
+        return [], []
+
+    terms = list(counts)
+    tf = np.fromiter(counts.values(), dtype=np.float64, count=len(terms))
+    words = np.fromiter((t.count(" ") + 1 for t in terms), dtype=np.float64)
+    idf = idf_index.idf(terms) if idf_index is not None else np.ones(len(terms))
+    scores = np.log1p(tf) * idf * words
+    scores[(words > 1) & (tf < MIN_PHRASE_COUNT)] = 0
+
+    picked: List[str] = []
+    covered: set[str] = set()
+    for i in np.argsort(-scores, kind="stable"):
+        if scores[i] <= 0 or len(picked) == count:
+            break
+        term = terms[i]
+        # A phrase replaces its own words; a word inside a phrase is skipped.
+        if term in covered:
+            continue
+        parts = term.split()
+        if len(parts) > 1:
+            picked = [p for p in picked if p not in parts]
+            covered.update(parts)
+        picked.append(term)
+    return picked, terms
+
+
+def top_sentences(
+    sentences: List[str],
+    scores: np.ndarray,
+    count: int,
+    exclude: frozenset[int] = frozenset(),
+) -> List[int]:
+    """Indices of the `count` best-scored sentences, in transcript order."""
+    ranked = [int(i) for i in np.argsort(-scores, kind="stable") if i not in exclude]
+    return sorted(ranked[:count])
+
+
+def _as_sentence(text: str) -> str:
+    return text if text.endswith((".", "!", "?")) else text + "."
+
+
+def _topic_sections(
+    sentences: List[str],
+    matrix: sparse.csr_matrix,
+    terms: List[str],
+    scores: np.ndarray,
+    starts: List[int],
+    end: int,
+    exclude: frozenset[int] = frozenset(),
+) -> List[dict]:
+    """One section per segment in sentences[starts[0]:end], holding that
+    topic's best sentences (avoiding `exclude` where it can)."""
+    sections = []
+    for start, stop in zip(starts, starts[1:] + [end]):
+        segment_scores = scores[start:stop]
+        picked = top_sentences(
+            sentences[start:stop],
+            segment_scores,
+            BULLETS_PER_SECTION,
+            exclude=frozenset(i - start for i in exclude),
+        ) or top_sentences(sentences[start:stop], segment_scores, 1)
+        sections.append(
+            {
+                "heading": segment_heading(matrix, terms, start, stop),
+                "bullets": [_as_sentence(sentences[start + i]) for i in picked],
+            }
+        )
+    return sections
+
+
+def _stats_section(word_count: int, chunk_count: int) -> dict:
+    return {
+        "heading": "Chunk Stats",
+        "bullets": [
+            f"Total transcript words: {word_count}",
+            f"Chunk size: {CHUNK_WORDS} words",
+            f"Chunk count: {chunk_count}",
+        ],
+    }
+
+
+def process_transcript(
+    transcript_text: str,
+    max_sections: int = 5,
+    idf_index: IdfIndex | None = None,
+) -> ProcessedNotes:
+    sentences = []
+    word_count = 0
+    for sentence in tokenize(transcript_text or ""):
+        sentences.append(sentence.text)
+        word_count += sentence.words
+    if not word_count:
         raise ValueError("transcript_text is empty")
 
-    chunks = chunk_text(clean_text)
-    sentences = _sentence_split(clean_text)
+    chunk_count = -(-word_count // CHUNK_WORDS)
+    matrix, terms = _term_matrix(sentences)
+    scores = textrank_scores(sentences, matrix)
 
-    # Minimal summarization strategy: keep first 3 meaningful sentences.
-    summary_parts = sentences[:3] if sentences else [clean_text[:320]]
-    summary = ". ".join(summary_parts).strip()
-    if summary and not summary.endswith("."):
-        summary += "."
+    summary_ids = top_sentences(sentences, scores, SUMMARY_SENTENCES)
+    summary = " ".join(_as_sentence(sentences[i]) for i in summary_ids)
 
     sections = [
         {
             "heading": "Summary",
             "bullets": [summary],
         },
-        {
-            "heading": "Key Points",
-            "bullets": [s + "." for s in sentences[3 : 3 + max_sections] if s],
-        },
-        {
-            "heading": "Chunk Stats",
-            "bullets": [
-                f"Total transcript words: {len(clean_text.split())}",
-                f"Chunk size: 180 words",
-                f"Chunk count: {len(chunks)}",
-            ],
-        },
     ]
 
-    return ProcessedNotes(summary=summary, chunk_count=len(chunks), sections=sections)
+    key_terms, candidates = extract_key_terms(sentences, idf_index)
+    if key_terms:
+        sections.append({"heading": "Key Terms", "bullets": key_terms})
+    if idf_index is not None and candidates:
+        idf_index.add_document(
+            candidates, document_id=hashlib.sha256(transcript_text.encode()).digest()
+        )
+
+    starts = segment_boundaries(matrix, max_sections)
+    sections.extend(
+        _topic_sections(
+            sentences,
+            matrix,
+            terms,
+            scores,
+            starts,
+            len(sentences),
+            exclude=frozenset(summary_ids),
+        )
+    )
+    sections.append(_stats_section(word_count, chunk_count))
+
+    return ProcessedNotes(summary=summary, chunk_count=chunk_count, sections=sections)
+
+
+class StreamingProcessor:
+    """`process_transcript` for a transcript that arrives in pieces.
+
+    Complete sentences are buffered until there are `window` of them, then
+    segmented; every topic except the last (which may still be going) is
+    final and is returned from `feed`. At most `max_sections` topics are
+    produced over the whole stream: once only one is left, the rest of the
+    transcript is that last topic, of which only the best `window` sentences
+    are kept. Only the unfinished topic, the best sentences of finished ones
+    (summary candidates) and the key-term counts are kept, so memory stays
+    bounded however long the transcript is.
+
+    Segmentation and ranking see one window at a time, so results can differ
+    slightly from `process_transcript` on the same text.
+    """
+
+    def __init__(
+        self,
+        max_sections: int = 5,
+        idf_index: IdfIndex | None = None,
+        window: int = STREAM_WINDOW_SENTENCES,
+    ):
+        self.max_sections = max_sections
+        self.idf_index = idf_index
+        self.window = window
+        self.sections: List[dict] = []
+        self._carry = ""
+        self._pending: List[str] = []
+        self._highlights: List[str] = []
+        self._term_counts: dict[str, int] = {}
+        self._word_count = 0
+        # Identifies the transcript to the IDF index, which counts it once.
+        self._digest = hashlib.sha256()
+
+    def feed(self, text: str) -> List[dict]:
+        """Add the next piece of transcript; return newly finalized sections."""
+        self._digest.update(text.encode())
+        text = self._carry + text
+        sentences = list(tokenize(text))
+        self._carry = ""
+        # The last sentence may be unfinished (or end mid-word).
+        if sentences:
+            last = sentences[-1]
+            if last.end == len(text) or text[last.end - 1] not in ".!?":
+                sentences.pop()
+                self._carry = text[last.start :]
+
+        self._add_sentences(sentences)
+        if len(self._pending) < self.window:
+            return []
+        return self._flush(final=False)
+
+    def finish(self) -> ProcessedNotes:
+        """Flush everything left and return the complete notes."""
+        self._add_sentences(list(tokenize(self._carry)))
+        self._carry = ""
+        if not self._word_count:
+            raise ValueError("transcript_text is empty")
+        self._flush(final=True)
+
+        scores = textrank_scores(self._highlights)
+        summary_ids = top_sentences(self._highlights, scores, SUMMARY_SENTENCES)
+        summary = " ".join(_as_sentence(self._highlights[i]) for i in summary_ids)
+
+        sections = [{"heading": "Summary", "bullets": [summary]}]
+        key_terms, candidates = rank_key_terms(self._term_counts, self.idf_index)
+        if key_terms:
+            sections.append({"heading": "Key Terms", "bullets": key_terms})
+        if self.idf_index is not None and candidates:
+            self.idf_index.add_document(candidates, document_id=self._digest.digest())
+        sections.extend(self.sections)
+
+        chunk_count = -(-self._word_count // CHUNK_WORDS)
+        sections.append(_stats_section(self._word_count, chunk_count))
+        return ProcessedNotes(
+            summary=summary, chunk_count=chunk_count, sections=sections
+        )
+
+    def _add_sentences(self, sentences: List[Sentence]) -> None:
+        texts = [sentence.text for sentence in sentences]
+        self._pending.extend(texts)
+        self._word_count += sum(sentence.words for sentence in sentences)
+        _candidate_terms(texts, self._term_counts)
+
+    def _flush(self, final: bool) -> List[dict]:
+        sentences = self._pending
+        if not sentences:
+            return []
+        matrix, terms = _term_matrix(sentences)
+        remaining = self.max_sections - len(self.sections)
+        if not final and remaining <= 1:
+            # The last topic runs to the end; keep only its best sentences.
+            if len(sentences) >= 2 * self.window:
+                scores = textrank_scores(sentences, matrix)
+                keep = top_sentences(sentences, scores, self.window)
+                self._pending = [sentences[i] for i in keep]
+            return []
+        starts = segment_boundaries(matrix, remaining)
+
+        if final:
+            end = len(sentences)
+        elif len(starts) > 1:
+            end = starts.pop()
+        elif len(sentences) >= 2 * self.window:
+            # No topic shift in two windows: close it as one long topic.
+            end = len(sentences)
+        else:
+            return []
+
+        scores = textrank_scores(sentences[:end], matrix[:end])
+        new_sections = _topic_sections(sentences, matrix, terms, scores, starts, end)
+        for section in new_sections:
+            self._highlights.extend(section["bullets"])
+        self.sections.extend(new_sections)
+        self._pending = sentences[end:]
+        return new_sections
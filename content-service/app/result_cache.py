@@ -0,0 +1,97 @@
+"""Cache of serialized ProcessTranscriptResponses.
+
+Client retries and duplicate submissions send the same transcript again;
+processing is deterministic for a given transcript, max_sections and
+processor version, so the response can be reused. Entries live in a
+per-process LRU and, when CONTENT_SERVICE_REDIS_URL is set, in Redis as
+well, so replicas (and the other server processes) share each other's work.
+
+Key terms depend on the corpus IDF index, which keeps growing; a cached
+result keeps the key terms it was computed with until it expires.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from processor import PROCESSOR_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(transcript_text: str, max_sections: int) -> str:
+    digest = hashlib.sha256(transcript_text.encode()).hexdigest()
+    return f"content:result:v{PROCESSOR_VERSION}:{max_sections}:{digest}"
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 256, redis_client=None, ttl: int = 86400):
+        self.max_entries = max_entries
+        self.redis = redis_client
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = self._redis_get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._store(key, value)
+        return value
+
+    def peek(self, key: str) -> bytes | None:
+        """In-process lookup only (no Redis round trip); counts hits only."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._store(key, value)
+        if self.redis is not None:
+            try:
+                self.redis.set(key, value, ex=self.ttl)
+            except Exception as exc:
+                logger.warning("Result cache write to Redis failed: %s", exc)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+    def _store(self, key: str, value: bytes) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _redis_get(self, key: str) -> bytes | None:
+        if self.redis is None:
+            return None
+        try:
+            return self.redis.get(key)
+        except Exception as exc:
+            # A Redis outage only costs the shared hits.
+            logger.warning("Result cache read from Redis failed: %s", exc)
+            return None
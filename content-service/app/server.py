@@ -2,15 +2,32 @@ from __future__ import annotations
 
 # pyright: reportAttributeAccessIssue=false
 
+import asyncio
 import logging
+import multiprocessing
 import os
+import signal
 import sys
+import time
 from concurrent import futures
+from multiprocessing.connection import wait
 from pathlib import Path
+from typing import Callable
 
 import grpc
 
-from processor import process_transcript
+from idf_index import IdfIndex
+from metrics import (
+    AsyncMetricsInterceptor,
+    WORKER_RESTARTS,
+    MetricsInterceptor,
+    PoolMetrics,
+    clear_multiprocess_dir,
+    mark_process_dead,
+    start_metrics_server,
+)
+from processor import ProcessedNotes, StreamingProcessor, process_transcript
+from result_cache import ResultCache, cache_key
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 if str(REPO_ROOT) not in sys.path:
@@ -21,12 +38,145 @@ from shared_proto.python import content_service_pb2_grpc
 
 logging.basicConfig(
     level=os.getenv("LOG_LEVEL", "INFO"),
-    format="%(asctime)s %(levelname)s [content-service] %(message)s",
+    format="%(asctime)s %(levelname)s [content-service:%(process)d] %(message)s",
 )
 logger = logging.getLogger(__name__)
 
 
+def open_idf_index() -> IdfIndex | None:
+    path = os.getenv("IDF_INDEX_PATH", "/service/data/idf_index.bin")
+    if not path:
+        return None
+    try:
+        return IdfIndex(path, bits=int(os.getenv("IDF_INDEX_BITS", "20")))
+    except Exception as exc:
+        # Key terms still work without corpus statistics, ranked by frequency.
+        logger.warning("IDF index unavailable path=%s error=%s", path, exc)
+        return None
+
+
+def _note_section(section: dict) -> content_service_pb2.NoteSection:
+    return content_service_pb2.NoteSection(
+        heading=section["heading"],
+        bullets=section["bullets"],
+    )
+
+
+def _response_from_notes(
+    result: ProcessedNotes,
+) -> content_service_pb2.ProcessTranscriptResponse:
+    return content_service_pb2.ProcessTranscriptResponse(
+        summary=result.summary,
+        sections=[_note_section(section) for section in result.sections],
+        chunk_count=result.chunk_count,
+        status="ok",
+        error_message="",
+    )
+
+
+def _error_response(exc: Exception) -> content_service_pb2.ProcessTranscriptResponse:
+    return content_service_pb2.ProcessTranscriptResponse(
+        summary="",
+        sections=[],
+        chunk_count=0,
+        status="error",
+        error_message=str(exc),
+    )
+
+
+_COMPRESSION = {
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+    "none": grpc.Compression.NoCompression,
+}
+
+
+def _compress_if_large(context, response):
+    """Compress responses of at least CONTENT_SERVICE_COMPRESSION_MIN_BYTES.
+
+    Requests need nothing here: the server accepts whatever the client
+    compressed with.
+    """
+    if response.ByteSize() >= int(
+        os.getenv("CONTENT_SERVICE_COMPRESSION_MIN_BYTES", "8192")
+    ):
+        context.set_compression(
+            _COMPRESSION[os.getenv("CONTENT_SERVICE_COMPRESSION", "gzip")]
+        )
+    return response
+
+
+def open_result_cache() -> ResultCache | None:
+    max_entries = int(os.getenv("CONTENT_SERVICE_CACHE_SIZE", "256"))
+    if max_entries <= 0:
+        return None
+
+    redis_client = None
+    redis_url = os.getenv("CONTENT_SERVICE_REDIS_URL", "")
+    if redis_url:
+        try:
+            import redis
+
+            redis_client = redis.Redis.from_url(redis_url, socket_timeout=0.5)
+        except Exception as exc:
+            logger.warning("Result cache running without Redis: %s", exc)
+
+    return ResultCache(
+        max_entries=max_entries,
+        redis_client=redis_client,
+        ttl=int(os.getenv("CONTENT_SERVICE_CACHE_TTL", "86400")),
+    )
+
+
 class ContentService(content_service_pb2_grpc.ContentServiceServicer):
+    def __init__(
+        self,
+        idf_index: IdfIndex | None = None,
+        batch_executor: futures.Executor | None = None,
+        result_cache: ResultCache | None = None,
+        batch_pool: PoolMetrics | None = None,
+    ):
+        self.idf_index = idf_index
+        self.result_cache = result_cache
+        # Batch items are spread over this pool; the gRPC server's own pool
+        # only runs the RPC handlers.
+        workers = int(os.getenv("CONTENT_SERVICE_BATCH_WORKERS", "4"))
+        self.batch_executor = batch_executor or futures.ThreadPoolExecutor(
+            max_workers=workers
+        )
+        self.batch_pool = batch_pool or PoolMetrics("batch", workers)
+
+    def _process(self, request) -> content_service_pb2.ProcessTranscriptResponse:
+        max_sections = request.max_sections or 5
+        if self.result_cache is not None:
+            key = cache_key(request.transcript_text, max_sections)
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                return content_service_pb2.ProcessTranscriptResponse.FromString(cached)
+
+        result = process_transcript(
+            transcript_text=request.transcript_text,
+            max_sections=max_sections,
+            idf_index=self.idf_index,
+        )
+        response = _response_from_notes(result)
+        if self.result_cache is not None:
+            self.result_cache.set(key, response.SerializeToString())
+        return response
+
+    def _process_batch_item(
+        self, request
+    ) -> content_service_pb2.ProcessTranscriptResponse:
+        try:
+            return self._process(request)
+        except Exception as exc:
+            logger.warning(
+                "ProcessTranscriptBatch item failed title=%s error=%s",
+                request.title,
+                exc,
+            )
+            return _error_response(exc)
+
     def ProcessTranscript(self, request, context):
         logger.info(
             "ProcessTranscript called title=%s source=%s",
@@ -35,37 +185,63 @@ class ContentService(content_service_pb2_grpc.ContentServiceServicer):
         )
 
         try:
-            result = process_transcript(
-                transcript_text=request.transcript_text,
-                max_sections=request.max_sections or 5,
-            )
+            return _compress_if_large(context, self._process(request))
+        except Exception as exc:
+            logger.exception("ProcessTranscript failed: %s", exc)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(exc))
+            return _error_response(exc)
 
-            sections = []
-            for section in result.sections:
-                sections.append(
-                    content_service_pb2.NoteSection(
-                        heading=section["heading"],
-                        bullets=section["bullets"],
+    def ProcessTranscriptBatch(self, request, context):
+        logger.info("ProcessTranscriptBatch called items=%s", len(request.items))
+        pending = [
+            self.batch_pool.submit(self.batch_executor, self._process_batch_item, item)
+            for item in request.items
+        ]
+        return _compress_if_large(
+            context,
+            content_service_pb2.ProcessTranscriptBatchResponse(
+                results=[future.result() for future in pending]
+            ),
+        )
+
+    def ProcessTranscriptStream(self, request_iterator, context):
+        stream = None
+        sent = 0
+        try:
+            for chunk in request_iterator:
+                if stream is None:
+                    logger.info(
+                        "ProcessTranscriptStream called title=%s source=%s",
+                        chunk.title,
+                        chunk.source_url,
+                    )
+                    stream = StreamingProcessor(
+                        max_sections=chunk.max_sections or 5,
+                        idf_index=self.idf_index,
+                    )
+                for section in stream.feed(chunk.text):
+                    sent += 1
+                    yield content_service_pb2.ProcessTranscriptEvent(
+                        section=_note_section(section)
                     )
-                )
 
-            return content_service_pb2.ProcessTranscriptResponse(
-                summary=result.summary,
-                sections=sections,
-                chunk_count=result.chunk_count,
-                status="ok",
-                error_message="",
+            if stream is None:
+                raise ValueError("transcript_text is empty")
+            result = stream.finish()
+            for section in stream.sections[sent:]:
+                yield content_service_pb2.ProcessTranscriptEvent(
+                    section=_note_section(section)
+                )
+            yield content_service_pb2.ProcessTranscriptEvent(
+                result=_response_from_notes(result)
             )
         except Exception as exc:
-            logger.exception("ProcessTranscript failed: %s", exc)
+            logger.exception("ProcessTranscriptStream failed: %s", exc)
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(exc))
-            return content_service_pb2.ProcessTranscriptResponse(
-                summary="",
-                sections=[],
-                chunk_count=0,
-                status="error",
-                error_message=str(exc),
+            yield content_service_pb2.ProcessTranscriptEvent(
+                result=_error_response(exc)
             )
 
     def HealthCheck(self, request, context):
@@ -73,24 +249,315 @@ class ContentService(content_service_pb2_grpc.ContentServiceServicer):
             "HealthCheck called caller=%s",
             request.caller,
         )
+        stats = self.result_cache.stats() if self.result_cache is not None else {}
         return content_service_pb2.HealthCheckResponse(
             status="healthy",
             service="content-service",
+            cache_hits=stats.get("hits", 0),
+            cache_misses=stats.get("misses", 0),
         )
 
 
-def serve() -> None:
-    port = int(os.getenv("CONTENT_SERVICE_PORT", "50051"))
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+class AsyncContentService(ContentService):
+    """grpc.aio servicer.
+
+    Handlers run on the event loop and transcript processing is offloaded to
+    `executor`, with at most `max_processing` transcripts in flight. Health
+    checks and other cheap RPCs never queue behind heavy transcripts.
+    """
+
+    def __init__(
+        self,
+        idf_index: IdfIndex | None = None,
+        executor: futures.Executor | None = None,
+        max_processing: int | None = None,
+        result_cache: ResultCache | None = None,
+    ):
+        workers = int(os.getenv("CONTENT_SERVICE_CPU_WORKERS", "4"))
+        self.executor = executor or futures.ThreadPoolExecutor(max_workers=workers)
+        max_processing = max_processing or int(
+            os.getenv("CONTENT_SERVICE_MAX_PROCESSING", str(workers))
+        )
+        super().__init__(
+            idf_index=idf_index,
+            batch_executor=self.executor,
+            result_cache=result_cache,
+            batch_pool=PoolMetrics("processing", max_processing),
+        )
+        self._processing_slots = asyncio.Semaphore(max_processing)
+
+    async def _offload(self, fn, *args):
+        with self.batch_pool.waiting():
+            await self._processing_slots.acquire()
+        try:
+            with self.batch_pool.running():
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            self._processing_slots.release()
+
+    async def ProcessTranscript(self, request, context):
+        logger.info(
+            "ProcessTranscript called title=%s source=%s",
+            request.title,
+            request.source_url,
+        )
+
+        # In-process hits are answered on the loop, without a thread hop.
+        if self.result_cache is not None:
+            cached = self.result_cache.peek(
+                cache_key(request.transcript_text, request.max_sections or 5)
+            )
+            if cached is not None:
+                return _compress_if_large(
+                    context,
+                    content_service_pb2.ProcessTranscriptResponse.FromString(cached),
+                )
+
+        try:
+            return _compress_if_large(
+                context, await self._offload(self._process, request)
+            )
+        except Exception as exc:
+            logger.exception("ProcessTranscript failed: %s", exc)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(exc))
+            return _error_response(exc)
+
+    async def ProcessTranscriptBatch(self, request, context):
+        logger.info("ProcessTranscriptBatch called items=%s", len(request.items))
+        results = await asyncio.gather(
+            *(self._offload(self._process_batch_item, item) for item in request.items)
+        )
+        return _compress_if_large(
+            context, content_service_pb2.ProcessTranscriptBatchResponse(results=results)
+        )
+
+    async def ProcessTranscriptStream(self, request_iterator, context):
+        stream = None
+        sent = 0
+        try:
+            async for chunk in request_iterator:
+                if stream is None:
+                    logger.info(
+                        "ProcessTranscriptStream called title=%s source=%s",
+                        chunk.title,
+                        chunk.source_url,
+                    )
+                    stream = StreamingProcessor(
+                        max_sections=chunk.max_sections or 5,
+                        idf_index=self.idf_index,
+                    )
+                for section in await self._offload(stream.feed, chunk.text):
+                    sent += 1
+                    yield content_service_pb2.ProcessTranscriptEvent(
+                        section=_note_section(section)
+                    )
+
+            if stream is None:
+                raise ValueError("transcript_text is empty")
+            result = await self._offload(stream.finish)
+            for section in stream.sections[sent:]:
+                yield content_service_pb2.ProcessTranscriptEvent(
+                    section=_note_section(section)
+                )
+            yield content_service_pb2.ProcessTranscriptEvent(
+                result=_response_from_notes(result)
+            )
+        except Exception as exc:
+            logger.exception("ProcessTranscriptStream failed: %s", exc)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(exc))
+            yield content_service_pb2.ProcessTranscriptEvent(
+                result=_error_response(exc)
+            )
+
+    async def HealthCheck(self, request, context):
+        return super().HealthCheck(request, context)
+
+
+def _server_options() -> list[tuple[str, int]]:
+    return [
+        ("grpc.so_reuseport", 1),
+        # Clients keep pooled channels open and ping them every 30s; accept
+        # those pings instead of closing the connection as abusive.
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.min_recv_ping_interval_without_data_ms", 10000),
+        ("grpc.http2.max_ping_strikes", 0),
+        # Recycle connections so clients re-resolve DNS and spread onto
+        # replicas added since they connected; in-flight calls get a grace
+        # period to finish.
+        (
+            "grpc.max_connection_age_ms",
+            int(os.getenv("CONTENT_SERVICE_MAX_CONNECTION_AGE_MS", "300000")),
+        ),
+        ("grpc.max_connection_age_grace_ms", 120000),
+        # Multi-hour transcripts exceed gRPC's 4 MB default.
+        (
+            "grpc.max_receive_message_length",
+            int(os.getenv("CONTENT_SERVICE_MAX_RECEIVE_BYTES", str(32 * 1024 * 1024))),
+        ),
+        (
+            "grpc.max_send_message_length",
+            int(os.getenv("CONTENT_SERVICE_MAX_SEND_BYTES", str(16 * 1024 * 1024))),
+        ),
+    ]
+
+
+async def _run_aio_server(port: int) -> None:
+    # 0 leaves concurrent RPCs unbounded; beyond the limit new RPCs fail
+    # fast with RESOURCE_EXHAUSTED instead of queueing.
+    max_rpcs = int(os.getenv("CONTENT_SERVICE_MAX_CONCURRENT_RPCS", "0"))
+    server = grpc.aio.server(
+        options=_server_options(),
+        maximum_concurrent_rpcs=max_rpcs or None,
+        interceptors=[AsyncMetricsInterceptor()],
+    )
+    content_service_pb2_grpc.add_ContentServiceServicer_to_server(
+        AsyncContentService(
+            idf_index=open_idf_index(), result_cache=open_result_cache()
+        ),
+        server,
+    )
+    server.add_insecure_port(f"[::]:{port}")
+
+    logger.info("Starting async content-service on 0.0.0.0:%s", port)
+    await server.start()
+    await server.wait_for_termination()
+
+
+def _run_server(port: int, threads: int) -> None:
+    """Serve in this process until terminated.
+
+    With SO_REUSEPORT, every worker process binds the same port and the
+    kernel spreads incoming connections across them.
+    """
+    if os.getenv("CONTENT_SERVICE_ASYNC", "0") == "1":
+        asyncio.run(_run_aio_server(port))
+        return
+
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=threads),
+        options=_server_options(),
+        interceptors=[MetricsInterceptor(pool=PoolMetrics("handlers", threads))],
+    )
     content_service_pb2_grpc.add_ContentServiceServicer_to_server(
-        ContentService(), server
+        ContentService(idf_index=open_idf_index(), result_cache=open_result_cache()),
+        server,
     )
     server.add_insecure_port(f"[::]:{port}")
 
-    logger.info("Starting content-service on 0.0.0.0:%s", port)
+    logger.info("Starting content-service on 0.0.0.0:%s threads=%s", port, threads)
     server.start()
     server.wait_for_termination()
 
 
+def _run_worker(port: int, threads: int) -> None:
+    # Replacements are forked after the parent installed its handlers, which
+    # would have the worker act as a supervisor on SIGTERM.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    _run_server(port, threads)
+
+
+# A worker that dies sooner than this after starting is crash-looping;
+# respawning it again would only hide the problem.
+WORKER_MIN_UPTIME = 10.0
+
+
+class _Supervisor:
+    """Keeps `processes` server processes running.
+
+    A worker that dies is replaced (and its live gauges dropped from the
+    metrics aggregate). If one dies within WORKER_MIN_UPTIME of starting, the
+    others are stopped and `run` returns 1, so the container restarts and the
+    failure is visible instead of silently cutting capacity.
+    """
+
+    def __init__(self, start_worker: Callable[[], multiprocessing.Process]):
+        self._start_worker = start_worker
+        self._workers: dict[int, tuple[multiprocessing.Process, float]] = {}
+        self._stopping = False
+
+    def _spawn(self) -> None:
+        worker = self._start_worker()
+        self._workers[worker.sentinel] = (worker, time.monotonic())
+        if self._stopping:
+            # stop() ran while this worker was starting and missed it.
+            worker.terminate()
+
+    def stop(self) -> None:
+        self._stopping = True
+        for worker, _ in list(self._workers.values()):
+            worker.terminate()
+
+    def start(self, processes: int) -> None:
+        for _ in range(processes):
+            self._spawn()
+
+    def run(self) -> int:
+        """Supervise until every worker has stopped; returns the exit code."""
+        exit_code = 0
+        while self._workers:
+            for sentinel in wait(list(self._workers)):
+                worker, started = self._workers.pop(sentinel)
+                worker.join()
+                mark_process_dead(worker.pid)
+                if self._stopping:
+                    continue
+                uptime = time.monotonic() - started
+                if uptime < WORKER_MIN_UPTIME:
+                    logger.error(
+                        "Worker pid=%s exited with %s after %.1fs; stopping",
+                        worker.pid,
+                        worker.exitcode,
+                        uptime,
+                    )
+                    exit_code = 1
+                    self.stop()
+                    continue
+                logger.warning(
+                    "Worker pid=%s exited with %s; starting a replacement",
+                    worker.pid,
+                    worker.exitcode,
+                )
+                WORKER_RESTARTS.inc()
+                self._spawn()
+        return exit_code
+
+
+def serve() -> None:
+    port = int(os.getenv("CONTENT_SERVICE_PORT", "50051"))
+    threads = int(os.getenv("CONTENT_SERVICE_THREADS", "10"))
+    # Processing is CPU-bound and holds the GIL, so one process uses one
+    # core. 0 (the default) runs one server process per core.
+    processes = int(os.getenv("CONTENT_SERVICE_PROCESSES", "0")) or os.cpu_count() or 1
+
+    clear_multiprocess_dir()
+    if processes == 1:
+        start_metrics_server(processes)
+        _run_server(port, threads)
+        return
+
+    # Workers must be forked before any gRPC server exists in this process.
+    context = multiprocessing.get_context("fork")
+
+    def start_worker() -> multiprocessing.Process:
+        worker = context.Process(target=_run_worker, args=(port, threads))
+        worker.start()
+        return worker
+
+    supervisor = _Supervisor(start_worker)
+    supervisor.start(processes)
+    logger.info("Started %s content-service worker processes", processes)
+    # The parent serves the metrics of all workers. Replacement workers are
+    # forked after this, but never touch the metrics server's socket.
+    start_metrics_server(processes)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: supervisor.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: supervisor.stop())
+    sys.exit(supervisor.run())
+
+
 if __name__ == "__main__":
     serve()
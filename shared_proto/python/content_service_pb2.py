@@ -20,7 +20,7 @@ _sym_db = _symbol_database.Default()
 
 
 DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
-    b'\n\x15\x63ontent_service.proto\x12\ncontent.v1"$\n\x12HealthCheckRequest\x12\x0e\n\x06\x63\x61ller\x18\x01 \x01(\t"6\n\x13HealthCheckResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07service\x18\x02 \x01(\t"l\n\x18ProcessTranscriptRequest\x12\x17\n\x0ftranscript_text\x18\x01 \x01(\t\x12\x12\n\nsource_url\x18\x02 \x01(\t\x12\r\n\x05title\x18\x03 \x01(\t\x12\x14\n\x0cmax_sections\x18\x04 \x01(\x05"/\n\x0bNoteSection\x12\x0f\n\x07heading\x18\x01 \x01(\t\x12\x0f\n\x07\x62ullets\x18\x02 \x03(\t"\x93\x01\n\x19ProcessTranscriptResponse\x12\x0f\n\x07summary\x18\x01 \x01(\t\x12)\n\x08sections\x18\x02 \x03(\x0b\x32\x17.content.v1.NoteSection\x12\x13\n\x0b\x63hunk_count\x18\x03 \x01(\x05\x12\x0e\n\x06status\x18\x04 \x01(\t\x12\x15\n\rerror_message\x18\x05 \x01(\t2\xc2\x01\n\x0e\x43ontentService\x12`\n\x11ProcessTranscript\x12$.content.v1.ProcessTranscriptRequest\x1a%.content.v1.ProcessTranscriptResponse\x12N\n\x0bHealthCheck\x12\x1e.content.v1.HealthCheckRequest\x1a\x1f.content.v1.HealthCheckResponseb\x06proto3'
+    b'\n\x15\x63ontent_service.proto\x12\ncontent.v1"$\n\x12HealthCheckRequest\x12\x0e\n\x06\x63\x61ller\x18\x01 \x01(\t"`\n\x13HealthCheckResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07service\x18\x02 \x01(\t\x12\x12\n\ncache_hits\x18\x03 \x01(\x03\x12\x14\n\x0c\x63\x61\x63he_misses\x18\x04 \x01(\x03"l\n\x18ProcessTranscriptRequest\x12\x17\n\x0ftranscript_text\x18\x01 \x01(\t\x12\x12\n\nsource_url\x18\x02 \x01(\t\x12\r\n\x05title\x18\x03 \x01(\t\x12\x14\n\x0cmax_sections\x18\x04 \x01(\x05"/\n\x0bNoteSection\x12\x0f\n\x07heading\x18\x01 \x01(\t\x12\x0f\n\x07\x62ullets\x18\x02 \x03(\t"\x93\x01\n\x19ProcessTranscriptResponse\x12\x0f\n\x07summary\x18\x01 \x01(\t\x12)\n\x08sections\x18\x02 \x03(\x0b\x32\x17.content.v1.NoteSection\x12\x13\n\x0b\x63hunk_count\x18\x03 \x01(\x05\x12\x0e\n\x06status\x18\x04 \x01(\t\x12\x15\n\rerror_message\x18\x05 \x01(\t"X\n\x0fTranscriptChunk\x12\x0c\n\x04text\x18\x01 \x01(\t\x12\x12\n\nsource_url\x18\x02 \x01(\t\x12\r\n\x05title\x18\x03 \x01(\t\x12\x14\n\x0cmax_sections\x18\x04 \x01(\x05"\x86\x01\n\x16ProcessTranscriptEvent\x12*\n\x07section\x18\x01 \x01(\x0b\x32\x17.content.v1.NoteSectionH\x00\x12\x37\n\x06result\x18\x02 \x01(\x0b\x32%.content.v1.ProcessTranscriptResponseH\x00\x42\x07\n\x05\x65vent"T\n\x1dProcessTranscriptBatchRequest\x12\x33\n\x05items\x18\x01 \x03(\x0b\x32$.content.v1.ProcessTranscriptRequest"X\n\x1eProcessTranscriptBatchResponse\x12\x36\n\x07results\x18\x01 \x03(\x0b\x32%.content.v1.ProcessTranscriptResponse2\x93\x03\n\x0e\x43ontentService\x12`\n\x11ProcessTranscript\x12$.content.v1.ProcessTranscriptRequest\x1a%.content.v1.ProcessTranscriptResponse\x12^\n\x17ProcessTranscriptStream\x12\x1b.content.v1.TranscriptChunk\x1a".content.v1.ProcessTranscriptEvent(\x01\x30\x01\x12o\n\x16ProcessTranscriptBatch\x12).content.v1.ProcessTranscriptBatchRequest\x1a*.content.v1.ProcessTranscriptBatchResponse\x12N\n\x0bHealthCheck\x12\x1e.content.v1.HealthCheckRequest\x1a\x1f.content.v1.HealthCheckResponseb\x06proto3'
 )
 
 _globals = globals()
@@ -31,13 +31,21 @@ if not _descriptor._USE_C_DESCRIPTORS:
     _globals["_HEALTHCHECKREQUEST"]._serialized_start = 37
     _globals["_HEALTHCHECKREQUEST"]._serialized_end = 73
     _globals["_HEALTHCHECKRESPONSE"]._serialized_start = 75
-    _globals["_HEALTHCHECKRESPONSE"]._serialized_end = 129
-    _globals["_PROCESSTRANSCRIPTREQUEST"]._serialized_start = 131
-    _globals["_PROCESSTRANSCRIPTREQUEST"]._serialized_end = 239
-    _globals["_NOTESECTION"]._serialized_start = 241
-    _globals["_NOTESECTION"]._serialized_end = 288
-    _globals["_PROCESSTRANSCRIPTRESPONSE"]._serialized_start = 291
-    _globals["_PROCESSTRANSCRIPTRESPONSE"]._serialized_end = 438
-    _globals["_CONTENTSERVICE"]._serialized_start = 441
-    _globals["_CONTENTSERVICE"]._serialized_end = 635
+    _globals["_HEALTHCHECKRESPONSE"]._serialized_end = 171
+    _globals["_PROCESSTRANSCRIPTREQUEST"]._serialized_start = 173
+    _globals["_PROCESSTRANSCRIPTREQUEST"]._serialized_end = 281
+    _globals["_NOTESECTION"]._serialized_start = 283
+    _globals["_NOTESECTION"]._serialized_end = 330
+    _globals["_PROCESSTRANSCRIPTRESPONSE"]._serialized_start = 333
+    _globals["_PROCESSTRANSCRIPTRESPONSE"]._serialized_end = 480
+    _globals["_TRANSCRIPTCHUNK"]._serialized_start = 482
+    _globals["_TRANSCRIPTCHUNK"]._serialized_end = 570
+    _globals["_PROCESSTRANSCRIPTEVENT"]._serialized_start = 573
+    _globals["_PROCESSTRANSCRIPTEVENT"]._serialized_end = 707
+    _globals["_PROCESSTRANSCRIPTBATCHREQUEST"]._serialized_start = 709
+    _globals["_PROCESSTRANSCRIPTBATCHREQUEST"]._serialized_end = 793
+    _globals["_PROCESSTRANSCRIPTBATCHRESPONSE"]._serialized_start = 795
+    _globals["_PROCESSTRANSCRIPTBATCHRESPONSE"]._serialized_end = 883
+    _globals["_CONTENTSERVICE"]._serialized_start = 886
+    _globals["_CONTENTSERVICE"]._serialized_end = 1289
 # @@protoc_insertion_point(module_scope)
@@ -44,6 +44,18 @@ class ContentServiceStub(object):
             response_deserializer=content__service__pb2.ProcessTranscriptResponse.FromString,
             _registered_method=True,
         )
+        self.ProcessTranscriptStream = channel.stream_stream(
+            "/content.v1.ContentService/ProcessTranscriptStream",
+            request_serializer=content__service__pb2.TranscriptChunk.SerializeToString,
+            response_deserializer=content__service__pb2.ProcessTranscriptEvent.FromString,
+            _registered_method=True,
+        )
+        self.ProcessTranscriptBatch = channel.unary_unary(
+            "/content.v1.ContentService/ProcessTranscriptBatch",
+            request_serializer=content__service__pb2.ProcessTranscriptBatchRequest.SerializeToString,
+            response_deserializer=content__service__pb2.ProcessTranscriptBatchResponse.FromString,
+            _registered_method=True,
+        )
         self.HealthCheck = channel.unary_unary(
             "/content.v1.ContentService/HealthCheck",
             request_serializer=content__service__pb2.HealthCheckRequest.SerializeToString,
@@ -61,6 +73,23 @@ class ContentServiceServicer(object):
         context.set_details("Method not implemented!")
         raise NotImplementedError("Method not implemented!")
 
+    def ProcessTranscriptStream(self, request_iterator, context):
+        """For long transcripts: the client streams the text in chunks, the server
+        streams back each topic section as soon as it is final, then the complete
+        response.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
+    def ProcessTranscriptBatch(self, request, context):
+        """Many transcripts in one call. Results come back in request order, each
+        with its own status, so one bad item doesn't fail the batch.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
     def HealthCheck(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -75,6 +104,16 @@ def add_ContentServiceServicer_to_server(servicer, server):
             request_deserializer=content__service__pb2.ProcessTranscriptRequest.FromString,
             response_serializer=content__service__pb2.ProcessTranscriptResponse.SerializeToString,
         ),
+        "ProcessTranscriptStream": grpc.stream_stream_rpc_method_handler(
+            servicer.ProcessTranscriptStream,
+            request_deserializer=content__service__pb2.TranscriptChunk.FromString,
+            response_serializer=content__service__pb2.ProcessTranscriptEvent.SerializeToString,
+        ),
+        "ProcessTranscriptBatch": grpc.unary_unary_rpc_method_handler(
+            servicer.ProcessTranscriptBatch,
+            request_deserializer=content__service__pb2.ProcessTranscriptBatchRequest.FromString,
+            response_serializer=content__service__pb2.ProcessTranscriptBatchResponse.SerializeToString,
+        ),
         "HealthCheck": grpc.unary_unary_rpc_method_handler(
             servicer.HealthCheck,
             request_deserializer=content__service__pb2.HealthCheckRequest.FromString,
@@ -124,6 +163,66 @@ class ContentService(object):
             _registered_method=True,
         )
 
+    @staticmethod
+    def ProcessTranscriptStream(
+        request_iterator,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            "/content.v1.ContentService/ProcessTranscriptStream",
+            content__service__pb2.TranscriptChunk.SerializeToString,
+            content__service__pb2.ProcessTranscriptEvent.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True,
+        )
+
+    @staticmethod
+    def ProcessTranscriptBatch(
+        request,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            "/content.v1.ContentService/ProcessTranscriptBatch",
+            content__service__pb2.ProcessTranscriptBatchRequest.SerializeToString,
+            content__service__pb2.ProcessTranscriptBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True,
+        )
+
     @staticmethod
     def HealthCheck(
         request,
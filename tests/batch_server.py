@@ -0,0 +1,210 @@
+"""Local stand-in for the OpenAI Files + Batches API.
+
+Implements just the endpoints generation/batch.py uses, so the real OpenAI
+client code path can run against it in tests and local development:
+
+    POST /v1/files                  upload the JSONL input (multipart)
+    POST /v1/batches                create a batch (completed immediately)
+    GET  /v1/batches/<id>           batch status
+    GET  /v1/files/<id>/content     JSONL output
+
+Each request line is answered by `responder(body) -> str`; the default
+returns a short canned note so no real LLM is involved.
+
+Run standalone with:
+    python tests/batch_server.py --port 8089
+and set NOTES_BATCH_BASE_URL=http://127.0.0.1:8089/v1
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+
+def _default_responder(body: dict) -> str:
+    messages = body.get("messages") or [{}]
+    prompt = messages[-1].get("content", "")
+    transcript = prompt.rsplit("Here is the transcript:", 1)[-1].strip()
+    return f"TL;DR\n- (local batch) {transcript[:200]}"
+
+
+class LocalBatchServer:
+    """Threaded HTTP server speaking enough of the batch API for NoteTube."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        responder: Callable[[dict], str] = _default_responder,
+    ):
+        self.responder = responder
+        self.files: dict[str, bytes] = {}
+        self.batches: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "LocalBatchServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _store_file(self, content: bytes) -> str:
+        file_id = f"file-{uuid.uuid4().hex}"
+        with self._lock:
+            self.files[file_id] = content
+        return file_id
+
+    def _run_batch(self, input_file_id: str, endpoint: str) -> dict:
+        output_lines = []
+        for line in self.files[input_file_id].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            output_lines.append(
+                json.dumps(
+                    {
+                        "id": f"batch_req_{uuid.uuid4().hex}",
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "request_id": uuid.uuid4().hex,
+                            "body": {
+                                "object": "chat.completion",
+                                "model": request["body"].get("model"),
+                                "choices": [
+                                    {
+                                        "index": 0,
+                                        "message": {
+                                            "role": "assistant",
+                                            "content": self.responder(request["body"]),
+                                        },
+                                        "finish_reason": "stop",
+                                    }
+                                ],
+                            },
+                        },
+                        "error": None,
+                    }
+                )
+            )
+
+        now = int(time.time())
+        batch = {
+            "id": f"batch_{uuid.uuid4().hex}",
+            "object": "batch",
+            "endpoint": endpoint,
+            "input_file_id": input_file_id,
+            "completion_window": "24h",
+            "status": "completed",
+            "output_file_id": self._store_file("\n".join(output_lines).encode()),
+            "error_file_id": None,
+            "created_at": now,
+            "completed_at": now,
+            "request_counts": {
+                "total": len(output_lines),
+                "completed": len(output_lines),
+                "failed": 0,
+            },
+        }
+        with self._lock:
+            self.batches[batch["id"]] = batch
+        return batch
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, payload: dict, status: int = 200) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def do_POST(self):
+                if self.path == "/v1/files":
+                    # Parse the multipart upload with the stdlib email parser.
+                    head = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n"
+                    message = BytesParser(policy=HTTP).parsebytes(
+                        head.encode() + self._read_body()
+                    )
+                    content = b""
+                    for part in message.iter_parts():
+                        if part.get_param("name", header="content-disposition") == (
+                            "file"
+                        ):
+                            content = part.get_payload(decode=True) or b""
+                    file_id = server._store_file(content)
+                    return self._send_json(
+                        {
+                            "id": file_id,
+                            "object": "file",
+                            "bytes": len(content),
+                            "created_at": int(time.time()),
+                            "filename": "batch.jsonl",
+                            "purpose": "batch",
+                            "status": "processed",
+                        }
+                    )
+                if self.path == "/v1/batches":
+                    params = json.loads(self._read_body() or b"{}")
+                    if params.get("input_file_id") not in server.files:
+                        return self._send_json(
+                            {"error": {"message": "input file not found"}}, 404
+                        )
+                    return self._send_json(
+                        server._run_batch(params["input_file_id"], params["endpoint"])
+                    )
+                self._send_json({"error": {"message": "not found"}}, 404)
+
+            def do_GET(self):
+                parts = self.path.strip("/").split("/")
+                if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+                    batch = server.batches.get(parts[2])
+                    if batch:
+                        return self._send_json(batch)
+                if parts[:2] == ["v1", "files"] and parts[3:] == ["content"]:
+                    content = server.files.get(parts[2])
+                    if content is not None:
+                        self.send_response(200)
+                        self.send_header("Content-Type", "application/octet-stream")
+                        self.send_header("Content-Length", str(len(content)))
+                        self.end_headers()
+                        self.wfile.write(content)
+                        return
+                self._send_json({"error": {"message": "not found"}}, 404)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+    local = LocalBatchServer(args.host, args.port)
+    print(f"Local batch server on {local.base_url}")
+    local._httpd.serve_forever()
@@ -0,0 +1,114 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from note_generator.generation.batch import (
+    collect_finished_batches,
+    parse_output_line,
+    submit_queued_requests,
+)
+from note_generator.models import BatchGenerationRequest, NotePost
+
+from batch_server import LocalBatchServer
+
+
+class BatchGenerationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = LocalBatchServer(
+            responder=lambda body: "TL;DR\n- "
+            + body["messages"][-1]["content"].strip().splitlines()[-1]
+        ).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("bulk", password="pw")
+        self.settings_override = override_settings(
+            NOTES_BATCH_BASE_URL=self.server.base_url
+        )
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+
+    def _queue(self, transcript):
+        return BatchGenerationRequest.objects.create(
+            user=self.user,
+            youtube_title="Lecture",
+            youtube_link="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            transcript=transcript,
+        )
+
+    def test_nothing_queued_submits_nothing(self):
+        self.assertIsNone(submit_queued_requests())
+
+    def test_batch_round_trip_creates_notes(self):
+        first = self._queue("first lecture transcript")
+        second = self._queue("second lecture transcript")
+
+        batch_id = submit_queued_requests()
+        self.assertTrue(batch_id)
+        first.refresh_from_db()
+        self.assertEqual(first.status, BatchGenerationRequest.Status.SUBMITTED)
+
+        self.assertEqual(collect_finished_batches(), 1)
+
+        for item, transcript in ((first, "first"), (second, "second")):
+            item.refresh_from_db()
+            self.assertEqual(item.status, BatchGenerationRequest.Status.COMPLETED)
+            self.assertIn(transcript, item.note.generated_content)
+        self.assertEqual(NotePost.objects.filter(user=self.user).count(), 2)
+
+    def test_batch_output_is_served_from_the_cache_later(self):
+        from django.conf import settings
+
+        from note_generator.generation.cache import (
+            get_cached_generation,
+            store_generation,
+        )
+        from note_generator.generation.prompts import BATCH_PROMPT_VERSION
+        from note_generator.models import GenerationCache
+
+        transcript = "cached lecture transcript"
+        self._queue(transcript)
+        submit_queued_requests()
+        collect_finished_batches()
+
+        self.assertEqual(
+            list(GenerationCache.objects.values_list("prompt_version", flat=True)),
+            [BATCH_PROMPT_VERSION],
+        )
+        batch_notes = NotePost.objects.get().generated_content
+        model = settings.NOTES_LLM_MODEL
+        self.assertEqual(get_cached_generation(transcript, model), batch_notes)
+
+        # An interactive (map-reduce) generation takes precedence once stored.
+        store_generation(transcript, model, "TL;DR\n- interactive notes")
+        self.assertEqual(
+            get_cached_generation(transcript, model), "TL;DR\n- interactive notes"
+        )
+
+    def test_beat_task_collects_on_next_run(self):
+        from note_generator.tasks import process_generation_batches_task
+
+        item = self._queue("beat lecture transcript")
+        process_generation_batches_task.apply().get()  # submits
+        process_generation_batches_task.apply().get()  # collects
+
+        item.refresh_from_db()
+        self.assertEqual(item.status, BatchGenerationRequest.Status.COMPLETED)
+
+
+class ParseOutputLineTests(TestCase):
+    def test_error_line_reports_message(self):
+        line = (
+            '{"custom_id": "gen-3", "response": {"status_code": 429, "body": '
+            '{"error": {"message": "rate limited"}}}, "error": null}'
+        )
+        self.assertEqual(parse_output_line(line), ("gen-3", None, "rate limited"))
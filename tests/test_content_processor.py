@@ -0,0 +1,300 @@
+import os
+import sys
+import tempfile
+from unittest import TestCase
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "content-service", "app")
+)
+
+from idf_index import IdfIndex  # noqa: E402
+from processor import (  # noqa: E402
+    MAX_SENTENCE_WORDS,
+    StreamingProcessor,
+    _sentence_split,
+    _term_matrix,
+    chunk_spans,
+    chunk_text,
+    extract_key_terms,
+    process_transcript,
+    segment_boundaries,
+    textrank_scores,
+    tokenize,
+)
+
+LECTURE = (
+    "Gradient descent updates the weights using the gradient of the loss. "
+    "The learning rate controls how big each gradient descent step is. "
+    "My cat likes to sit on the keyboard. "
+    "A learning rate that is too large makes the loss diverge. "
+    "Gradient descent stops when the loss gradient is close to zero. "
+    "Anyway, lunch was good today."
+)
+
+
+class TokenizerTests(TestCase):
+    def test_sentences_are_offsets_into_the_original_text(self):
+        text = "  First one.\nSecond\tone here!  Third "
+
+        sentences = list(tokenize(text))
+
+        self.assertEqual(
+            [s.text for s in sentences],
+            ["First one.", "Second one here!", "Third"],
+        )
+        self.assertEqual([s.words for s in sentences], [2, 3, 1])
+        self.assertEqual(
+            text[sentences[1].start : sentences[1].end], "Second\tone here!"
+        )
+
+    def test_chunks_cross_sentence_boundaries(self):
+        text = "One two three. Four five.\nSix seven"
+
+        self.assertEqual(
+            [text[a:b] for a, b in chunk_spans(text, 3)],
+            ["One two three.", "Four five.\nSix", "seven"],
+        )
+        self.assertEqual(
+            list(chunk_text(text, 3)), ["One two three.", "Four five. Six", "seven"]
+        )
+
+    def test_blank_text_has_no_sentences_or_chunks(self):
+        self.assertEqual(list(tokenize(" \n ")), [])
+        self.assertEqual(list(chunk_text(" \n ")), [])
+
+
+class TextRankTests(TestCase):
+    def test_central_sentences_outrank_off_topic_ones(self):
+        sentences = _sentence_split(LECTURE)
+        scores = textrank_scores(sentences)
+
+        self.assertAlmostEqual(float(scores.sum()), 1.0, places=5)
+        off_topic = {2, 5}
+        for i in off_topic:
+            self.assertLess(scores[i], min(scores[j] for j in (0, 1, 4)))
+
+    def test_summary_keeps_transcript_order(self):
+        notes = process_transcript(LECTURE, max_sections=2)
+
+        self.assertNotIn("cat", notes.summary)
+        self.assertNotIn("lunch", notes.summary)
+        positions = [LECTURE.index(s) for s in notes.summary.split(". ") if s]
+        self.assertEqual(positions, sorted(positions))
+        # Too short to segment: one topic with the remaining sentences.
+        topic_bullets = notes.sections[2]["bullets"]
+        self.assertEqual(len(topic_bullets), 3)
+        for bullet in topic_bullets:
+            self.assertNotIn(bullet, notes.summary)
+
+    def test_unpunctuated_captions_are_split(self):
+        captions = " ".join(["word"] * 130)
+        self.assertEqual(
+            [len(s.split()) for s in _sentence_split(captions)], [25] * 5 + [5]
+        )
+
+    def test_empty_transcript_is_rejected(self):
+        with self.assertRaises(ValueError):
+            process_transcript("   ")
+
+
+def _topic_sentences(words, count):
+    return [
+        f"The {words[i % 3]} and the {words[(i + 1) % 3]} relate to {words[(i + 2) % 3]}."
+        for i in range(count)
+    ]
+
+
+class TopicSegmentationTests(TestCase):
+    def setUp(self):
+        self.transcript = " ".join(
+            _topic_sentences(["gradient", "descent", "slope"], 12)
+            + _topic_sentences(["neuron", "activation", "sigmoid"], 12)
+            + _topic_sentences(["matrix", "vector", "basis"], 12)
+        )
+
+    def test_one_section_per_topic_with_generated_heading(self):
+        notes = process_transcript(self.transcript, max_sections=5)
+
+        self.assertEqual(notes.sections[1]["heading"], "Key Terms")
+        topics = notes.sections[2:-1]
+        self.assertEqual(len(topics), 3)
+        self.assertEqual(
+            [set(t["heading"].lower().split(", ")) for t in topics],
+            [
+                {"gradient", "descent", "slope"},
+                {"neuron", "activation", "sigmoid"},
+                {"matrix", "vector", "basis"},
+            ],
+        )
+        self.assertIn("neuron", " ".join(topics[1]["bullets"]))
+        self.assertEqual(notes.sections[0]["heading"], "Summary")
+        self.assertEqual(notes.sections[-1]["heading"], "Chunk Stats")
+
+    def test_max_sections_caps_topic_count(self):
+        matrix, _ = _term_matrix(_sentence_split(self.transcript))
+        self.assertEqual(segment_boundaries(matrix, max_segments=5), [0, 12, 24])
+        self.assertEqual(len(segment_boundaries(matrix, max_segments=2)), 2)
+        self.assertEqual(segment_boundaries(matrix, max_segments=1), [0])
+
+
+class KeyTermTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "idf.bin")
+
+    def test_index_persists_and_updates_incrementally(self):
+        index = IdfIndex(self.path, bits=12)
+        index.add_document(["lecture", "gradient", "lecture"])
+        index.add_document(["lecture"])
+        index.flush()
+
+        reopened = IdfIndex(self.path)
+        self.assertEqual(reopened.bits, 12)
+        self.assertEqual(reopened.document_count, 2)
+        common, rare, unseen = reopened.idf(["lecture", "gradient", "unseen"])
+        self.assertLess(common, rare)
+        self.assertLess(rare, unseen)
+
+    def test_corpus_frequent_terms_rank_below_distinctive_ones(self):
+        sentences = [
+            "Welcome to the lecture about eigenvalues.",
+            "This lecture covers eigenvalues of a matrix.",
+            "The lecture ends with eigenvalues practice.",
+        ]
+        self.assertEqual(extract_key_terms(sentences, count=1)[0], ["lecture"])
+
+        index = IdfIndex(self.path, bits=12)
+        for _ in range(5):
+            index.add_document(["lecture", "welcome"])
+        self.assertEqual(
+            extract_key_terms(sentences, index, count=1)[0], ["eigenvalues"]
+        )
+
+    def test_recurring_phrase_replaces_its_words(self):
+        sentences = ["Gradient descent is simple.", "We run gradient descent again."]
+        self.assertEqual(
+            extract_key_terms(sentences, count=2)[0], ["gradient descent", "simple"]
+        )
+
+    def test_processing_adds_transcript_to_index(self):
+        index = IdfIndex(self.path, bits=12)
+        notes = process_transcript(LECTURE, idf_index=index)
+
+        self.assertEqual(index.document_count, 1)
+        self.assertEqual(notes.sections[1]["heading"], "Key Terms")
+        self.assertIn("gradient descent", notes.sections[1]["bullets"])
+
+    def test_each_transcript_is_counted_once(self):
+        index = IdfIndex(self.path, bits=12)
+        process_transcript(LECTURE, idf_index=index)
+        process_transcript(LECTURE, idf_index=index)
+        stream = StreamingProcessor(idf_index=index)
+        for i in range(0, len(LECTURE), 50):
+            stream.feed(LECTURE[i : i + 50])
+        stream.finish()
+        # Another process sharing the file sees the ids counted so far.
+        IdfIndex(self.path).add_document(["other"], document_id=b"other-id")
+
+        self.assertEqual(index.document_count, 2)
+        self.assertFalse(index.add_document(["other"], document_id=b"other-id"))
+        self.assertEqual(IdfIndex(self.path).document_count, 2)
+
+    def test_seen_ids_take_fixed_space(self):
+        from idf_index import SEEN_BITS
+
+        index = IdfIndex(self.path, bits=12)
+        for i in range(500):
+            self.assertTrue(index.add_document(["term"], document_id=b"doc%d" % i))
+
+        self.assertEqual(index.document_count, 500)
+        self.assertEqual(os.path.getsize(self.path + ".docs"), 1 << (SEEN_BITS - 3))
+
+    def test_processes_starting_together_share_one_index(self):
+        import multiprocessing
+
+        ctx = multiprocessing.get_context("fork")
+        barrier = ctx.Barrier(16)
+
+        def start(i):
+            barrier.wait()
+            IdfIndex(self.path, bits=12).add_document(["x"], document_id=bytes([i]))
+
+        workers = [ctx.Process(target=start, args=(i,)) for i in range(16)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(IdfIndex(self.path).document_count, 16)
+
+
+class StreamingProcessorTests(TestCase):
+    def setUp(self):
+        self.transcript = " ".join(
+            _topic_sentences(["gradient", "descent", "slope"], 12)
+            + _topic_sentences(["neuron", "activation", "sigmoid"], 12)
+            + _topic_sentences(["matrix", "vector", "basis"], 12)
+        )
+
+    def test_sections_are_emitted_before_the_end(self):
+        stream = StreamingProcessor(max_sections=5, window=20)
+        early = []
+        # Pieces split words and sentences at arbitrary points.
+        for i in range(0, len(self.transcript), 97):
+            early.extend(stream.feed(self.transcript[i : i + 97]))
+        notes = stream.finish()
+
+        self.assertTrue(early)
+        self.assertEqual(notes.sections[: len(early) + 2][2:], early)
+        headings = [s["heading"] for s in notes.sections]
+        self.assertEqual(headings[:2], ["Summary", "Key Terms"])
+        self.assertEqual(headings[-1], "Chunk Stats")
+        self.assertEqual(len(headings), 6)
+
+        whole = process_transcript(self.transcript)
+        self.assertEqual(notes.chunk_count, whole.chunk_count)
+        self.assertEqual(notes.sections[-1], whole.sections[-1])
+
+    def test_stream_respects_max_sections_overall(self):
+        topics = [
+            ["gradient", "descent", "slope"],
+            ["neuron", "activation", "sigmoid"],
+            ["matrix", "vector", "basis"],
+            ["probability", "softmax", "entropy"],
+        ]
+        transcript = " ".join(
+            sentence
+            for _ in range(3)
+            for words in topics
+            for sentence in _topic_sentences(words, 12)
+        )
+
+        uncapped = StreamingProcessor(max_sections=20, window=20)
+        stream = StreamingProcessor(max_sections=3, window=20)
+        for i in range(0, len(transcript), 300):
+            uncapped.feed(transcript[i : i + 300])
+            stream.feed(transcript[i : i + 300])
+            # Once the budget is spent, the last topic's buffer stays bounded.
+            self.assertLess(len(stream._pending), 3 * stream.window)
+        uncapped.finish()
+        stream.finish()
+
+        self.assertGreater(len(uncapped.sections), 3)
+        self.assertEqual(len(stream.sections), 3)
+
+    def test_unpunctuated_stream_keeps_bounded_buffer(self):
+        stream = StreamingProcessor(window=10)
+        for _ in range(50):
+            stream.feed("word " * 40)
+            self.assertLessEqual(len(stream._carry.split()), MAX_SENTENCE_WORDS)
+        notes = stream.finish()
+        self.assertEqual(
+            notes.sections[-1]["bullets"][0], "Total transcript words: 2000"
+        )
+
+    def test_empty_stream_is_rejected(self):
+        stream = StreamingProcessor()
+        stream.feed("   ")
+        with self.assertRaises(ValueError):
+            stream.finish()
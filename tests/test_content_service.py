@@ -0,0 +1,498 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent import futures
+from unittest.mock import Mock, patch
+
+import grpc
+from django.test import SimpleTestCase, override_settings
+from prometheus_client import REGISTRY
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "content-service", "app")
+)
+
+from metrics import (  # noqa: E402
+    AsyncMetricsInterceptor,
+    MetricsInterceptor,
+    PoolMetrics,
+)
+from processor import process_transcript  # noqa: E402
+from result_cache import ResultCache, cache_key  # noqa: E402
+from server import AsyncContentService, ContentService, _Supervisor  # noqa: E402
+from shared_proto.python import content_service_pb2  # noqa: E402
+from shared_proto.python import content_service_pb2_grpc  # noqa: E402
+
+from note_generator import grpc_client  # noqa: E402
+from note_generator.grpc_client import (  # noqa: E402
+    process_transcript_stream_via_grpc,
+    process_transcript_via_grpc,
+    health_check_via_grpc,
+    process_transcripts_batch_via_grpc,
+)
+
+
+def _topic_sentences(words, count):
+    return [
+        f"The {words[i % 3]} and the {words[(i + 1) % 3]} relate to {words[(i + 2) % 3]}."
+        for i in range(count)
+    ]
+
+
+TRANSCRIPT = " ".join(
+    _topic_sentences(["gradient", "descent", "slope"], 300)
+    + _topic_sentences(["neuron", "activation", "sigmoid"], 300)
+)
+
+
+class ContentServiceRPCTests(SimpleTestCase):
+    """Django's gRPC client against an in-process content-service."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.port = cls.start_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stop_server()
+        super().tearDownClass()
+
+    @classmethod
+    def start_server(cls) -> int:
+        cls.server = grpc.server(
+            futures.ThreadPoolExecutor(max_workers=4),
+            interceptors=[MetricsInterceptor()],
+        )
+        content_service_pb2_grpc.add_ContentServiceServicer_to_server(
+            ContentService(), cls.server
+        )
+        port = cls.server.add_insecure_port("127.0.0.1:0")
+        cls.server.start()
+        return port
+
+    @classmethod
+    def stop_server(cls):
+        cls.server.stop(None)
+
+    def settings(self, **kwargs):
+        return override_settings(
+            CONTENT_SERVICE_HOST="127.0.0.1",
+            CONTENT_SERVICE_PORT=self.port,
+            CONTENT_SERVICE_TIMEOUT=10,
+            **kwargs,
+        )
+
+    def test_stream_delivers_sections_before_the_result(self):
+        streamed = []
+        with self.settings(CONTENT_SERVICE_STREAM_CHUNK_CHARS=4096):
+            sections = process_transcript_stream_via_grpc(
+                TRANSCRIPT, on_section=lambda heading, bullets: streamed.append(heading)
+            )
+
+        headings = [s["heading"] for s in sections]
+        self.assertEqual(headings[:3], ["TL;DR", "Summary", "Key Terms"])
+        self.assertEqual(headings[-1], "Chunk Stats")
+        self.assertTrue(streamed)
+        self.assertEqual(headings[3 : 3 + len(streamed)], streamed)
+
+    def test_long_transcripts_take_the_streaming_path(self):
+        with self.settings(CONTENT_SERVICE_STREAM_THRESHOLD_CHARS=1000):
+            streamed = process_transcript_via_grpc(TRANSCRIPT)
+        with self.settings():
+            unary = process_transcript_via_grpc(TRANSCRIPT)
+
+        self.assertEqual(streamed[-1], unary[-1])
+
+    def test_stream_errors_surface_as_runtime_error(self):
+        with self.settings(), self.assertRaises(RuntimeError) as raised:
+            process_transcript_stream_via_grpc("   ")
+        # The service's own message, not re-wrapped as a connection failure.
+        self.assertEqual(str(raised.exception), "transcript_text is empty")
+
+    def test_long_transcripts_report_sections_to_the_caller(self):
+        streamed = []
+        with self.settings(CONTENT_SERVICE_STREAM_THRESHOLD_CHARS=1000):
+            process_transcript_via_grpc(
+                TRANSCRIPT, on_section=lambda heading, bullets: streamed.append(heading)
+            )
+        self.assertTrue(streamed)
+
+    def test_compressed_requests_and_responses_round_trip(self):
+        with self.settings(CONTENT_SERVICE_COMPRESSION_MIN_BYTES=0), patch.dict(
+            os.environ, {"CONTENT_SERVICE_COMPRESSION_MIN_BYTES": "0"}
+        ):
+            sections = process_transcript_via_grpc(TRANSCRIPT[:5000])
+            batch = process_transcripts_batch_via_grpc(
+                [{"transcript_text": TRANSCRIPT[:5000]}]
+            )
+
+        self.assertEqual(batch[0]["sections"], sections)
+
+    def test_client_receive_limit_is_enforced(self):
+        with self.settings(CONTENT_SERVICE_MAX_RECEIVE_BYTES=64):
+            with self.assertRaises(RuntimeError):
+                process_transcript_via_grpc(TRANSCRIPT[:5000])
+
+    def test_batch_returns_results_in_order_with_item_errors(self):
+        items = [
+            {"transcript_text": TRANSCRIPT, "title": "one"},
+            {"transcript_text": "   ", "title": "empty"},
+            {"transcript_text": "Short talk about gradients.", "title": "three"},
+        ]
+        with self.settings():
+            results = process_transcripts_batch_via_grpc(items, batch_size=2)
+
+        self.assertEqual([bool(r["sections"]) for r in results], [True, False, True])
+        self.assertEqual(results[1]["error"], "transcript_text is empty")
+        self.assertEqual(results[0]["error"], "")
+        self.assertEqual(
+            results[2]["sections"][0]["items"][0]["text"], "Short talk about gradients."
+        )
+
+    def test_interceptor_records_rpc_metrics(self):
+        def sample(name, **labels):
+            labels.setdefault("method", "ProcessTranscript")
+            return REGISTRY.get_sample_value(name, labels) or 0
+
+        names = [
+            "content_service_rpc_duration_seconds_count",
+            "content_service_request_message_bytes_sum",
+            "content_service_response_message_bytes_count",
+        ]
+        before = [sample(name) for name in names]
+        errors = sample("content_service_rpc_errors_total", code="INTERNAL")
+
+        with self.settings():
+            process_transcript_via_grpc("Short talk about gradients.")
+            with self.assertRaises(RuntimeError):
+                process_transcript_via_grpc("   ")
+
+        after = [sample(name) for name in names]
+        self.assertEqual(after[0] - before[0], 2)
+        self.assertGreater(after[1] - before[1], len("Short talk about gradients."))
+        # The aio server does not serialize the response of a failed call.
+        self.assertIn(after[2] - before[2], (1, 2))
+        self.assertEqual(
+            sample("content_service_rpc_errors_total", code="INTERNAL") - errors, 1
+        )
+        self.assertEqual(sample("content_service_rpc_in_flight"), 0)
+
+    def test_failed_batch_call_marks_every_item(self):
+        with override_settings(
+            CONTENT_SERVICE_HOST="127.0.0.1",
+            CONTENT_SERVICE_PORT=1,
+            CONTENT_SERVICE_BATCH_TIMEOUT=0.5,
+        ):
+            results = process_transcripts_batch_via_grpc(
+                [{"transcript_text": "a."}, {"transcript_text": "b."}]
+            )
+
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(r["error"] and not r["sections"] for r in results))
+
+
+class AsyncContentServiceRPCTests(ContentServiceRPCTests):
+    """The same client calls against the grpc.aio servicer."""
+
+    @classmethod
+    def start_server(cls) -> int:
+        cls.loop = asyncio.new_event_loop()
+        threading.Thread(target=cls.loop.run_forever, daemon=True).start()
+        cls.servicer = AsyncContentService(max_processing=1)
+
+        async def start():
+            server = grpc.aio.server(interceptors=[AsyncMetricsInterceptor()])
+            content_service_pb2_grpc.add_ContentServiceServicer_to_server(
+                cls.servicer, server
+            )
+            port = server.add_insecure_port("127.0.0.1:0")
+            await server.start()
+            return server, port
+
+        cls.server, port = cls._run(start())
+        return port
+
+    @classmethod
+    def stop_server(cls):
+        cls._run(cls.server.stop(None))
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.servicer.executor.shutdown()
+
+    @classmethod
+    def _run(cls, coro):
+        return asyncio.run_coroutine_threadsafe(coro, cls.loop).result(timeout=10)
+
+    def test_health_check_answers_while_transcripts_are_processing(self):
+        def slow_process(request):
+            time.sleep(1.5)
+            return ContentService._process(self.servicer, request)
+
+        with self.settings(), patch.object(self.servicer, "_process", slow_process):
+            busy = threading.Thread(
+                target=process_transcript_via_grpc, args=("Gradients matter.",)
+            )
+            busy.start()
+            time.sleep(0.2)
+
+            start = time.perf_counter()
+            self.assertEqual(health_check_via_grpc(), ("healthy", "content-service"))
+            self.assertLess(time.perf_counter() - start, 0.5)
+            busy.join()
+
+
+class ChannelPoolTests(SimpleTestCase):
+    def setUp(self):
+        grpc_client.close_channels()
+        self.addCleanup(grpc_client.close_channels)
+
+    @override_settings(CONTENT_SERVICE_HOST="127.0.0.1", CONTENT_SERVICE_CHANNELS=2)
+    def test_channels_are_reused_round_robin(self):
+        stubs = [grpc_client.get_stub() for _ in range(4)]
+
+        self.assertIsNot(stubs[0], stubs[1])
+        self.assertEqual(stubs[:2], stubs[2:])
+
+    @override_settings(CONTENT_SERVICE_HOST="127.0.0.1")
+    def test_forked_child_builds_its_own_channel(self):
+        parent_stub = grpc_client.get_stub()
+        parent_pool = grpc_client._pool
+
+        with patch(
+            "note_generator.grpc_client.os.getpid", return_value=-1
+        ), patch.object(parent_pool, "close") as close_parent:
+            child_stub = grpc_client.get_stub()
+
+        self.assertIsNot(child_stub, parent_stub)
+        # The child leaves the parent's channels alone.
+        close_parent.assert_not_called()
+
+    def test_changing_target_rebuilds_the_pool(self):
+        with override_settings(
+            CONTENT_SERVICE_HOST="127.0.0.1", CONTENT_SERVICE_PORT=1
+        ):
+            first = grpc_client.get_stub()
+        with override_settings(
+            CONTENT_SERVICE_HOST="127.0.0.1", CONTENT_SERVICE_PORT=2
+        ):
+            self.assertIsNot(grpc_client.get_stub(), first)
+
+
+class FlakyContentService(ContentService):
+    """Counts calls; fails the first `unavailable` ProcessTranscript calls."""
+
+    def __init__(self, unavailable=0):
+        super().__init__()
+        self.calls = 0
+        self.unavailable = unavailable
+
+    def ProcessTranscript(self, request, context):
+        self.calls += 1
+        if self.calls <= self.unavailable:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "warming up")
+        return super().ProcessTranscript(request, context)
+
+
+class ServiceConfigTests(SimpleTestCase):
+    def setUp(self):
+        grpc_client.close_channels()
+        self.addCleanup(grpc_client.close_channels)
+
+    def start(self, servicer) -> int:
+        server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+        content_service_pb2_grpc.add_ContentServiceServicer_to_server(servicer, server)
+        port = server.add_insecure_port("127.0.0.1:0")
+        server.start()
+        self.addCleanup(server.stop, None)
+        return port
+
+    def test_calls_are_spread_round_robin_over_replicas(self):
+        replicas = [FlakyContentService(), FlakyContentService()]
+        addresses = ",".join(f"127.0.0.1:{self.start(r)}" for r in replicas)
+
+        # What DNS would return for a name with two replicas behind it.
+        with patch(
+            "note_generator.grpc_client._target", return_value=f"ipv4:{addresses}"
+        ):
+            for _ in range(6):
+                process_transcript_via_grpc("Gradients point uphill.")
+
+        # Until both connections are up the first ready replica takes calls.
+        self.assertEqual(sum(r.calls for r in replicas), 6)
+        self.assertGreaterEqual(min(r.calls for r in replicas), 2)
+
+    @override_settings(CONTENT_SERVICE_HOST="127.0.0.1", CONTENT_SERVICE_RETRIES=2)
+    def test_unavailable_is_retried_by_the_channel(self):
+        replica = FlakyContentService(unavailable=2)
+        with override_settings(CONTENT_SERVICE_PORT=self.start(replica)):
+            sections = process_transcript_via_grpc("Gradients point uphill.")
+
+        self.assertEqual(replica.calls, 3)
+        self.assertEqual(sections[0]["heading"], "TL;DR")
+
+    @override_settings(CONTENT_SERVICE_HOST="127.0.0.1", CONTENT_SERVICE_RETRIES=2)
+    def test_processing_errors_are_not_retried(self):
+        replica = FlakyContentService()
+        with override_settings(CONTENT_SERVICE_PORT=self.start(replica)):
+            with self.assertRaises(RuntimeError):
+                process_transcript_via_grpc("   ")
+
+        self.assertEqual(replica.calls, 1)
+
+
+@override_settings(
+    CONTENT_SERVICE_COMPRESSION="gzip", CONTENT_SERVICE_COMPRESSION_MIN_BYTES=1000
+)
+@patch("note_generator.grpc_client.get_stub")
+class CompressionThresholdTests(SimpleTestCase):
+    def test_only_requests_over_the_threshold_are_compressed(self, mock_get_stub):
+        call = mock_get_stub.return_value.ProcessTranscript
+        call.return_value = content_service_pb2.ProcessTranscriptResponse(
+            status="ok", summary="s"
+        )
+
+        process_transcript_via_grpc("short transcript.")
+        process_transcript_via_grpc("long transcript. " * 100)
+
+        self.assertEqual(
+            [c.kwargs["compression"] for c in call.call_args_list],
+            [grpc.Compression.NoCompression, grpc.Compression.Gzip],
+        )
+
+
+class ResultCacheTests(SimpleTestCase):
+    def test_lru_evicts_least_recently_used(self):
+        cache = ResultCache(max_entries=2)
+        cache.set("a", b"1")
+        cache.set("b", b"2")
+        cache.get("a")
+        cache.set("c", b"3")
+
+        self.assertEqual(cache.get("a"), b"1")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 1, "entries": 2})
+
+    def test_key_covers_text_and_max_sections(self):
+        self.assertEqual(cache_key("text.", 5), cache_key("text.", 5))
+        self.assertNotEqual(cache_key("text.", 5), cache_key("text.", 3))
+        self.assertNotEqual(cache_key("text.", 5), cache_key("text!", 5))
+
+    def test_local_misses_fall_back_to_redis(self):
+        redis_client = Mock()
+        redis_client.get.return_value = b"shared"
+        cache = ResultCache(redis_client=redis_client, ttl=60)
+
+        self.assertEqual(cache.get("k"), b"shared")
+        self.assertEqual(cache.get("k"), b"shared")
+        redis_client.get.assert_called_once_with("k")
+
+        cache.set("other", b"v")
+        redis_client.set.assert_called_once_with("other", b"v", ex=60)
+
+    def test_redis_errors_count_as_misses(self):
+        redis_client = Mock()
+        redis_client.get.side_effect = ConnectionError("down")
+        cache = ResultCache(redis_client=redis_client)
+
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    @patch("server.process_transcript", wraps=process_transcript)
+    def test_repeat_requests_are_served_from_cache(self, mock_process):
+        service = ContentService(result_cache=ResultCache())
+        request = content_service_pb2.ProcessTranscriptRequest(
+            transcript_text=TRANSCRIPT, max_sections=4
+        )
+
+        first = service._process(request)
+        second = service._process(request)
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_process.call_count, 1)
+        health = service.HealthCheck(content_service_pb2.HealthCheckRequest(), None)
+        self.assertEqual((health.cache_hits, health.cache_misses), (1, 1))
+
+
+class PoolMetricsTests(SimpleTestCase):
+    def test_tasks_count_as_queued_then_busy(self):
+        def gauge(name):
+            return REGISTRY.get_sample_value(
+                f"content_service_worker_pool_{name}", {"pool": "test"}
+            )
+
+        pool = PoolMetrics("test", 1)
+        release = threading.Event()
+        observed = []
+        with futures.ThreadPoolExecutor(max_workers=1) as executor:
+            first = pool.submit(executor, release.wait)
+            second = pool.submit(executor, lambda: observed.append(gauge("busy")))
+            while gauge("busy") != 1:
+                time.sleep(0.01)
+            self.assertEqual((gauge("size"), gauge("queued")), (1, 1))
+            release.set()
+            first.result()
+            second.result()
+
+        self.assertEqual(observed, [1])
+        self.assertEqual((gauge("busy"), gauge("queued")), (0, 0))
+
+
+class SupervisorTests(SimpleTestCase):
+    def setUp(self):
+        import multiprocessing
+        import tempfile
+
+        self.context = multiprocessing.get_context("fork")
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.marker = os.path.join(tmp.name, "crashed")
+        self.started = []
+
+    def _starter(self, target):
+        def start_worker():
+            worker = self.context.Process(target=target)
+            worker.start()
+            self.started.append(worker)
+            return worker
+
+        return start_worker
+
+    def _crash_once(self):
+        try:
+            os.close(os.open(self.marker, os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            time.sleep(60)
+        else:
+            os._exit(3)
+
+    @patch("server.WORKER_MIN_UPTIME", 0)
+    def test_dead_worker_is_replaced(self):
+        def restarts():
+            return REGISTRY.get_sample_value("content_service_worker_restarts_total")
+
+        before = restarts()
+        supervisor = _Supervisor(self._starter(self._crash_once))
+        supervisor.start(2)
+        result = []
+        runner = threading.Thread(target=lambda: result.append(supervisor.run()))
+        runner.start()
+
+        deadline = time.monotonic() + 10
+        while len(self.started) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        supervisor.stop()
+        runner.join(10)
+
+        self.assertEqual(len(self.started), 3)
+        self.assertEqual(restarts() - before, 1)
+        self.assertEqual(result, [0])
+        self.assertFalse(any(worker.is_alive() for worker in self.started))
+
+    def test_crash_loop_stops_the_service(self):
+        supervisor = _Supervisor(self._starter(lambda: os._exit(1)))
+        supervisor.start(2)
+
+        self.assertEqual(supervisor.run(), 1)
+        self.assertEqual(len(self.started), 2)
@@ -0,0 +1,592 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import tiktoken
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from note_generator.generation.mapreduce import map_reduce_notes
+from note_generator.generation.stream import NoteStreamPublisher, iter_stream_events
+from note_generator.generation.tokens import split_by_tokens
+
+# What the content-service client returns for a one-bullet outline.
+OUTLINE_SECTIONS = [
+    {"heading": "TL;DR", "items": [{"kind": "bullet", "text": "outline", "level": 0}]}
+]
+
+
+class SplitByTokensTests(TestCase):
+    def test_empty_text_has_no_chunks(self):
+        self.assertEqual(split_by_tokens("", 100), [])
+
+    @patch("note_generator.generation.tokens._get_encoding", return_value=None)
+    def test_chunks_respect_budget_and_keep_words(self, _encoding):
+        # Without tiktoken each short word is estimated at one token.
+        text = " ".join(f"w{i}" for i in range(25))
+        chunks = split_by_tokens(text, 10)
+        self.assertEqual([len(c.split()) for c in chunks], [10, 10, 5])
+        self.assertEqual(" ".join(chunks), text)
+
+    def test_text_is_encoded_once(self):
+        # A byte-level encoding: one token per byte, including spaces.
+        encoding = tiktoken.Encoding(
+            "bytes",
+            pat_str=r"\S+|\s+",
+            mergeable_ranks={bytes([i]): i for i in range(256)},
+            special_tokens={},
+        )
+        text = "  ".join(["aaaa"] * 10)
+        with patch(
+            "note_generator.generation.tokens._get_encoding", return_value=encoding
+        ), patch.object(encoding, "encode", wraps=encoding.encode) as encode:
+            chunks = split_by_tokens(text, 14)
+
+        encode.assert_called_once()
+        # 4 tokens for the first word, then 6 per word with its leading gap.
+        self.assertEqual([len(c.split()) for c in chunks], [2, 2, 2, 2, 2])
+        self.assertEqual(" ".join(chunks), " ".join(["aaaa"] * 10))
+
+
+class MapReduceNotesTests(TestCase):
+    def test_reduce_sees_chunk_notes_in_order(self):
+        prompts = []
+
+        def fake_complete(prompt, max_tokens, on_token=None):
+            prompts.append(prompt)
+            if "condensed notes" in prompt:
+                return "TL;DR\n- final"
+            return f"- notes for {prompt.split('part ')[1].split(' ')[0]}"
+
+        with patch(
+            "note_generator.generation.mapreduce.split_by_tokens",
+            return_value=["one", "two", "three"],
+        ):
+            result = map_reduce_notes(
+                "ignored",
+                fake_complete,
+                chunk_tokens=10,
+                max_workers=3,
+                map_max_tokens=50,
+                reduce_max_tokens=100,
+            )
+
+        self.assertEqual(result, "TL;DR\n- final")
+        self.assertEqual(len(prompts), 4)
+        reduce_prompt = prompts[-1]
+        self.assertLess(reduce_prompt.index("PART 1"), reduce_prompt.index("PART 2"))
+        self.assertLess(reduce_prompt.index("PART 2"), reduce_prompt.index("PART 3"))
+
+    @override_settings(NOTES_MAPREDUCE_THRESHOLD_TOKENS=5)
+    @patch("note_generator.views.map_reduce_notes", return_value="reduced")
+    @patch("note_generator.views._complete", return_value="single")
+    def test_long_transcript_switches_to_map_reduce(self, _complete, mock_mr):
+        from note_generator.views import generate_blog_from_transcription
+
+        self.assertEqual(generate_blog_from_transcription("short"), "single")
+        self.assertEqual(
+            generate_blog_from_transcription("a much longer transcript " * 20),
+            "reduced",
+        )
+        mock_mr.assert_called_once()
+
+
+class _FakeRedis:
+    """Just enough of redis-py for the stream publisher and relay."""
+
+    def __init__(self):
+        self.lists = {}
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+
+    def expire(self, key, ttl):
+        pass
+
+    def publish(self, channel, message):
+        pass
+
+    def execute(self):
+        pass
+
+    def lrange(self, key, start, end):
+        return self.lists.get(key, [])[start:]
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        return MagicMock()
+
+
+class NoteStreamTests(TestCase):
+    def test_publisher_is_noop_without_redis(self):
+        stream = NoteStreamPublisher("task-1")
+        self.assertFalse(stream.enabled)
+        stream.token("ignored")  # must not raise
+
+    def test_relay_replays_events_until_done(self):
+        fake = _FakeRedis()
+        with patch("note_generator.generation.stream.get_redis", return_value=fake):
+            stream = NoteStreamPublisher("task-1")
+            stream.token("Hello")
+            stream.token(" world")
+            stream.done(7)
+            events = list(iter_stream_events("task-1", timeout=5))
+
+        self.assertEqual(
+            events,
+            [
+                {"type": "token", "text": "Hello"},
+                {"type": "token", "text": " world"},
+                {"type": "done", "note_id": 7},
+            ],
+        )
+
+    def test_extractive_outline_reports_sections(self):
+        from note_generator.tasks import _run_engine
+
+        def process(transcript_text, source_url, title, on_section):
+            on_section("Gradient descent", ["Steps downhill"])
+            return [{"heading": "Gradient descent", "items": []}]
+
+        fake = _FakeRedis()
+        with patch(
+            "note_generator.generation.stream.get_redis", return_value=fake
+        ), patch("note_generator.grpc_client.process_transcript_via_grpc", process):
+            stream = NoteStreamPublisher("task-1")
+            _run_engine("extractive", "transcript", "", "Title", stream)
+            stream.done(1)
+            events = list(iter_stream_events("task-1", timeout=5))
+
+        self.assertEqual(events[0], {"type": "section", "heading": "Gradient descent"})
+
+    def test_stream_endpoint_unavailable_without_redis(self):
+        from django.contrib.auth.models import User
+
+        user = User.objects.create_user("streamer", password="pw")
+        self.client.force_login(user)
+        response = self.client.get("/api/task-stream/abc/")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["error_code"], "stream_unavailable")
+
+    @patch("note_generator.llm_client.get_client")
+    def test_streaming_completion_forwards_each_delta(self, mock_get_client):
+        from note_generator.views import _complete
+
+        mock_create = mock_get_client.return_value.chat.completions.create
+        mock_create.return_value = [
+            SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=t))],
+                usage=None,
+            )
+            for t in ["TL;DR", "\n- ", "point"]
+        ]
+        seen = []
+        result = _complete("prompt", 100, on_token=seen.append)
+
+        self.assertEqual(seen, ["TL;DR", "\n- ", "point"])
+        self.assertEqual(result, "TL;DR\n- point")
+        self.assertTrue(mock_create.call_args.kwargs["stream"])
+
+
+class GenerationCacheTests(TestCase):
+    def setUp(self):
+        # Transcripts are cached per video id; start from a clean slate.
+        cache.clear()
+
+    def test_round_trip_is_keyed_on_model(self):
+        from note_generator.generation.cache import (
+            get_cached_generation,
+            store_generation,
+        )
+
+        store_generation("same transcript", "model-a", "notes A")
+        self.assertEqual(get_cached_generation("same transcript", "model-a"), "notes A")
+        self.assertIsNone(get_cached_generation("same transcript", "model-b"))
+        self.assertIsNone(get_cached_generation("other transcript", "model-a"))
+
+    @patch("note_generator.grpc_client.process_transcript_via_grpc")
+    @patch("note_generator.views.generate_blog_from_transcription")
+    @patch("note_generator.views.get_transcript", return_value="popular transcript")
+    @patch("note_generator.views.yt_title", return_value="Popular Video")
+    def test_second_user_reuses_cached_note(
+        self, _title, _transcript, mock_generate, mock_grpc
+    ):
+        from django.conf import settings
+        from django.contrib.auth.models import User
+
+        from note_generator.generation.cache import store_generation
+        from note_generator.models import NotePost
+        from note_generator.tasks import generate_note_task
+
+        store_generation("popular transcript", settings.NOTES_LLM_MODEL, "cached notes")
+        user = User.objects.create_user("second", password="pw")
+
+        result = generate_note_task.apply(
+            args=(user.id, "https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        ).get()
+
+        self.assertIsNone(result["error"])
+        note = NotePost.objects.get(pk=result["note_id"])
+        self.assertEqual(note.generated_content, "cached notes")
+        mock_grpc.assert_not_called()
+        mock_generate.assert_not_called()
+
+
+class NormalizeTranscriptTests(TestCase):
+    def test_rolling_caption_repeats_collapsed(self):
+        from note_generator.generation.normalize import clean_caption_text
+
+        text = "so today we're\nso today we're going to talk about loss loss functions"
+        self.assertEqual(
+            clean_caption_text(text),
+            "so today we're going to talk about loss loss functions",
+        )
+
+    def test_deliberate_repetition_is_kept(self):
+        from note_generator.generation.normalize import (
+            clean_caption_text,
+            join_caption_lines,
+        )
+
+        text = join_caption_lines(
+            [
+                "thank you, thank you all for coming",
+                "step one, add the salt, step one, add the salt",
+                "no no no that's wrong",
+            ]
+        )
+        self.assertEqual(clean_caption_text(text), " ".join(text.splitlines()))
+
+    def test_markers_filler_and_whitespace_removed(self):
+        from note_generator.generation.normalize import clean_caption_text
+
+        text = (
+            "[Music]  um, the   gradient (laughs) uh\n points &#39;downhill&#39; >> yes"
+        )
+        self.assertEqual(clean_caption_text(text), "the gradient points 'downhill' yes")
+
+    def test_spoken_parentheses_kept(self):
+        from note_generator.generation.normalize import clean_caption_text
+
+        text = "the bias (the offset) matters"
+        self.assertEqual(clean_caption_text(text), text)
+
+    def test_fillers_that_can_be_words_kept(self):
+        from note_generator.generation.normalize import clean_caption_text
+
+        text = "uh the patient went to the ER with a 5 mm cut"
+        self.assertEqual(
+            clean_caption_text(text), "the patient went to the ER with a 5 mm cut"
+        )
+
+    def test_reports_tokens_removed(self):
+        from note_generator.generation.normalize import normalize_transcript
+
+        result = normalize_transcript("[Music] [Music] [Music] hello there")
+        self.assertEqual(result.text, "hello there")
+        self.assertGreater(result.tokens_removed, 0)
+
+
+class SalienceSelectionTests(TestCase):
+    def test_fitting_text_returned_unchanged(self):
+        from note_generator.generation.select import fit_to_token_budget
+
+        text = "Short transcript. Nothing to trim."
+        self.assertEqual(fit_to_token_budget(text, 1000), text)
+
+    def test_keeps_on_topic_sentences_in_original_order(self):
+        from note_generator.generation.select import fit_to_token_budget
+
+        text = (
+            "Gradient descent updates the weights using the loss gradient. "
+            "Please like and subscribe to the channel. "
+            "The learning rate scales each gradient descent step on the loss. "
+            "My cat knocked a mug off the desk yesterday. "
+            "A smaller learning rate makes gradient descent on the loss slower."
+        )
+        result = fit_to_token_budget(text, 50)
+
+        self.assertNotIn("subscribe", result)
+        self.assertNotIn("cat", result)
+        self.assertLess(
+            result.index("updates the weights"), result.index("scales each")
+        )
+
+    def test_unpunctuated_captions_are_windowed(self):
+        from note_generator.generation.select import split_sentences
+
+        sentences = split_sentences(" ".join(["word"] * 100))
+        self.assertEqual([len(s.split()) for s in sentences], [25, 25, 25, 25])
+
+
+@override_settings(
+    NOTES_ROUTE_LLM_SLOW_MS=10_000,
+    NOTES_ROUTE_MAX_QUEUE_DEPTH=5,
+    NOTES_MAPREDUCE_THRESHOLD_TOKENS=1000,
+)
+class EngineRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _choose(self, tokens=500, tier="full", queue_depth=0, latency=1000.0):
+        from note_generator.generation.routing import choose_engine
+
+        return choose_engine(
+            tokens, tier, queue_depth=queue_depth, llm_latency_ms=latency
+        )
+
+    def test_fast_tier_is_extractive(self):
+        self.assertEqual(self._choose(tier="fast").engine, "extractive")
+
+    def test_full_tier_uses_llm_when_healthy(self):
+        decision = self._choose()
+        self.assertEqual(decision.engine, "llm")
+        self.assertEqual(decision.fallback, "extractive")
+
+    def test_slow_llm_routes_to_extractive(self):
+        decision = self._choose(latency=15_000)
+        self.assertEqual(decision.engine, "extractive")
+        self.assertIn("llm slow", decision.reason)
+
+    def test_busy_queue_only_diverts_long_transcripts(self):
+        self.assertEqual(self._choose(tokens=500, queue_depth=50).engine, "llm")
+        self.assertEqual(self._choose(tokens=5000, queue_depth=50).engine, "extractive")
+
+    def test_unknown_load_counts_as_healthy(self):
+        decision = self._choose(tokens=5000, queue_depth=None, latency=None)
+        self.assertEqual(decision.engine, "llm")
+
+    @patch(
+        "note_generator.grpc_client.process_transcript_via_grpc",
+        return_value=OUTLINE_SECTIONS,
+    )
+    @patch("note_generator.views.generate_blog_from_transcription")
+    @patch("note_generator.views.get_transcript", return_value="routed transcript")
+    @patch("note_generator.views.yt_title", return_value="Routed Video")
+    def test_decision_is_recorded_on_the_job(
+        self, _title, _transcript, mock_generate, _grpc
+    ):
+        from django.contrib.auth.models import User
+
+        from note_generator.models import NotePost
+        from note_generator.tasks import generate_note_task
+
+        user = User.objects.create_user("router", password="pw")
+        result = generate_note_task.apply(
+            args=(user.id, "https://www.youtube.com/watch?v=dQw4w9WgXcQ", "fast")
+        ).get()
+
+        self.assertEqual(result["engine"], "extractive")
+        self.assertEqual(result["route_reason"], "fast tier")
+        self.assertEqual(
+            NotePost.objects.get(pk=result["note_id"]).engine, "extractive"
+        )
+        mock_generate.assert_not_called()
+
+    @patch(
+        "note_generator.grpc_client.process_transcript_via_grpc",
+        return_value=OUTLINE_SECTIONS,
+    )
+    @patch(
+        "note_generator.views.generate_blog_from_transcription",
+        side_effect=RuntimeError("provider down"),
+    )
+    @patch("note_generator.views.get_transcript", return_value="fallback transcript")
+    @patch("note_generator.views.yt_title", return_value="Fallback Video")
+    def test_failed_engine_falls_back_to_the_other(self, *_mocks):
+        from django.contrib.auth.models import User
+
+        from note_generator.tasks import generate_note_task
+
+        user = User.objects.create_user("fallback", password="pw")
+        result = generate_note_task.apply(
+            args=(user.id, "https://www.youtube.com/watch?v=dQw4w9WgXcQ", "full")
+        ).get()
+
+        self.assertIsNone(result["error"])
+        self.assertEqual(result["engine"], "extractive")
+        self.assertIn("llm failed", result["route_reason"])
+
+
+class ProgressiveResultTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch(
+        "note_generator.grpc_client.process_transcript_via_grpc",
+        return_value=OUTLINE_SECTIONS,
+    )
+    @patch("note_generator.views.get_transcript", return_value="two phase transcript")
+    @patch("note_generator.views.yt_title", return_value="Two Phase Video")
+    def test_draft_is_saved_then_upgraded_in_place(self, _title, _transcript, _grpc):
+        from django.contrib.auth.models import User
+
+        from note_generator.models import NotePost
+        from note_generator.tasks import generate_note_task
+
+        seen_during_llm = []
+
+        def fake_generate(transcript, on_token=None):
+            seen_during_llm.extend(
+                NotePost.objects.values_list("generated_content", "is_draft")
+            )
+            return "TL;DR\n- full notes"
+
+        user = User.objects.create_user("phased", password="pw")
+        with patch(
+            "note_generator.views.generate_blog_from_transcription",
+            side_effect=fake_generate,
+        ):
+            result = generate_note_task.apply(
+                args=(user.id, "https://www.youtube.com/watch?v=dQw4w9WgXcQ", "full")
+            ).get()
+
+        self.assertEqual(seen_during_llm, [("TL;DR\n- outline", True)])
+        self.assertEqual(result["phase"], "final")
+        note = NotePost.objects.get()
+        self.assertEqual(note.pk, result["note_id"])
+        self.assertEqual(note.generated_content, "TL;DR\n- full notes")
+        self.assertEqual(note.engine, "llm")
+        self.assertFalse(note.is_draft)
+
+    def _run_with_draft_change(self, change):
+        from django.contrib.auth.models import User
+
+        from note_generator.tasks import generate_note_task
+
+        def fake_generate(transcript, on_token=None):
+            change()
+            return "TL;DR\n- full notes"
+
+        user = User.objects.create_user("changed", password="pw")
+        with patch(
+            "note_generator.grpc_client.process_transcript_via_grpc",
+            return_value=OUTLINE_SECTIONS,
+        ), patch(
+            "note_generator.views.get_transcript", return_value="changed transcript"
+        ), patch(
+            "note_generator.views.yt_title", return_value="Changed Video"
+        ), patch(
+            "note_generator.views.generate_blog_from_transcription",
+            side_effect=fake_generate,
+        ):
+            return generate_note_task.apply(
+                args=(user.id, "https://www.youtube.com/watch?v=dQw4w9WgXcQ", "full")
+            ).get()
+
+    def test_user_edits_to_the_draft_are_kept(self):
+        from note_generator.models import NotePost
+
+        def edit():
+            NotePost.objects.update(generated_content="my edits", is_draft=False)
+
+        result = self._run_with_draft_change(edit)
+
+        note = NotePost.objects.get()
+        self.assertEqual(note.pk, result["note_id"])
+        self.assertEqual(note.generated_content, "my edits")
+        self.assertIn("kept user-edited draft", result["route_reason"])
+
+    def test_deleted_draft_saves_the_final_note_anew(self):
+        from note_generator.models import NotePost
+
+        result = self._run_with_draft_change(lambda: NotePost.objects.all().delete())
+
+        self.assertIsNone(result["error"])
+        note = NotePost.objects.get()
+        self.assertEqual(note.pk, result["note_id"])
+        self.assertEqual(note.generated_content, "TL;DR\n- full notes")
+        self.assertFalse(note.is_draft)
+
+    @patch("celery.result.AsyncResult")
+    def test_task_status_reports_phase_and_draft(self, mock_result):
+        from django.contrib.auth.models import User
+
+        mock_result.return_value.state = "PROGRESS"
+        mock_result.return_value.info = {"phase": "draft", "note_id": 12}
+        self.client.force_login(User.objects.create_user("poller", password="pw"))
+
+        response = self.client.get("/api/task-status/abc/")
+
+        self.assertEqual(
+            response.json(),
+            {"status": "processing", "phase": "draft", "note_id": 12, "error": None},
+        )
+
+
+class NearDuplicateTranscriptTests(TestCase):
+    def setUp(self):
+        import random
+
+        cache.clear()
+        rng = random.Random(7)
+        vocab = [f"word{i}" for i in range(500)]
+        self.original = [rng.choice(vocab) for _ in range(2000)]
+        # A re-upload: same lecture, a handful of words transcribed differently.
+        self.reupload = list(self.original)
+        for i in rng.sample(range(len(self.reupload)), 15):
+            self.reupload[i] = "different"
+        self.unrelated = [rng.choice(vocab) for _ in range(2000)]
+
+    def test_near_duplicate_reuses_generation(self):
+        from note_generator.generation.cache import (
+            get_cached_generation,
+            store_generation,
+        )
+
+        store_generation(" ".join(self.original), "model-a", "lecture notes")
+
+        self.assertEqual(
+            get_cached_generation(" ".join(self.reupload), "model-a"), "lecture notes"
+        )
+        self.assertIsNone(get_cached_generation(" ".join(self.unrelated), "model-a"))
+        # A match only reuses generations from the same model.
+        self.assertIsNone(get_cached_generation(" ".join(self.reupload), "model-b"))
+
+    def test_match_skips_transcripts_without_a_usable_generation(self):
+        from note_generator.generation.cache import (
+            get_cached_generation,
+            store_generation,
+        )
+
+        # Closest to the re-upload, but only generated under an old prompt.
+        store_generation(" ".join(self.original), "model-a", "stale", "notes-v0")
+        sibling = list(self.original)
+        for i in range(0, 2000, 400):
+            sibling[i] = "changed"
+        store_generation(" ".join(sibling), "model-a", "sibling notes")
+
+        self.assertEqual(
+            get_cached_generation(" ".join(self.reupload), "model-a"), "sibling notes"
+        )
+
+    @override_settings(NOTES_DEDUP_THRESHOLD=0)
+    def test_threshold_zero_disables_matching(self):
+        from note_generator.generation.cache import (
+            get_cached_generation,
+            store_generation,
+        )
+        from note_generator.models import TranscriptFingerprint
+
+        store_generation(" ".join(self.original), "model-a", "lecture notes")
+
+        self.assertIsNone(get_cached_generation(" ".join(self.reupload), "model-a"))
+        self.assertFalse(TranscriptFingerprint.objects.exists())
+
+    def test_similarity_estimate_tracks_overlap(self):
+        from note_generator.generation.dedup import (
+            estimated_similarity,
+            minhash_signature,
+        )
+
+        original = minhash_signature(" ".join(self.original))
+        self.assertGreater(
+            estimated_similarity(original, minhash_signature(" ".join(self.reupload))),
+            0.8,
+        )
+        self.assertLess(
+            estimated_similarity(original, minhash_signature(" ".join(self.unrelated))),
+            0.1,
+        )
+        self.assertIsNone(minhash_signature("too short"))
@@ -0,0 +1,243 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import openai
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from note_generator import llm_client
+
+
+def _status_error(cls, status, headers=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return cls("error", response=response, body=None)
+
+
+def _chat_response(text, prompt_tokens=12, completion_tokens=3):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+        usage=SimpleNamespace(
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+        ),
+    )
+
+
+@override_settings(LLM_MAX_RETRIES=2, LLM_BACKOFF_BASE=0.01, LLM_BACKOFF_MAX=0.05)
+@patch("note_generator.llm_client.time.sleep")
+@patch("note_generator.llm_client.get_client")
+class LLMClientTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_retries_rate_limit_then_succeeds(self, mock_get_client, mock_sleep):
+        create = mock_get_client.return_value.chat.completions.create
+        create.side_effect = [
+            _status_error(openai.RateLimitError, 429, {"retry-after": "0.02"}),
+            _chat_response(" notes "),
+        ]
+
+        self.assertEqual(llm_client.complete("p", max_tokens=10, model="m"), "notes")
+        self.assertEqual(create.call_count, 2)
+        # Retry-After wins over the computed backoff.
+        mock_sleep.assert_called_once_with(0.02)
+
+    def test_client_errors_are_not_retried(self, mock_get_client, mock_sleep):
+        create = mock_get_client.return_value.chat.completions.create
+        create.side_effect = _status_error(openai.BadRequestError, 400)
+
+        with self.assertRaises(openai.BadRequestError):
+            llm_client.complete("p", max_tokens=10, model="m")
+        self.assertEqual(create.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    def test_gives_up_after_max_retries(self, mock_get_client, mock_sleep):
+        create = mock_get_client.return_value.chat.completions.create
+        create.side_effect = _status_error(openai.InternalServerError, 503)
+
+        with self.assertRaises(openai.InternalServerError):
+            llm_client.complete("p", max_tokens=10, model="m")
+        self.assertEqual(create.call_count, 3)
+        for call in mock_sleep.call_args_list:
+            self.assertLessEqual(call.args[0], 0.05)
+
+    def test_records_tokens_and_latency(self, mock_get_client, _sleep):
+        create = mock_get_client.return_value.chat.completions.create
+        create.return_value = _chat_response("a", prompt_tokens=100)
+
+        llm_client.complete("p", max_tokens=10, model="stats-model")
+        llm_client.complete("p", max_tokens=10, model="stats-model")
+
+        stats = llm_client.get_llm_stats("stats-model")
+        self.assertEqual(stats["calls"], 2)
+        self.assertEqual(stats["input_tokens"], 200)
+        self.assertEqual(stats["output_tokens"], 6)
+        self.assertGreaterEqual(stats["latency_ewma_ms"], 0)
+
+
+@override_settings(
+    LLM_RATE_LIMITS={"limited-model": {"rpm": 60, "tpm": 6000}},
+    LLM_RATE_LIMIT_MAX_WAIT=30,
+)
+@patch("note_generator.llm_ratelimit.time.sleep")
+@patch("note_generator.llm_ratelimit.get_redis")
+class LLMRateLimiterTests(TestCase):
+    def test_waits_for_reserved_slot(self, mock_get_redis, mock_sleep):
+        from note_generator.llm_ratelimit import acquire
+
+        mock_get_redis.return_value.eval.return_value = [1, 1_500_000]
+
+        self.assertEqual(acquire("limited-model", 100), 1.5)
+        mock_sleep.assert_called_once_with(1.5)
+        args = mock_get_redis.return_value.eval.call_args.args
+        # One request costs 1s at 60 rpm, one token 10ms at 6000 tpm.
+        self.assertEqual(
+            args[2:7],
+            (
+                "llm:ratelimit:limited-model:requests",
+                "llm:ratelimit:limited-model:tokens",
+                1.0,
+                0.01,
+                100,
+            ),
+        )
+
+    def test_refuses_waits_beyond_max(self, mock_get_redis, mock_sleep):
+        from note_generator.llm_ratelimit import LLMRateLimitExceeded, acquire
+
+        mock_get_redis.return_value.eval.return_value = [0, 90_000_000]
+
+        with self.assertRaises(LLMRateLimitExceeded):
+            acquire("limited-model", 100)
+        mock_sleep.assert_not_called()
+
+    def test_unlisted_model_and_missing_redis_are_not_limited(
+        self, mock_get_redis, mock_sleep
+    ):
+        from note_generator.llm_ratelimit import acquire
+
+        self.assertEqual(acquire("other-model", 100), 0.0)
+        mock_get_redis.return_value.eval.assert_not_called()
+
+        mock_get_redis.return_value = None
+        self.assertEqual(acquire("limited-model", 100), 0.0)
+        mock_sleep.assert_not_called()
+
+    def test_redis_errors_do_not_block_calls(self, mock_get_redis, mock_sleep):
+        from note_generator.llm_ratelimit import acquire
+
+        mock_get_redis.return_value.eval.side_effect = ConnectionError("down")
+
+        self.assertEqual(acquire("limited-model", 100), 0.0)
+
+
+@override_settings(RAG_CHAT_MODEL="chat-model", RAG_ANSWER_TOKEN_ESTIMATE=500)
+class ThrottledChatModelTests(TestCase):
+    @patch("note_generator.rag.chain.acquire")
+    def test_cache_hits_do_not_reserve_capacity(self, mock_acquire):
+        from langchain_core.caches import InMemoryCache
+        from langchain_core.messages import AIMessage
+        from langchain_core.outputs import ChatGeneration, ChatResult
+        from langchain_openai import ChatOpenAI
+
+        from note_generator.rag.chain import ThrottledChatOpenAI
+
+        llm = ThrottledChatOpenAI(
+            model="chat-model", api_key="test", cache=InMemoryCache()
+        )
+        result = ChatResult(generations=[ChatGeneration(message=AIMessage("hi"))])
+        with patch.object(ChatOpenAI, "_generate", return_value=result) as generate:
+            self.assertEqual(llm.invoke("hello").content, "hi")
+            self.assertEqual(llm.invoke("hello").content, "hi")
+
+        generate.assert_called_once()
+        mock_acquire.assert_called_once()
+        model, tokens = mock_acquire.call_args.args
+        self.assertEqual(model, "chat-model")
+        self.assertGreater(tokens, 500)
+
+    @override_settings(LLM_MAX_RETRIES=2, LLM_BACKOFF_BASE=0.01, LLM_BACKOFF_MAX=0.05)
+    @patch("note_generator.llm_client.time.sleep")
+    @patch("note_generator.rag.chain.acquire")
+    def test_retries_reserve_capacity_per_attempt(self, mock_acquire, mock_sleep):
+        from langchain_core.messages import AIMessage
+        from langchain_core.outputs import ChatGeneration, ChatResult
+        from langchain_openai import ChatOpenAI
+
+        from note_generator.rag.chain import ThrottledChatOpenAI
+
+        llm = ThrottledChatOpenAI(model="chat-model", api_key="test")
+        result = ChatResult(generations=[ChatGeneration(message=AIMessage("hi"))])
+        with patch.object(
+            ChatOpenAI,
+            "_generate",
+            side_effect=[_status_error(openai.RateLimitError, 429), result],
+        ):
+            self.assertEqual(llm.invoke("hello").content, "hi")
+
+        self.assertEqual(mock_acquire.call_count, 2)
+        mock_sleep.assert_called_once()
+
+
+@override_settings(
+    OPENAI_API_KEY="test",
+    LLM_MAX_RETRIES=2,
+    LLM_BACKOFF_BASE=0.01,
+    LLM_BACKOFF_MAX=0.05,
+)
+@patch("note_generator.llm_client.time.sleep")
+class RAGClientTests(TestCase):
+    def setUp(self):
+        from note_generator.rag import vectorstore
+
+        vectorstore._build_embeddings.cache_clear()
+        self.addCleanup(vectorstore._build_embeddings.cache_clear)
+
+    def test_embeddings_are_rebuilt_after_fork(self, _sleep):
+        from note_generator.rag.vectorstore import get_embeddings
+
+        with patch("os.getpid", return_value=100):
+            parent = get_embeddings()
+            self.assertIs(get_embeddings(), parent)
+        with patch("os.getpid", return_value=101):
+            self.assertIsNot(get_embeddings(), parent)
+
+    @patch("note_generator.llm_client.get_client")
+    def test_embedding_requests_use_the_shared_retry_policy(
+        self, mock_get_client, mock_sleep
+    ):
+        from note_generator.rag.vectorstore import get_embeddings
+
+        create = mock_get_client.return_value.embeddings.create
+        create.side_effect = [
+            _status_error(openai.RateLimitError, 429, {"retry-after": "0.02"}),
+            {"data": [{"embedding": [1.0, 0.0]}]},
+        ]
+
+        # The request OpenAIEmbeddings makes for each batch of inputs.
+        response = get_embeddings().client.create(input=["hello"], model="embed")
+        self.assertEqual(response["data"][0]["embedding"], [1.0, 0.0])
+        self.assertEqual(create.call_count, 2)
+        mock_sleep.assert_called_once_with(0.02)
+
+    @override_settings(RAG_EMBEDDING_MODEL="embed-model")
+    @patch("note_generator.rag.vectorstore.acquire")
+    @patch("note_generator.llm_client.get_client")
+    def test_embedding_requests_reserve_capacity(
+        self, mock_get_client, mock_acquire, _sleep
+    ):
+        from note_generator.rag.vectorstore import get_embeddings
+
+        mock_get_client.return_value.embeddings.create.return_value = {"data": []}
+
+        # Text and pre-tokenized input, as OpenAIEmbeddings sends either.
+        get_embeddings().client.create(input=["hello world"], model="embed-model")
+        get_embeddings().client.create(input=[[1, 2, 3]], model="embed-model")
+
+        (model, text_tokens), (_, id_tokens) = (
+            c.args for c in mock_acquire.call_args_list
+        )
+        self.assertEqual(model, "embed-model")
+        self.assertGreater(text_tokens, 0)
+        self.assertEqual(id_tokens, 3)
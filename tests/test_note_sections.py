@@ -0,0 +1,206 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from note_generator.models import NoteEmbedding, NotePost
+from note_generator.utils.note_sections import (
+    note_fields,
+    parse_sections,
+    render_sections,
+    text_note_fields,
+)
+from note_generator.utils.notion_export import sections_to_notion_blocks
+
+NOTES_TEXT = """TL;DR
+- First point
+  - Detail
+
+STEP-BY-STEP
+1) Open it
+2) Close it
+
+QUICK CHECK QUIZ (with answers)
+Q1) Why?
+A1) Because."""
+
+
+class ParseSectionsTests(TestCase):
+    def test_notes_format_is_parsed_into_typed_items(self):
+        sections = parse_sections(NOTES_TEXT)
+
+        self.assertEqual(
+            [s["heading"] for s in sections],
+            ["TL;DR", "STEP-BY-STEP", "QUICK CHECK QUIZ (with answers)"],
+        )
+        self.assertEqual(
+            sections[0]["items"],
+            [
+                {"kind": "bullet", "text": "First point", "level": 0},
+                {"kind": "bullet", "text": "Detail", "level": 1},
+            ],
+        )
+        self.assertEqual(
+            [i["kind"] for i in sections[1]["items"]], ["numbered", "numbered"]
+        )
+        self.assertEqual(
+            sections[2]["items"][0], {"kind": "paragraph", "text": "Q1) Why?"}
+        )
+
+    def test_text_before_first_heading_gets_untitled_section(self):
+        sections = parse_sections("intro line\nTL;DR\n- x")
+        self.assertEqual(sections[0]["heading"], "")
+        self.assertEqual(sections[1]["heading"], "TL;DR")
+
+    def test_render_round_trips_the_structure(self):
+        sections = parse_sections(NOTES_TEXT)
+        self.assertEqual(parse_sections(render_sections(sections)), sections)
+
+    def test_quiz_answers_and_numbering_survive_a_round_trip(self):
+        text = (
+            "QUICK CHECK QUIZ (with answers)\n"
+            "Q1) Which protocol is connectionless?\n"
+            "A1) UDP.\n"
+            "\n"
+            "Q2) Which layer routes packets?\n"
+            "A2) IP.\n"
+            "\n"
+            "STEP-BY-STEP\n"
+            "1) Open the socket\n"
+            "A1) UDP.\n"
+            "2) Send\n"
+            "10) Last q"
+        )
+
+        sections = parse_sections(text)
+
+        self.assertEqual(
+            [s["heading"] for s in sections],
+            ["QUICK CHECK QUIZ (with answers)", "STEP-BY-STEP"],
+        )
+        self.assertEqual(
+            [i.get("number") for i in sections[1]["items"]], [1, None, 2, 10]
+        )
+        self.assertTrue(sections[0]["items"][2]["blank_before"])
+        self.assertEqual(render_sections(sections), text)
+
+    def test_wrapped_lines_stay_with_their_item(self):
+        text = (
+            "TL;DR\n"
+            "- Gradient descent repeatedly steps against the gradient\n"
+            "  until the loss stops improving.\n"
+            "  - Each step is scaled by\n"
+            "    the learning rate.\n"
+            "1) Pick a learning rate\n"
+            "   small enough to converge."
+        )
+
+        sections = parse_sections(text)
+
+        self.assertEqual(
+            [i["text"] for i in sections[0]["items"]],
+            [
+                "Gradient descent repeatedly steps against the gradient\n"
+                "until the loss stops improving.",
+                "Each step is scaled by\nthe learning rate.",
+                "Pick a learning rate\nsmall enough to converge.",
+            ],
+        )
+        self.assertEqual(parse_sections(render_sections(sections)), sections)
+
+    def test_text_notes_are_stored_verbatim(self):
+        text = "TL;DR\n- one\n   wrapped oddly"
+        self.assertEqual(
+            text_note_fields(text),
+            {"sections": parse_sections(text), "generated_content": text},
+        )
+
+    def test_note_fields_derive_text_from_sections(self):
+        sections = parse_sections("TL;DR\n- one")
+        self.assertEqual(
+            note_fields(sections),
+            {"sections": sections, "generated_content": "TL;DR\n- one"},
+        )
+
+
+class SectionConsumersTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("sections", password="pw")
+        self.note = NotePost.objects.create(
+            user=self.user,
+            youtube_title="Structured",
+            youtube_link="",
+            **note_fields(parse_sections(NOTES_TEXT)),
+        )
+
+    def test_notion_blocks_come_from_sections(self):
+        blocks = sections_to_notion_blocks(self.note.sections)
+        self.assertEqual(
+            [b["type"] for b in blocks[:3]],
+            ["heading_2", "bulleted_list_item", "bulleted_list_item"],
+        )
+        self.assertIn("numbered_list_item", [b["type"] for b in blocks])
+
+    def test_rows_without_sections_are_parsed_on_read(self):
+        NotePost.objects.filter(pk=self.note.pk).update(sections=[])
+        self.note.refresh_from_db()
+        self.assertEqual(len(self.note.get_sections()), 3)
+
+    def test_pdf_and_markdown_exports_use_sections(self):
+        self.client.force_login(self.user)
+
+        pdf = self.client.get(f"/note-export/{self.note.pk}/?format=pdf")
+        self.assertEqual(pdf.status_code, 200)
+        self.assertTrue(pdf.content.startswith(b"%PDF"))
+
+        md = self.client.get(f"/note-export/{self.note.pk}/?format=md").content
+        self.assertIn(b"### STEP-BY-STEP", md)
+        self.assertIn(b"2. Close it", md)
+
+    def test_editing_a_content_service_note_keeps_its_headings(self):
+        sections = [
+            {"heading": "TL;DR", "items": [{"kind": "bullet", "text": "Overview"}]},
+            {
+                "heading": "Gradient descent",
+                "items": [{"kind": "bullet", "text": "Steps downhill", "level": 0}],
+            },
+            {
+                "heading": "Key Terms",
+                "items": [{"kind": "bullet", "text": "Learning rate", "level": 0}],
+            },
+        ]
+        note = NotePost.objects.create(
+            user=self.user,
+            youtube_title="Outline",
+            youtube_link="",
+            **note_fields(sections),
+            engine=NotePost.Engine.EXTRACTIVE,
+        )
+        self.client.force_login(self.user)
+
+        self.client.post(
+            f"/note-edit/{note.pk}/",
+            {"youtube_title": "Outline", "generated_content": note.generated_content},
+        )
+
+        note.refresh_from_db()
+        self.assertEqual(
+            [s["heading"] for s in note.sections],
+            ["TL;DR", "Gradient descent", "Key Terms"],
+        )
+        self.assertEqual(note.sections[1]["items"][0]["text"], "Steps downhill")
+
+    @patch("note_generator.rag.embed.get_vectorstore")
+    def test_embedding_writes_one_vector_per_section(self, mock_vectorstore):
+        from note_generator.rag.embed import embed_note
+
+        embed_note(self.note)
+
+        docs = mock_vectorstore.return_value.add_documents.call_args.args[0]
+        self.assertEqual(
+            [d.metadata["section"] for d in docs],
+            ["TL;DR", "STEP-BY-STEP", "QUICK CHECK QUIZ (with answers)"],
+        )
+        embedding = NoteEmbedding.objects.get(note=self.note)
+        self.assertEqual(len(embedding.vector_ids), 3)
+        self.assertEqual(embedding.vector_id, embedding.vector_ids[0])